@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+@file bench_report.py
+@author Y. Kasuga
+@date 2021/6/12
+@brief Benchmark of aggregation over save files with a pool of processes.
+
+python -m benchmarks.bench_report [number of files]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from timekeeper.json_file import JsonFile
+from timekeeper.report import aggregate_files, find_save_files
+
+
+def write_files(dir_path: str, num_files: int) -> None:
+    """Write save files of random days
+
+    Args:
+        dir_path (str): Directory to write the files
+        num_files (int): Number of files
+    """
+    rand = random.Random(0)
+    for n in range(num_files):
+        user_dir = os.path.join(dir_path, f"user{n % 50:02}")
+        os.makedirs(user_dir, exist_ok=True)
+
+        seconds = 8 * 3600
+        task_list = []
+        for _ in range(20):
+            task_list.append({
+                "start_time": f"{seconds // 3600:02}:{seconds // 60 % 60:02}:00",
+                "ticket_id": rand.randrange(1, 200),
+                "activity_id": rand.randrange(1, 5),
+                "comment": "Benchmark",
+            })
+            seconds += rand.randrange(5, 60) * 60
+
+        jsonFile = JsonFile()
+        jsonFile.open(os.path.join(user_dir, f"{n:06}.json"), "w")
+        jsonFile.write({"date": f"2021-{n % 12 + 1:02}-{n % 28 + 1:02}", "task_list": task_list})
+        del jsonFile
+
+
+def main() -> None:
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    with tempfile.TemporaryDirectory() as dir_path:
+        write_files(dir_path, num_files)
+        paths = find_save_files([dir_path])
+
+        processes = 1
+        while processes <= (os.cpu_count() or 1):
+            start = time.perf_counter()
+            _, num_aggregated, _ = aggregate_files(paths, processes)
+            elapsed = time.perf_counter() - start
+            print(f"processes={processes:3}: {num_aggregated / elapsed:10.0f} files/s")
+            processes *= 2
+
+
+if __name__ == "__main__":
+    main()
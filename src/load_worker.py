@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+@file load_worker.py
+@author Y. Kasuga
+@date 2021/10/9
+@brief Definition of LoadWorker class
+"""
+
+from typing import Callable
+
+from PyQt5.QtCore import QThread
+
+from timekeeper.option_struct import OptionStruct
+from timekeeper.redmine_client import login
+
+
+class LoadWorker(QThread):
+    """
+    @class LoadWorker
+    @brief Log in to Redmine and fetch something from it off the GUI thread.
+    @detail Connect finished to show what is fetched. It is emitted whether or not the fetch succeeds.
+    """
+    def __init__(self, optionStruct: OptionStruct, fetch: Callable[[object], object], what: str) -> None:
+        """
+        @fn __init__
+        @brief Constructor of LoadWorker class.
+        @param optionStruct Specify Redmine server, username and password.
+        @param fetch Function to fetch with redminelib.Redmine. Called in the thread.
+        @param what Name of what is fetched, for the error message.
+        """
+        super().__init__()
+
+        self.optionStruct = optionStruct
+        self.fetch = fetch
+        self.what = what
+
+    def run(self) -> None:
+        """
+        @fn run
+        @brief Log in and fetch. Runs in the thread.
+        """
+        try:
+            self.fetch(login(self.optionStruct.redmine_server, self.optionStruct.username, self.optionStruct.password))
+        except Exception as e:
+            print(f"Cannot fetch {self.what}: {e or type(e).__name__}")
@@ -6,13 +6,21 @@
 @brief Definition of MyWindow class
 """
 
+import os
+
 from PyQt5.QtWidgets import QMainWindow, QAction, QWidget, qApp
 from PyQt5.QtWidgets import QVBoxLayout
 from PyQt5.QtWidgets import QPushButton
 from PyQt5.QtWidgets import QDialog
 
 from src.task_list_widget import TaskListWidget
-from src.time_keeper_option import TimeKeeperOption, OptionStruct
+from src.time_keeper_option import TimeKeeperOption
+from timekeeper.option_struct import OptionStruct
+from timekeeper.redmine_entry import RedmineEntry, SubmitResult
+from timekeeper.history_store import HistoryStore, open_history
+from timekeeper.ledger import LEDGER_FILE, SubmissionLedger
+from timekeeper.outbox import OUTBOX_FILE, Outbox, OutboxReplayer
+from timekeeper.redmine_client import close_all
 
 
 class MyWindow(QMainWindow):
@@ -36,6 +44,21 @@ class MyWindow(QMainWindow):
         self.optionStruct = self.optionWidget.getOptionStruct()
         self.timeKeeper.setOptionStruct(self.optionStruct)
 
+        # Entries submitted so far, not to submit them twice
+        self.ledger = SubmissionLedger(LEDGER_FILE)
+        self.timeKeeper.task_list.set_ledger(self.ledger)
+
+        # Replay entries which could not be submitted while the server was unavailable
+        self.outbox = Outbox(OUTBOX_FILE)
+        self.replayer = OutboxReplayer(self.outbox, self._replayTimeEntry,
+            on_result=lambda result: print(f"Replayed: {result}"))
+        self.timeKeeper.task_list.set_outbox(self.outbox, self.replayer)
+        self.replayer.start()
+
+        qApp.aboutToQuit.connect(lambda: self.timeKeeper.closeAutosave())
+        qApp.aboutToQuit.connect(lambda: self.replayer.stop())
+        qApp.aboutToQuit.connect(lambda: close_all())
+
     def initUI(self) -> None:
         """
         @fn initUI
@@ -55,6 +78,14 @@ class MyWindow(QMainWindow):
         loadAction.setStatusTip("Load save file")
         loadAction.triggered.connect(lambda: self.loadSaveFile())
 
+        exportAction = QAction("&Export", self)
+        exportAction.setStatusTip("Export task list to save file")
+        exportAction.triggered.connect(lambda: self.exportTasks())
+
+        importAction = QAction("&Import", self)
+        importAction.setStatusTip("Import task list from save file")
+        importAction.triggered.connect(lambda: self.importSaveFile())
+
         optionAction = QAction("&Option", self)
         optionAction.setShortcut("Ctrl+O")
         optionAction.setStatusTip("Open Option Dialog")
@@ -69,13 +100,56 @@ class MyWindow(QMainWindow):
         fileMenu = menubar.addMenu("&File")
         fileMenu.addAction(saveAction)
         fileMenu.addAction(loadAction)
+        fileMenu.addAction(exportAction)
+        fileMenu.addAction(importAction)
         fileMenu.addAction(optionAction)
         fileMenu.addAction(exitAction)
 
         self.setCentralWidget(self.timeKeeper)
 
-    def saveTasks(self, save_file="") -> None:
-        """Save tasks
+    def _replayTimeEntry(self, *args) -> SubmitResult:
+        """Submit a time entry of the outbox with the current option. Called from the replayer thread.
+
+        Args:
+            args: Arguments of RedmineEntry.submitTimeEntry
+
+        Returns:
+            SubmitResult: Result of the entry
+        """
+        optionStruct = self.optionStruct
+        if not optionStruct.redmine_server:
+            raise ValueError("Redmine server is not specified")
+
+        redmine = RedmineEntry(optionStruct.redmine_server,
+            username=optionStruct.username, password=optionStruct.password, ledger=self.ledger)
+        return redmine.submitTimeEntry(*args)
+
+    def saveTasks(self) -> None:
+        """Save tasks of the day to the history folder, or to the save file if no history folder is selected
+        """
+        history_folder = self.optionStruct.history_folder
+        if history_folder:
+            history_store = open_history(history_folder)
+            self.timeKeeper.saveHistory(history_store)
+            history_store.close()
+            return
+
+        self.exportTasks()
+
+    def loadSaveFile(self) -> None:
+        """Load tasks of the day from the history folder, or from the save file if no history folder is selected
+        """
+        history_folder = self.optionStruct.history_folder
+        if history_folder:
+            history_store = open_history(history_folder)
+            self.timeKeeper.loadHistory(history_store)
+            history_store.close()
+            return
+
+        self.importSaveFile()
+
+    def exportTasks(self) -> None:
+        """Export tasks to the save file
         """
         save_file = self.optionStruct.save_file
 
@@ -85,8 +159,8 @@ class MyWindow(QMainWindow):
 
         self.timeKeeper.saveTasks(save_file)
 
-    def loadSaveFile(self) -> None:
-        """Load save file
+    def importSaveFile(self) -> None:
+        """Import tasks from the save file
         """
         save_file = self.optionStruct.save_file
 
@@ -168,6 +242,24 @@ class TimeKeeperWidget(QWidget):
         """
         self.optionStruct = optionStruct
 
+        # Autosave to the history folder, next to the history database,
+        # or to the current folder if not selected
+        autosave_folder = optionStruct.history_folder or "."
+        if not os.path.isdir(autosave_folder):
+            autosave_folder = os.path.dirname(autosave_folder) or "."
+        path_autosave = os.path.join(autosave_folder, f".autosave_{optionStruct.today.isoformat()}.json")
+        if self.task_list.journal is None or self.task_list.journal.path_day != path_autosave:
+            self.task_list.start_autosave(path_autosave, optionStruct.today)
+
+        if optionStruct.redmine_server:
+            self.task_list.load_activities(optionStruct)
+            self.task_list.load_tickets(optionStruct)
+
+    def closeAutosave(self) -> None:
+        """Write pending edits and stop autosave
+        """
+        self.task_list.close_autosave()
+
     def saveTasks(self, pathFile: str) -> None:
         """Save tasks
 
@@ -184,6 +276,22 @@ class TimeKeeperWidget(QWidget):
         """
         self.task_list.load(pathFile)
 
+    def saveHistory(self, history_store: HistoryStore) -> None:
+        """Save tasks of the day to the history store
+
+        Args:
+            history_store (HistoryStore): History store or SqliteHistory to save to
+        """
+        self.task_list.save_history(history_store, self.optionStruct.today)
+
+    def loadHistory(self, history_store: HistoryStore) -> None:
+        """Load tasks of the day from the history store
+
+        Args:
+            history_store (HistoryStore): History store or SqliteHistory to load from
+        """
+        self.task_list.load_history(history_store, self.optionStruct.today)
+
     def _submitTaskList(self) -> None:
         """
         @fn _submitTaskList
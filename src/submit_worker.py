@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+@file submit_worker.py
+@author Y. Kasuga
+@date 2021/8/14
+@brief Definition of CheckWorker and SubmitWorker classes
+"""
+
+import threading
+from copy import copy
+from datetime import date
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from timekeeper.ledger import SubmissionLedger
+from timekeeper.option_struct import OptionStruct
+from timekeeper.outbox import Outbox
+from timekeeper.redmine_entry import RedmineEntry, SubmitResult
+from timekeeper.ticket_cache import TicketCache
+from timekeeper.timedelta_to_hour import timedelta_to_hour
+
+
+class CheckWorker(QThread):
+    """
+    @class CheckWorker
+    @brief Check the tickets of the day on Redmine off the GUI thread before submitting.
+    """
+    # Invalid ticket numbers. Empty if they cannot be checked.
+    checked = pyqtSignal(list)
+
+    def __init__(self, optionStruct: OptionStruct, ticket_numbers: list, ticket_cache: TicketCache=None) -> None:
+        """
+        @fn __init__
+        @brief Constructor of CheckWorker class.
+        @param optionStruct Specify Redmine server, username and password.
+        @param ticket_numbers Ticket numbers to check.
+        @param ticket_cache Cache to put the fetched tickets in.
+        """
+        super().__init__()
+
+        self.optionStruct = optionStruct
+        self.ticket_numbers = list(ticket_numbers)
+        self.ticket_cache = ticket_cache
+
+    def run(self) -> None:
+        """
+        @fn run
+        @brief Check the tickets in a single query. Runs in the thread.
+        """
+        try:
+            redmine = RedmineEntry(self.optionStruct.redmine_server,
+                username=self.optionStruct.username, password=self.optionStruct.password)
+            invalid_tickets = redmine.findInvalidTickets(self.ticket_numbers, self.ticket_cache)
+        except Exception as e:
+            # Left to the submission, which keeps entries in the outbox if the server is unavailable
+            print(f"Cannot check tickets: {e or type(e).__name__}")
+            invalid_tickets = []
+        self.checked.emit(invalid_tickets)
+
+
+class SubmitWorker(QThread):
+    """
+    @class SubmitWorker
+    @brief Submit time entries to Redmine off the GUI thread.
+    @detail Signals are emitted from worker threads and queued to the slots in the GUI thread.
+    """
+    # Index of the task and its result, as each entry finishes
+    progress = pyqtSignal(int, SubmitResult)
+    # Result of every task in order of the tasks
+    submitted = pyqtSignal(list)
+
+    def __init__(self, optionStruct: OptionStruct, today: date, tasks: list, outbox: Outbox=None,
+        ledger: SubmissionLedger=None) -> None:
+        """
+        @fn __init__
+        @brief Constructor of SubmitWorker class.
+        @param optionStruct Specify Redmine server, username, password and number of concurrent submissions.
+        @param today Logged date.
+        @param tasks Tasks to submit.
+        @param outbox Outbox to put the entries failed while the server is unavailable in.
+        @param ledger Ledger of the submitted entries, not to submit an entry twice.
+        """
+        super().__init__()
+
+        self.optionStruct = optionStruct
+        self.today = today
+        self.outbox = outbox
+        self.ledger = ledger
+        # Detached copies so that the list of the widget can change while submitting
+        self.tasks = [copy(task) for task in tasks]
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        @fn cancel
+        @brief Stop submitting entries which are not started yet.
+        """
+        self._cancel.set()
+
+    def run(self) -> None:
+        """
+        @fn run
+        @brief Submit the tasks. Runs in the thread.
+        """
+        try:
+            redmine = RedmineEntry(self.optionStruct.redmine_server,
+                username=self.optionStruct.username, password=self.optionStruct.password,
+                pool_size=self.optionStruct.max_workers, ledger=self.ledger)
+        except Exception as e:
+            results = []
+            for index, task in enumerate(self.tasks):
+                result = SubmitResult(task.ticket_number, timedelta_to_hour(task.logged_time),
+                    task.activity_id, task.comment)
+                result.error = str(e) or type(e).__name__
+                self.progress.emit(index, result)
+                results.append(result)
+            self.submitted.emit(results)
+            return
+
+        results = redmine.submitTimeEntries(
+            self.today, self.tasks, self.optionStruct.max_workers,
+            on_result=self.progress.emit, cancel=self._cancel, outbox=self.outbox, reconcile=True
+        )
+        self.submitted.emit(results)
@@ -6,19 +6,28 @@
 @brief Definition of TaskListWidget class
 """
 
-from datetime import timedelta
+from datetime import date, timedelta
 from typing import List
 from PyQt5 import QtCore
 from PyQt5.QtCore import QTime
 from PyQt5.QtWidgets import QTableWidgetItem, QTimeEdit, QWidget
 from PyQt5.QtWidgets import QVBoxLayout
-from PyQt5.QtWidgets import QTableWidget, QComboBox, QLineEdit, QCompleter
-from PyQt5.QtWidgets import QMessageBox
-
-from src.task_log_list import TaskLogList
-from src.time_keeper_option import OptionStruct
-from src.redmine_entry import RedmineEntry
-from src.json_file import JsonFile
+from PyQt5.QtWidgets import QTableWidget, QComboBox, QCompleter
+from PyQt5.QtWidgets import QApplication, QMessageBox, QProgressDialog
+
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID, saved_activity_id
+from timekeeper.task_log_list import TaskLogList
+from timekeeper.activity_catalogue import ActivityCatalogue
+from timekeeper.ticket_cache import TicketCache, parse_ticket
+from timekeeper.option_struct import OptionStruct
+from timekeeper.redmine_entry import SubmitResult
+from timekeeper.json_file import JsonFile
+from timekeeper.history_store import HistoryStore
+from timekeeper.journal import DayJournal
+from timekeeper.ledger import SubmissionLedger
+from timekeeper.outbox import Outbox, OutboxReplayer
+from src.load_worker import LoadWorker
+from src.submit_worker import CheckWorker, SubmitWorker
 
 
 class TaskListWidget(QWidget):
@@ -26,6 +35,9 @@ class TaskListWidget(QWidget):
     @class TaskList
     @brief Data set to contain the list of tasks and times spent.
     """
+    # Items of the ticket combo boxes which are not issues of the server
+    fixed_tickets = {-1: "Lunch"}
+
     def __init__(self) -> None:
         """
         @fn __init__
@@ -34,6 +46,23 @@ class TaskListWidget(QWidget):
         super().__init__()
 
         self.task_log_list = TaskLogList()
+        # Autosave of edits, started by start_autosave()
+        self.journal: DayJournal = None
+        # Check of the tickets and submission running in the background
+        self._check_worker: CheckWorker = None
+        self._submit_worker: SubmitWorker = None
+        self._submit_progress: QProgressDialog = None
+        # Entries failed while the server is unavailable, set by set_outbox()
+        self.outbox: Outbox = None
+        self.replayer: OutboxReplayer = None
+        # Entries submitted so far, set by set_ledger()
+        self.ledger: SubmissionLedger = None
+        # Activities of the server, set by load_activities()
+        self.activities: ActivityCatalogue = None
+        # Subjects of the tickets of the server, set by load_tickets()
+        self.ticket_cache: TicketCache = None
+        # Activities and tickets being fetched in the background
+        self._load_workers = set()
 
         # TODO Number of initail task lists
         initial_row = 1
@@ -46,19 +75,14 @@ class TaskListWidget(QWidget):
         # Set last column to stretch
         self.task_table.horizontalHeader().setStretchLastSection(True)
 
-        # TODO Examples of tickets
-        self.tickets = {"Lunch": "-1", "#001 hoge": "001", "#002 moge": "002", "#003 hage": "003"}
+        # Record edits of comment
+        self.task_table.cellChanged.connect(
+            lambda row, column: self._recordRow(row) if column == 4 else None
+        )
 
         for n in range(initial_row):
             self._setTaskRow(n)
 
-        edit = QLineEdit()
-        candidates = ["#001", "#002", "#003", "#101", "#102", "#201"]
-        comp = QCompleter(candidates, edit)
-        comp.setCompletionMode(QCompleter.PopupCompletion)
-        edit.setCompleter(comp)
-        self.task_table.setCellWidget(0, 3, edit)
-
         self.layout = QVBoxLayout()
         self.layout.addWidget(self.task_table)
         self.setLayout(self.layout)
@@ -77,15 +101,167 @@ class TaskListWidget(QWidget):
         dateTimeEdit.setFrame(False)
         dateTimeEdit.setTime(QTime.currentTime())
         dateTimeEdit.dateTimeChanged.connect(lambda: self._calculateDuration())
+        dateTimeEdit.timeChanged.connect(lambda: self._recordRow(row))
         self.task_table.setCellWidget(row, 0, dateTimeEdit)
 
-        # Ticket
+        # Ticket, completed by the number or a part of the subject
         comboBox = QComboBox()
         comboBox.setEditable(True)
-        comboBox.addItems(self.tickets.values())
+        comboBox.setInsertPolicy(QComboBox.NoInsert)
+        comboBox.completer().setFilterMode(QtCore.Qt.MatchContains)
+        comboBox.completer().setCompletionMode(QCompleter.PopupCompletion)
+        self._setTicketItems(comboBox, -1)
         comboBox.setFrame(False)
+        comboBox.currentTextChanged.connect(lambda: self._recordRow(row))
         self.task_table.setCellWidget(row, 2, comboBox)
 
+        # Activity
+        comboBox = QComboBox()
+        comboBox.setFrame(False)
+        self._setActivityItems(comboBox, DEFAULT_ACTIVITY_ID)
+        comboBox.currentIndexChanged.connect(lambda: self._recordRow(row))
+        self.task_table.setCellWidget(row, 3, comboBox)
+
+    def _ticketTitle(self, ticket_number: int) -> str:
+        """
+        @fn _ticketTitle
+        @brief Get the text of a ticket in the combo boxes.
+        @param ticket_number Ticket number.
+        @return Title of the ticket, or the number alone if its subject is not cached.
+        """
+        if ticket_number in self.fixed_tickets:
+            return f"{ticket_number} {self.fixed_tickets[ticket_number]}"
+        if self.ticket_cache is None:
+            return str(ticket_number)
+        return self.ticket_cache.title(ticket_number)
+
+    def _ticketNumber(self, row: int) -> int:
+        """
+        @fn _ticketNumber
+        @brief Get the ticket number of a row.
+        @param row Row of the task.
+        @return Ticket number.
+        @exception ValueError if the text of the ticket is not a number.
+        """
+        return parse_ticket(self.task_table.cellWidget(row, 2).currentText())
+
+    def _setTicketItems(self, comboBox: QComboBox, ticket_number: int) -> None:
+        """
+        @fn _setTicketItems
+        @brief Fill a ticket combo box with the tickets used recently and select one.
+        @param comboBox Combo box of the ticket column.
+        @param ticket_number Ticket number to select.
+        """
+        comboBox.blockSignals(True)
+        comboBox.clear()
+        comboBox.addItems(self._ticketTitle(fixed) for fixed in self.fixed_tickets)
+        if self.ticket_cache is not None:
+            comboBox.addItems(f"#{ticket['id']} {ticket['subject']}" for ticket in self.ticket_cache.recent())
+        comboBox.setCurrentText(self._ticketTitle(ticket_number))
+        comboBox.blockSignals(False)
+
+    def _updateTicketItems(self) -> None:
+        """
+        @fn _updateTicketItems
+        @brief Show the cached titles in the ticket combo boxes of every row.
+        """
+        for n in range(self.task_table.rowCount()):
+            comboBox = self.task_table.cellWidget(n, 2)
+            try:
+                ticket_number = parse_ticket(comboBox.currentText())
+            except ValueError:
+                # Left as typed
+                continue
+            self._setTicketItems(comboBox, ticket_number)
+
+    def load_tickets(self, optionStruct: OptionStruct) -> None:
+        """
+        @fn load_tickets
+        @brief Open the ticket cache of the server and fetch the subjects of the tickets in the rows which are not cached.
+        @detail The subjects are fetched in the background and shown when it finishes.
+        @param optionStruct Specify Redmine server, username and password.
+        """
+        if self.ticket_cache is None or self.ticket_cache.url != optionStruct.redmine_server.rstrip("/"):
+            if self.ticket_cache is not None:
+                self.ticket_cache.close()
+            self.ticket_cache = TicketCache(optionStruct.redmine_server)
+
+        ticket_numbers = []
+        for n in range(self.task_table.rowCount()):
+            try:
+                ticket_numbers.append(self._ticketNumber(n))
+            except ValueError:
+                continue
+        # Numbers alone are shown until the subjects are fetched
+        self._updateTicketItems()
+        if not all(self.ticket_cache.is_fresh(ticket_number) for ticket_number in ticket_numbers if ticket_number > 0):
+            ticket_cache = self.ticket_cache
+            self._startLoad(optionStruct, lambda redmine: ticket_cache.fetch(redmine, ticket_numbers), "tickets",
+                self._updateTicketItems)
+
+    def _setActivityItems(self, comboBox: QComboBox, activity_id: int) -> None:
+        """
+        @fn _setActivityItems
+        @brief Fill an activity combo box with the activities of the server and select one.
+        @param comboBox Combo box of the activity column.
+        @param activity_id Activity id to select. An id unknown to the server is shown as it is.
+        """
+        comboBox.blockSignals(True)
+        comboBox.clear()
+        comboBox.addItem("(default)", DEFAULT_ACTIVITY_ID)
+        if self.activities is not None:
+            for activity in self.activities.activities:
+                comboBox.addItem(activity["name"], activity["id"])
+
+        index = comboBox.findData(activity_id)
+        if index < 0:
+            comboBox.addItem(str(activity_id), activity_id)
+            index = comboBox.count() - 1
+        comboBox.setCurrentIndex(index)
+        comboBox.blockSignals(False)
+
+    def load_activities(self, optionStruct: OptionStruct) -> None:
+        """
+        @fn load_activities
+        @brief Load the activities of the server from the cache and list them in the rows.
+        @detail The activities are fetched in the background if the cache has expired, and listed again when it finishes.
+        @param optionStruct Specify Redmine server, username and password.
+        """
+        catalogue = ActivityCatalogue(optionStruct.redmine_server)
+        catalogue.load()
+        self.activities = catalogue
+
+        # Expired cache or ids alone are used until the activities are fetched
+        self._updateActivityItems()
+        if not catalogue.is_fresh():
+            self._startLoad(optionStruct, catalogue.load, "activities", self._updateActivityItems)
+
+    def _updateActivityItems(self) -> None:
+        """
+        @fn _updateActivityItems
+        @brief Show the activities of the server in the activity combo boxes of every row.
+        """
+        for n in range(self.task_table.rowCount()):
+            comboBox = self.task_table.cellWidget(n, 3)
+            if comboBox is not None:
+                self._setActivityItems(comboBox, comboBox.currentData())
+
+    def _startLoad(self, optionStruct: OptionStruct, fetch, what: str, on_loaded) -> None:
+        """
+        @fn _startLoad
+        @brief Fetch from the server in the background and update the rows when it finishes.
+        @param optionStruct Specify Redmine server, username and password.
+        @param fetch Function to fetch with redminelib.Redmine.
+        @param what Name of what is fetched, for the error message.
+        @param on_loaded Slot called in the GUI thread when the fetch finishes.
+        """
+        worker = LoadWorker(optionStruct, fetch, what)
+        self._load_workers.add(worker)
+        worker.finished.connect(on_loaded)
+        worker.finished.connect(lambda: self._load_workers.discard(worker))
+        worker.finished.connect(worker.deleteLater)
+        worker.start()
+
     def addNewTask(self, num:int=1) -> None:
         """
         @fn addNewTask()
@@ -95,6 +271,8 @@ class TaskListWidget(QWidget):
             self.task_table.setRowCount(self.task_table.rowCount() + 1)
             self._setTaskRow(self.task_table.rowCount() - 1)
             self._calculateDuration()
+            self._recordRowCount()
+            self._recordRow(self.task_table.rowCount() - 1)
 
     def removeTask(self, num:int=1) -> None:
         """
@@ -103,44 +281,156 @@ class TaskListWidget(QWidget):
         """
         self.task_table.setRowCount(self.task_table.rowCount() - num)
         self._calculateDuration()
+        self._recordRowCount()
 
-    def submit(self, optionStruct:OptionStruct) -> None:
+    def submit(self, optionStruct:OptionStruct) -> bool:
         """
         @fn submit()
-        @brief Submit logged time to the tickets.
+        @brief Check the tickets and submit logged time to them in the background.
+        @detail The confirmation is shown once the tickets are checked.
         @param optionStruct Specify username, password and today's date.
+        @return Submission started or not.
         """
+        if self._check_worker is not None or self._submit_worker is not None:
+            print("Submission is already running")
+            return False
+
         self._gather_tasks()
 
         # Close the day
-        self.task_log_list.close_day(QTime.currentTime())
+        self.task_log_list.close_day(QTime.currentTime().toPyTime())
+
+        # Stop before sending anything if some tickets are not on Redmine
+        ticket_numbers = [task.ticket_number for task in self.task_log_list.get_tasks_sorted()]
+        self._check_worker = CheckWorker(optionStruct, ticket_numbers, self.ticket_cache)
+        self._check_worker.checked.connect(lambda invalid_tickets: self._onChecked(optionStruct, invalid_tickets))
+        self._check_worker.finished.connect(self._check_worker.deleteLater)
+        QApplication.setOverrideCursor(QtCore.Qt.BusyCursor)
+        self._check_worker.start()
+
+        return True
+
+    def _onChecked(self, optionStruct: OptionStruct, invalid_tickets: List[int]) -> None:
+        """Highlight the rows of invalid tickets, confirm the tasks and start the submission
+
+        Args:
+            optionStruct (OptionStruct): Specify Redmine server, username, password and today's date
+            invalid_tickets (List[int]): Invalid ticket numbers. Empty if they cannot be checked.
+        """
+        QApplication.restoreOverrideCursor()
+        self._check_worker = None
+
+        self._updateTicketItems()
+        for n in range(self.task_table.rowCount()):
+            comboBox = self.task_table.cellWidget(n, 2)
+            try:
+                invalid = self._ticketNumber(n) in invalid_tickets
+            except ValueError:
+                invalid = False
+            comboBox.setStyleSheet("background-color: #ffc0c0;" if invalid else "")
+            comboBox.setToolTip("Ticket not found on Redmine" if invalid else "")
+
+        if invalid_tickets:
+            QMessageBox.warning(self, "Submit",
+                "Tickets not found on Redmine:\n"
+                + "\n".join(f"#{ticket_number}" for ticket_number in invalid_tickets)
+                + "\nFix the highlighted rows and submit again.")
+            return
 
         # Confirmation dialog
         diag_confirm = QMessageBox()
         text = "Today's tasks:\n"
-        text += self.task_log_list.get_str_tasks_sorted()
+        text += self.task_log_list.get_str_tasks_sorted(
+            self.activities.name if self.activities is not None else str,
+            self.ticket_cache.title if self.ticket_cache is not None else None)
         diag_confirm.setText(text)
         diag_confirm.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
         if diag_confirm.exec_() == QMessageBox.No:
-            return False
+            return
 
-        # Submit tasks to redmine
+        # Submit tasks to redmine off the GUI thread
         tasks_sorted = self.task_log_list.get_tasks_sorted()
-        redmine = RedmineEntry(optionStruct.redmine_server, 
-            username=optionStruct.username, password=optionStruct.password)
-        for task in tasks_sorted:
-            redmine.submitTimeEntry(
-                optionStruct.today,
-                task.ticket_number,
-                task.logged_time,
-                task.activity_id,
-                task.comment
-            )
+        self._submit_worker = SubmitWorker(optionStruct, optionStruct.today, tasks_sorted, self.outbox, self.ledger)
 
-        # Debug
-        print("end")
+        self._submit_progress = QProgressDialog("Submitting...", "Cancel", 0, len(tasks_sorted), self)
+        self._submit_progress.setWindowTitle("Submit")
+        self._submit_progress.setAutoClose(False)
+        self._submit_progress.setAutoReset(False)
+        self._submit_progress.setMinimumDuration(0)
+        self._submit_progress.setValue(0)
+        self._submit_progress.canceled.connect(self._submit_worker.cancel)
 
-        return True
+        self._submit_worker.progress.connect(self._onSubmitProgress)
+        self._submit_worker.submitted.connect(self._onSubmitted)
+        self._submit_worker.finished.connect(self._submit_worker.deleteLater)
+        self._submit_worker.start()
+
+    def _onSubmitProgress(self, index: int, result: SubmitResult) -> None:
+        """Show progress of the submission
+
+        Args:
+            index (int): Index of the finished task
+            result (SubmitResult): Result of the task
+        """
+        if self._submit_progress is None:
+            return
+        self._submit_progress.setValue(min(self._submit_progress.value() + 1, self._submit_progress.maximum()))
+        if result:
+            state = "Skipped" if result.skipped else "Updated" if result.updated else "Submitted"
+        else:
+            state = "Queued" if result.queued else "Failed"
+        self._submit_progress.setLabelText(f"{state}: #{result.ticket_number} {result.comment}")
+
+    def _onSubmitted(self, results: List[SubmitResult]) -> None:
+        """Show results of the submission
+
+        Args:
+            results (List[SubmitResult]): Result of every task
+        """
+        self._submit_progress.close()
+        self._submit_progress = None
+        self._submit_worker = None
+
+        failures = [result for result in results if not result]
+        num_skipped = len([result for result in results if result.skipped])
+        num_updated = len([result for result in results if result.updated])
+        diag_result = QMessageBox(self)
+        text = f"Submitted {len(results) - len(failures)} of {len(results)} entries.\n"
+        if num_skipped:
+            text += f"{num_skipped} of them were already submitted and skipped.\n"
+        if num_updated:
+            text += f"{num_updated} of them were already logged with other hours and updated.\n"
+        for result in failures:
+            state = "Queued for retry" if result.queued else "Failed"
+            text += f"{state}: #{result.ticket_number} {result.hours} {result.comment}: {result.error}\n"
+        diag_result.setText(text)
+        diag_result.show()
+
+        if self.replayer is not None and any(result.queued for result in failures):
+            self.replayer.wake()
+
+        # Listed first in the ticket combo boxes
+        if self.ticket_cache is not None:
+            self.ticket_cache.touch(result.ticket_number for result in results if result)
+            self._updateTicketItems()
+
+    def set_ledger(self, ledger: SubmissionLedger) -> None:
+        """Set the ledger of the submitted entries, not to submit an entry twice
+
+        Args:
+            ledger (SubmissionLedger): Ledger
+        """
+        self.ledger = ledger
+
+    def set_outbox(self, outbox: Outbox, replayer: OutboxReplayer) -> None:
+        """Set the outbox which the entries failed while the server is unavailable are put in
+
+        Args:
+            outbox (Outbox): Outbox
+            replayer (OutboxReplayer): Replayer of the outbox, woken after a submission queues entries
+        """
+        self.outbox = outbox
+        self.replayer = replayer
 
     def save(self, path_file) -> None:
         """Save tasks
@@ -155,6 +445,37 @@ class TaskListWidget(QWidget):
 
         del jsonFile
 
+    def save_history(self, history_store: HistoryStore, today: date) -> None:
+        """Save tasks of the day to the history store
+
+        Args:
+            history_store (HistoryStore): History store or SqliteHistory to save to
+            today (date): Date of the tasks
+        """
+        self._gather_tasks()
+        self.task_log_list.sort()
+        self.task_log_list.date = today
+
+        history_store.save_day(self.task_log_list.get_task_dict())
+
+    def load_history(self, history_store: HistoryStore, today: date) -> bool:
+        """Load tasks of the day from the history store
+
+        Args:
+            history_store (HistoryStore): History store or SqliteHistory to load from
+            today (date): Date of the tasks
+
+        Returns:
+            bool: False if the day is not saved
+        """
+        task_list = history_store.load_day(today)
+        if task_list is None:
+            print(f"No tasks saved on {today}")
+            return False
+
+        self._setTasks(task_list)
+        return True
+
     def load(self, pathFile: str) -> None:
         """Load tasks
 
@@ -172,6 +493,75 @@ class TaskListWidget(QWidget):
         self._setTasks(task_list)
         pass
 
+    def start_autosave(self, path_day: str, today: date) -> None:
+        """Start autosave of every edit to the day file
+
+        The tasks left in the day file and its journal are loaded if they are of the day.
+
+        Args:
+            path_day (str): Path to the day file
+            today (date): Date of the tasks
+        """
+        self.close_autosave()
+
+        journal = DayJournal(path_day)
+        task_list = journal.recover()
+        if task_list is not None and task_list["date"] == today.isoformat():
+            self._setTasks(task_list)
+
+        journal.start()
+        self.journal = journal
+        journal.record_date(today.isoformat())
+        self._recordRowCount()
+        for n in range(self.task_table.rowCount()):
+            self._recordRow(n)
+
+    def close_autosave(self) -> None:
+        """Write pending edits to the day file and stop autosave
+        """
+        if self.journal is None:
+            return
+        if not self.journal.close():
+            QMessageBox.warning(self, "Autosave",
+                f"Cannot write the tasks to {self.journal.path_day}: {self.journal.error}\nSave them to another file.")
+        self.journal = None
+
+    def _recordRowCount(self) -> None:
+        """Record the number of tasks to the journal
+        """
+        if self.journal is None:
+            return
+        self.journal.record_row_count(self.task_table.rowCount())
+
+    def _recordRow(self, row: int) -> None:
+        """Record a task to the journal
+
+        Args:
+            row (int): Row of the task
+        """
+        if self.journal is None or row >= self.task_table.rowCount():
+            return
+
+        time_widget = self.task_table.cellWidget(row, 0)
+        ticket_widget = self.task_table.cellWidget(row, 2)
+        if time_widget is None or ticket_widget is None:
+            return
+
+        try:
+            ticket = parse_ticket(ticket_widget.currentText())
+        except ValueError:
+            ticket = -1
+
+        activity_widget = self.task_table.cellWidget(row, 3)
+        activity_id = activity_widget.currentData() if activity_widget else DEFAULT_ACTIVITY_ID
+
+        comment_item = self.task_table.item(row, 4)
+        comment = comment_item.text() if comment_item else ""
+
+        self.journal.record_row(
+            row, time_widget.time().toString("HH:mm:00"), ticket, activity_id, comment
+        )
+
     def _calculateDuration(self) -> None:
         """
         @fn _calculateDuration()
@@ -198,7 +588,7 @@ class TaskListWidget(QWidget):
             # widget.setTime(time(9+n, 0, 0))
 
             widget2 = self.task_table.cellWidget(n, 2)
-            widget2.setCurrentIndex(n % 3 + 1)
+            widget2.setCurrentIndex(n % widget2.count())
 
             item = QTableWidgetItem()
             item.setText(str(n+1) + "th job")
@@ -223,11 +613,10 @@ class TaskListWidget(QWidget):
             start_time.setTime(QTime.fromString(task["start_time"], "HH:mm:ss"))
 
             ticket_widget = self.task_table.cellWidget(n, 2)
-            ticket_widget.setCurrentText(str(task["ticket_id"]))
+            ticket_widget.setCurrentText(self._ticketTitle(task["ticket_id"]))
 
-            activity_id = QTableWidgetItem()
-            activity_id.setText(str(task["activity_id"]))
-            self.task_table.setItem(n, 3, activity_id)
+            self._setActivityItems(self.task_table.cellWidget(n, 3),
+                saved_activity_id(task.get("activity_id", DEFAULT_ACTIVITY_ID), task_list.get("version", 1)))
 
             comment_widget = QTableWidgetItem()
             comment_widget.setText(task["comment"])
@@ -246,10 +635,10 @@ class TaskListWidget(QWidget):
             starttime = self.task_table.cellWidget(n, 0).time()
             # Set second and ms to 0
             starttime.setHMS(starttime.hour(), starttime.minute(), 0, 0)
-            # TODO : check if ticket number is valid
+            # Tickets are checked against Redmine in bulk on submit
             ticket_str = self.task_table.cellWidget(n, 2).currentText()
             try:
-                ticket = int(ticket_str)
+                ticket = parse_ticket(ticket_str)
             except ValueError:
                 print(f"Invalid ticket number: {ticket_str}")
                 ticket = -1
@@ -260,4 +649,6 @@ class TaskListWidget(QWidget):
             else:
                 comment = self.task_table.item(n, 4).text()
 
-            self.task_log_list.append_new(starttime, ticket, comment)
+            activity_id = self.task_table.cellWidget(n, 3).currentData()
+
+            self.task_log_list.append_new(starttime.toPyTime(), ticket, comment, activity_id)
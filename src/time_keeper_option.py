@@ -9,25 +9,11 @@
 from PyQt5.QtCore import pyqtSignal
 from PyQt5.QtWidgets import QWidget
 from PyQt5.QtWidgets import QFormLayout
-from PyQt5.QtWidgets import QPushButton, QLabel, QLineEdit, QDateTimeEdit, QFileDialog
+from PyQt5.QtWidgets import QPushButton, QLabel, QLineEdit, QDateTimeEdit, QFileDialog, QSpinBox, QMessageBox
 from PyQt5.QtCore import QDateTime
 
-
-class OptionStruct(object):
-    """
-    @class OptionStruct
-    @brief Option parameters.
-    """
-    def __init__(self) -> None:
-        """
-        @fn __init__()
-        @brief Constructor of OptionStruct class.
-        """
-        self.redmine_server: str = ""
-        self.username: str = ""
-        self.password: str = ""
-        self.today = QDateTime()
-        self.save_file: str = ""
+from timekeeper.option_struct import OptionStruct, read_option_file
+from timekeeper.redmine_client import API_KEY_FILE, load_api_key
 
 
 class TimeKeeperOption(QWidget):
@@ -54,6 +40,7 @@ class TimeKeeperOption(QWidget):
         self._redmine_server = ""
         self.userfolder = ""
         self.option_file = "TimeKeeperOption.txt"
+        self.api_key_file = API_KEY_FILE
         self._save_file = ""
 
         self.layout_options = QFormLayout(self)
@@ -89,6 +76,13 @@ class TimeKeeperOption(QWidget):
         self.edit_password.setEchoMode(QLineEdit.Password)
         self.layout_options.addRow(self.label_password, self.edit_password)
 
+        # API key
+        self.button_api_key = QPushButton("Get API key")
+        self.button_api_key.setToolTip("Get the API key with the password and forget the password")
+        self.label_api_key = QLabel(self)
+        self.layout_options.addRow(self.button_api_key, self.label_api_key)
+        self.button_api_key.clicked.connect(lambda: self._getApiKey())
+
         # Today
         self.label_today = QLabel("Date")
         self.edit_today = QDateTimeEdit(self)
@@ -103,6 +97,19 @@ class TimeKeeperOption(QWidget):
         self.layout_options.addRow(self.button_save_file, self.edit_save_file)
         self.button_save_file.clicked.connect(lambda: self._selectSaveFile())
 
+        # History folder
+        self.button_history_folder = QPushButton("Select history folder")
+        self.edit_history_folder = QLineEdit(self)
+        self.edit_history_folder.setToolTip("Folder of the history, or a *.sqlite3 file to keep it in SQLite")
+        self.layout_options.addRow(self.button_history_folder, self.edit_history_folder)
+        self.button_history_folder.clicked.connect(lambda: self._selectHistoryFolder())
+
+        # Number of concurrent submissions
+        self.label_max_workers = QLabel("Concurrent submissions")
+        self.edit_max_workers = QSpinBox(self)
+        self.edit_max_workers.setRange(1, 32)
+        self.layout_options.addRow(self.label_max_workers, self.edit_max_workers)
+
         # Close button
         self.close_button = QPushButton("Close")
         self.close_button.clicked.connect(self._closeEvent)
@@ -117,10 +124,13 @@ class TimeKeeperOption(QWidget):
         optionStruct = OptionStruct()
 
         optionStruct.redmine_server = self.edit_redmine_server.text()
+        optionStruct.userfolder = self.userfolder
         optionStruct.username = self.edit_username.text()
         optionStruct.password = self.edit_password.text()
-        optionStruct.today = self.edit_today.dateTime()
+        optionStruct.today = self.edit_today.date().toPyDate()
         optionStruct.save_file = self.edit_save_file.text()
+        optionStruct.history_folder = self.edit_history_folder.text()
+        optionStruct.max_workers = self.edit_max_workers.value()
 
         return optionStruct
 
@@ -148,33 +158,67 @@ class TimeKeeperOption(QWidget):
         self._save_file = save_file_dialog.getSaveFileName()[0]
         self.edit_save_file.setText(self._save_file)
 
+    def _selectHistoryFolder(self) -> None:
+        """Select history folder path
+        """
+        history_folder_dialog = QFileDialog()
+        self.edit_history_folder.setText(history_folder_dialog.getExistingDirectory())
+
+    def _getApiKey(self) -> None:
+        """
+        @fn _getApiKey
+        @brief Fetch the API key with the password and cache it.
+               The password is cleared not to be saved in the option file.
+        """
+        # Deferred not to load redminelib until the button is pushed
+        from timekeeper.redmine_client import fetch_api_key, save_api_key
+
+        redmine_server = self.edit_redmine_server.text()
+        username = self.edit_username.text()
+        try:
+            key = fetch_api_key(redmine_server, username, self.edit_password.text())
+        except Exception as e:
+            QMessageBox.warning(self, "API key", f"Cannot get API key: {e or type(e).__name__}")
+            return
+
+        save_api_key(redmine_server, username, key, self.api_key_file)
+        self.edit_password.clear()
+        self._updateApiKeyLabel()
+
+    def _updateApiKeyLabel(self) -> None:
+        """
+        @fn _updateApiKeyLabel
+        @brief Show whether the API key of the server and the user is cached.
+        """
+        if load_api_key(self.edit_redmine_server.text(), self.edit_username.text(), self.api_key_file):
+            self.label_api_key.setText("Cached")
+        else:
+            self.label_api_key.setText("Not cached")
+
     def _loadOption(self) -> None:
         """
         @fn _loadOption
         @brief Load option parameters from the savefile.
         """
-        lines = []
-        username = ""
-        password = ""
-
-        try:
-            with open(self.option_file, "r") as f:
-                lines = [s.strip() for s in f.readlines()]
-                self._redmine_server = lines[0]
-                self.userfolder = lines[1]
-                username = lines[2]
-                password = lines[3]
-                self._save_file = lines[4]
-        except FileNotFoundError:
+        optionStruct = read_option_file(self.option_file)
+        if optionStruct is None:
             print("No option file found.")
-        except IndexError:
-            pass
-        
+            optionStruct = OptionStruct()
+
+        self._redmine_server = optionStruct.redmine_server
+        self.userfolder = optionStruct.userfolder
+        username = optionStruct.username
+        password = optionStruct.password
+        self._save_file = optionStruct.save_file
+
         # self.edit_userfolder.setText(self.userfolder)
         self.edit_redmine_server.setText(self._redmine_server)
         self.edit_username.setText(username)
         self.edit_password.setText(password)
         self.edit_save_file.setText(self._save_file)
+        self.edit_history_folder.setText(optionStruct.history_folder)
+        self.edit_max_workers.setValue(optionStruct.max_workers)
+        self._updateApiKeyLabel()
 
     def _saveOption(self) -> None:
         """
@@ -187,6 +231,8 @@ class TimeKeeperOption(QWidget):
             f.write(self.edit_username.text() + "\n")
             f.write(self.edit_password.text() + "\n")
             f.write(self._save_file + "\n")
+            f.write(self.edit_history_folder.text() + "\n")
+            f.write(str(self.edit_max_workers.value()) + "\n")
 
     def _setSaveFile(self) -> None:
         """Set _save_file variable
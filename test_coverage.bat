@@ -1,2 +1,2 @@
-coverage run -a --source src -m unittest discover
+coverage run -a --source src,timekeeper -m unittest discover
 coverage report -m
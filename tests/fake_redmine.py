@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+@file fake_redmine.py
+@author Y. Kasuga
+@date 2021/8/21
+@brief Local HTTP server which answers the part of the REST API of Redmine TimeKeeper uses.
+"""
+
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeRedmineHandler(BaseHTTPRequestHandler):
+    """Request handler of FakeRedmine
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, status: int, content: dict=None) -> None:
+        body = json.dumps(content).encode("utf-8") if content is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str) -> None:
+        fake = self.server.fake
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        with fake.lock:
+            fake.connections.add(self.client_address)
+            fake.requests.append((method, url.path, query, body))
+            auth = fake.authenticate(self.headers)
+            fake.auths.append(auth)
+            if not auth:
+                self._send(401)
+                return
+            if fake.fail_next > 0:
+                fake.fail_next -= 1
+                self._send(503, {"errors": ["Service Unavailable"]})
+                return
+
+        status, content = fake.route(method, url.path, query, body, self.headers)
+        self._send(status, content)
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_PUT(self) -> None:
+        self._handle("PUT")
+
+
+class FakeRedmine(object):
+    """Fake Redmine server on localhost in a thread
+
+    Use as a context manager. url is the root of the server.
+    """
+    api_key = "0123456789abcdef"
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # Client addresses of the connections
+        self.connections = set()
+        # (method, path, query, body) of every request
+        self.requests = []
+        # "key", "basic" or "" of every request
+        self.auths = []
+        self.username = "alice"
+        self.password = "pass"
+        # Number of requests to fail with 503
+        self.fail_next = 0
+
+        self.time_entries = {}
+        self.issues = {101: "Design", 102: "Review", 103: "Test"}
+        # Issue id -> parent issue id
+        self.parents = {103: 101}
+        self.activities = {1: "Design", 2: "Development", 3: "Meeting"}
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRedmineHandler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeRedmine":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def authenticate(self, headers) -> str:
+        """Check the API key or the password of a request
+
+        Returns:
+            str: "key", "basic" or "" if the request is not authenticated
+        """
+        if headers.get("X-Redmine-API-Key") == self.api_key:
+            return "key"
+
+        credentials = base64.b64encode(f"{self.username}:{self.password}".encode("utf-8")).decode("ascii")
+        if headers.get("Authorization") == f"Basic {credentials}":
+            return "basic"
+        return ""
+
+    def _time_entry(self, entry: dict) -> dict:
+        """Get a stored time entry in the form of the REST API
+        """
+        return {
+            "id": entry["id"], "issue": {"id": int(entry["issue_id"])}, "user": {"id": entry.get("user_id", 1)},
+            "activity": {"id": int(entry.get("activity_id", 1))}, "hours": float(entry["hours"]),
+            "comments": entry.get("comments", ""), "spent_on": entry["spent_on"]
+        }
+
+    def _issue(self, issue_id: int) -> dict:
+        """Get an issue in the form of the REST API
+        """
+        issue = {
+            "id": issue_id, "subject": self.issues[issue_id],
+            "project": {"id": 1, "name": "TimeKeeper"}, "status": {"id": 1, "name": "New"}
+        }
+        if issue_id in self.parents:
+            issue["parent"] = {"id": self.parents[issue_id]}
+        return issue
+
+    def route(self, method: str, path: str, query: dict, body: dict, headers) -> tuple:
+        """Answer a request
+
+        Returns:
+            tuple: HTTP status and JSON content
+        """
+        if method == "POST" and path == "/time_entries.json":
+            entry = dict(body["time_entry"])
+            if int(entry.get("issue_id", 0)) not in self.issues:
+                return 422, {"errors": ["Issue is invalid"]}
+            if int(entry.get("activity_id", 1)) not in self.activities:
+                return 422, {"errors": ["Activity is not included in the list"]}
+            with self.lock:
+                entry["id"] = len(self.time_entries) + 1
+                self.time_entries[entry["id"]] = entry
+            return 201, {"time_entry": entry}
+
+        if method == "GET" and path == "/time_entries.json":
+            with self.lock:
+                entries = [
+                    self._time_entry(entry) for entry in self.time_entries.values()
+                    if entry.get("user_id", 1) == 1 and entry["spent_on"] == query.get("spent_on", entry["spent_on"])
+                ]
+            offset = int(query.get("offset", 0))
+            # Redmine returns 100 entries at most per page
+            limit = min(int(query.get("limit", 25)), 100)
+            return 200, {
+                "time_entries": entries[offset:offset + limit],
+                "total_count": len(entries), "offset": offset, "limit": limit
+            }
+
+        if method == "PUT" and path.startswith("/time_entries/"):
+            entry_id = int(path[len("/time_entries/"):-len(".json")])
+            with self.lock:
+                if entry_id not in self.time_entries:
+                    return 404, {"errors": ["Not found"]}
+                self.time_entries[entry_id].update(body["time_entry"])
+            return 204, None
+
+        if method == "GET" and path == "/issues.json":
+            ids = [int(issue_id) for issue_id in query.get("issue_id", "").split(",") if issue_id]
+            issues = [
+                self._issue(issue_id) for issue_id in sorted(self.issues)
+                if (not ids or issue_id in ids)
+            ]
+            offset = int(query.get("offset", 0))
+            limit = min(int(query.get("limit", 25)), 100)
+            return 200, {
+                "issues": issues[offset:offset + limit],
+                "total_count": len(issues), "offset": offset, "limit": limit
+            }
+
+        if method == "GET" and path == "/enumerations/time_entry_activities.json":
+            return 200, {"time_entry_activities": [
+                {"id": activity_id, "name": name, "is_default": activity_id == 1, "active": True}
+                for activity_id, name in self.activities.items()
+            ]}
+
+        if method == "GET" and path == "/my/account.json":
+            return 200, {"user": {"id": 1, "login": self.username, "api_key": self.api_key}}
+
+        return 404, {"errors": ["Not found"]}
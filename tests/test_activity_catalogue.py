@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_activity_catalogue.py
+@author Y. Kasuga
+@date 2021/9/25
+"""
+
+from timekeeper.activity_catalogue import ActivityCatalogue
+from timekeeper.redmine_client import close_all, save_api_key
+from timekeeper.redmine_entry import RedmineEntry
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID
+from tests.fake_redmine import FakeRedmine
+
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+
+class TestActivityCatalogue(unittest.TestCase):
+    """Test case for ActivityCatalogue class
+    """
+
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path_key = os.path.join(self._dir.name, "key.json")
+        self.path_activities = os.path.join(self._dir.name, "activities.json")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        close_all()
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def redmine_entry(self, fake: FakeRedmine) -> RedmineEntry:
+        save_api_key(fake.url, "alice", fake.api_key, self.path_key)
+        return RedmineEntry(fake.url, "alice", api_key_file=self.path_key, activity_file=self.path_activities)
+
+    def activity_requests(self, fake: FakeRedmine) -> list:
+        return [request for request in fake.requests if request[1].startswith("/enumerations/")]
+
+    def test_cache(self) -> None:
+        """Test load() method that the activities are fetched once within the TTL
+        """
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake).redmine
+
+            catalogue = ActivityCatalogue(fake.url, self.path_activities)
+            self.assertFalse(catalogue.load())
+            self.assertTrue(catalogue.load(redmine))
+            self.assertEqual(["Design", "Development", "Meeting"], catalogue.names())
+
+            # Read from the file by another instance
+            catalogue = ActivityCatalogue(fake.url + "/", self.path_activities)
+            self.assertTrue(catalogue.load(redmine))
+            self.assertEqual(1, len(self.activity_requests(fake)))
+
+            # Other servers are not mixed up
+            self.assertFalse(ActivityCatalogue("http://other", self.path_activities).load())
+
+            # Fetched again once expired
+            fake.activities[4] = "Test"
+            catalogue = ActivityCatalogue(fake.url, self.path_activities, ttl=0)
+            self.assertTrue(catalogue.load(redmine))
+            self.assertEqual(2, len(self.activity_requests(fake)))
+            self.assertEqual("Test", catalogue.name(4))
+
+            # Expired cache is used if the server is unavailable
+            fake.fail_next = 1
+            catalogue = ActivityCatalogue(fake.url, self.path_activities, ttl=0)
+            self.assertTrue(catalogue.load(redmine))
+            self.assertEqual(4, len(catalogue.activities))
+
+    def test_resolve(self) -> None:
+        """Test resolve() method
+        """
+        catalogue = ActivityCatalogue("http://redmine", path_file="")
+        catalogue.activities = [
+            {"id": 8, "name": "Design", "is_default": False},
+            {"id": 9, "name": "Development", "is_default": True},
+        ]
+
+        self.assertEqual(8, catalogue.resolve("Design"))
+        self.assertEqual(9, catalogue.resolve(" development "))
+        self.assertEqual(8, catalogue.resolve(8))
+        self.assertEqual(8, catalogue.resolve("8"))
+        self.assertEqual(9, catalogue.resolve(DEFAULT_ACTIVITY_ID))
+        self.assertEqual(9, catalogue.resolve(""))
+        self.assertIsNone(catalogue.resolve("Meeting"))
+        self.assertEqual("Development", catalogue.name(9))
+        self.assertEqual("7", catalogue.name(7))
+
+        catalogue.activities[1]["is_default"] = False
+        self.assertEqual(DEFAULT_ACTIVITY_ID, catalogue.resolve(DEFAULT_ACTIVITY_ID))
+
+    def test_submit(self) -> None:
+        """Test that activities are resolved by name on submit
+        """
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake)
+
+            self.assertTrue(redmine.submitTimeEntry(date(2021, 9, 1), 101, timedelta(hours=1), "Meeting", "A"))
+            self.assertTrue(redmine.submitTimeEntry(date(2021, 9, 1), 102, timedelta(hours=1), 2, "B"))
+            self.assertTrue(redmine.submitTimeEntry(date(2021, 9, 1), 103, timedelta(hours=1), DEFAULT_ACTIVITY_ID, "C"))
+
+            result = redmine.submitTimeEntry(date(2021, 9, 1), 101, timedelta(hours=1), "Unknown", "D")
+            self.assertEqual("Unknown activity: Unknown", result.error)
+
+            self.assertEqual([3, 2, 1], [entry["activity_id"] for entry in fake.time_entries.values()])
+            self.assertEqual(1, len(self.activity_requests(fake)))
+
+
+if __name__ == "__main__":
+    unittest.main()
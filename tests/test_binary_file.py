@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_binary_file.py
+@author Y. Kasuga
+@date 2021/7/17
+"""
+
+from timekeeper.binary_file import dump_days, load_days, load_task_log_lists, read_binary, write_binary
+from timekeeper.binary_file import unpack_header, HEADER, DAY, TASK, OFFSET
+
+import unittest
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+
+
+def make_days(num_days: int, seed: int=0) -> list:
+    """Make random days
+
+    Args:
+        num_days (int): Number of days
+        seed (int): Seed of random numbers
+
+    Returns:
+        list: Dictionaries in the format of TaskLogList.get_task_dict()
+    """
+    rand = random.Random(seed)
+    comments = ["Design", "Review", "Test", "会議", ""]
+    days = []
+    for n in range(num_days):
+        seconds = 9 * 3600
+        task_list = []
+        for _ in range(rand.randint(0, 8)):
+            task_list.append({
+                "start_time": "{:02}:{:02}:{:02}".format(seconds // 3600, seconds // 60 % 60, seconds % 60),
+                "ticket_id": rand.choice([-1, 101, 102, 2 ** 31 - 1]),
+                "activity_id": rand.randint(1, 20),
+                "comment": rand.choice(comments),
+            })
+            seconds += rand.randint(0, 3600)
+        days.append({"date": (date(2021, 1, 1) + timedelta(days=n)).isoformat(), "task_list": task_list, "version": 2})
+    return days
+
+
+class TestBinaryFile(unittest.TestCase):
+    """Test case for binary_file
+    """
+
+    def test_round_trip(self) -> None:
+        """Test load_days() gives back the days given to dump_days()
+        """
+        days = make_days(365)
+        buffer = dump_days(days)
+
+        self.assertEqual(days, load_days(buffer))
+        self.assertEqual([], load_days(dump_days([])))
+
+        # Fixed-width records and a comment stored once
+        num_tasks = sum(len(day["task_list"]) for day in days)
+        self.assertLess(len(buffer), HEADER.size + 12 * len(days) + TASK.size * num_tasks + 100)
+
+    def test_load_task_log_lists(self) -> None:
+        """Test load_task_log_lists() gives the same tasks as TaskLogList.set_tasks()
+        """
+        days = make_days(30, seed=1)
+        task_log_lists = load_task_log_lists(dump_days(days))
+
+        self.assertEqual(days, [task_log_list.get_task_dict() for task_log_list in task_log_lists])
+
+    def test_file(self) -> None:
+        """Test write_binary() and read_binary()
+        """
+        days = make_days(10, seed=2)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path_file = os.path.join(tmp_dir, "history.tkb")
+            write_binary(path_file, iter(days))
+            self.assertEqual(days, read_binary(path_file))
+
+    def test_version_1(self) -> None:
+        """Test files of version 1 with a string table of lengths are still read
+        """
+        days = make_days(5)
+        buffer = dump_days(days)
+        _, num_days, num_tasks, num_strings = unpack_header(buffer)
+        offset = HEADER.size + num_days * DAY.size + num_tasks * TASK.size
+        end = offset + num_strings * OFFSET.size
+
+        ends = [value for (value,) in OFFSET.iter_unpack(buffer[offset:end])]
+        lengths = [value - previous for previous, value in zip([0] + ends, ends)]
+        buffer_1 = b"".join([
+            buffer[:4], b"\x01\x00", buffer[6:offset],
+            *(OFFSET.pack(length) for length in lengths), buffer[end:]
+        ])
+
+        # Activity id 1 was saved for every task before version 3
+        for day in days:
+            for task in day["task_list"]:
+                task["activity_id"] = 0 if task["activity_id"] == 1 else task["activity_id"]
+        self.assertEqual(days, load_days(buffer_1))
+
+    def test_legacy_activity(self) -> None:
+        """Test that activity id 1 of days and files before the activity could be chosen is the default
+        """
+        day = {"date": "2021-06-01", "task_list": [
+            {"start_time": "09:00:00", "ticket_id": 101, "activity_id": 1, "comment": "Design"},
+            {"start_time": "10:00:00", "ticket_id": 102, "activity_id": 2, "comment": "Review"},
+        ]}
+        self.assertEqual([0, 2], [task["activity_id"] for task in load_days(dump_days([day]))[0]["task_list"]])
+
+        day["version"] = 2
+        buffer = dump_days([day])
+        self.assertEqual([1, 2], [task["activity_id"] for task in load_days(buffer)[0]["task_list"]])
+        buffer_2 = buffer[:4] + b"\x02\x00" + buffer[6:]
+        self.assertEqual([0, 2], [task["activity_id"] for task in load_days(buffer_2)[0]["task_list"]])
+
+    def test_invalid(self) -> None:
+        """Test broken buffers are rejected
+        """
+        buffer = dump_days(make_days(3))
+
+        with self.assertRaises(ValueError):
+            load_days(b"{}")
+        with self.assertRaises(ValueError):
+            load_days(b"XXXX" + buffer[4:])
+        with self.assertRaises(ValueError):
+            # Unsupported version
+            load_days(buffer[:4] + b"\x63\x00" + buffer[6:])
+        with self.assertRaises(ValueError):
+            load_days(buffer[:-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_cli.py
+@author Y. Kasuga
+@date 2021/6/6
+"""
+
+from timekeeper.cli import main, load_task_log_list
+from timekeeper.json_file import JsonFile
+from timekeeper.outbox import Outbox
+from timekeeper.redmine_client import close_all, load_api_key, save_api_key
+from timekeeper.redmine_entry import SubmitResult
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID
+from timekeeper.ticket_cache import TicketCache
+from tests.fake_redmine import FakeRedmine
+
+import unittest
+import importlib.util
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from mock import patch, ANY
+
+
+class TestCli(unittest.TestCase):
+    """Test case for command line interface
+    """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_file = os.path.join(self.tmp_dir.name, "savefile.json")
+        # Save file of version 1, in which activity id 1 is the default activity
+        task_dict = {
+            "date": "2021-06-01",
+            "task_list": [
+                {"start_time": "09:00:00", "ticket_id": 101, "activity_id": 1, "comment": "Design"},
+                {"start_time": "12:00:00", "ticket_id": -1, "activity_id": 1, "comment": "Lunch"},
+                {"start_time": "13:00:00", "ticket_id": 102, "activity_id": 1, "comment": "Review"},
+            ]
+        }
+        jsonFile = JsonFile()
+        jsonFile.open(self.path_file, "w")
+        jsonFile.write(task_dict)
+        del jsonFile
+
+        self.org_stdout, sys.stdout = sys.stdout, StringIO()
+        self.org_stderr, sys.stderr = sys.stderr, StringIO()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        sys.stdout = self.org_stdout
+        sys.stderr = self.org_stderr
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_load_task_log_list(self) -> None:
+        """Test load_task_log_list() function
+        """
+        task_log_list = load_task_log_list(self.path_file, "17:30")
+
+        self.assertEqual(date(2021, 6, 1), task_log_list.date)
+        self.assertTrue(task_log_list.is_day_closed())
+        self.assertEqual(7.5, task_log_list.get_total_time())
+
+        # File doesn't exist
+        self.assertIsNone(load_task_log_list(self.path_file + ".missing"))
+
+        # Malformed files
+        path_broken = os.path.join(self.tmp_dir.name, "broken.json")
+        for content in ["{bad", '{"date": "2021-06-01"}', '{"date": "2021-06-01", "task_list": [{"ticket_id": 101}]}']:
+            with open(path_broken, "w") as f:
+                f.write(content)
+            self.assertIsNone(load_task_log_list(path_broken))
+
+    def test_summary(self) -> None:
+        """Test summary command
+        """
+        self.assertEqual(0, main(["summary", self.path_file, "--close", "17:30"]))
+
+        output = sys.stdout.getvalue()
+        self.assertIn(f"{self.path_file} (2021-06-01)", output)
+        self.assertIn(load_task_log_list(self.path_file, "17:30").get_str_tasks_sorted(), output)
+
+    def test_summary_missing_file(self) -> None:
+        """Test summary command
+        with a file which doesn't exist
+        """
+        self.assertEqual(1, main(["summary", self.path_file + ".missing", self.path_file]))
+        self.assertIn("Cannot read", sys.stderr.getvalue())
+
+    def test_summary_malformed_file(self) -> None:
+        """Test summary command
+        that a malformed file is reported and the next file is printed
+        """
+        path_broken = os.path.join(self.tmp_dir.name, "broken.json")
+        with open(path_broken, "w") as f:
+            f.write("{bad")
+
+        self.assertEqual(1, main(["summary", path_broken, self.path_file, "--close", "17:30"]))
+        self.assertIn(f"Cannot read: {path_broken}", sys.stderr.getvalue())
+        self.assertIn(f"{self.path_file} (2021-06-01)", sys.stdout.getvalue())
+
+    @patch("timekeeper.redmine_entry.RedmineEntry.resolveActivity", return_value=0)
+    @patch("timekeeper.redmine_entry.RedmineEntry.findInvalidTickets", return_value=[])
+    @patch("timekeeper.redmine_entry.RedmineEntry.submitTimeEntry", autospec=True)
+    @patch("timekeeper.redmine_entry.RedmineEntry.__init__", return_value=None)
+    def test_submit(self, RedmineEntry, submitTimeEntry, findInvalidTickets, resolveActivity) -> None:
+        """Test submit command
+        """
+        submitTimeEntry.side_effect = lambda redmine, date, ticket_number, logged_time, activity, comment: \
+            SubmitResult(ticket_number, logged_time.total_seconds() / 3600, activity, comment)
+
+        self.assertEqual(0, main([
+            "submit", self.path_file, "--close", "17:30", "--option", self.path_file + ".missing",
+            "--server", "http://redmine", "--username", "user", "--password", "pass", "--jobs", "2", "--outbox", "", "--ledger", "", "--no-reconcile"
+        ]))
+
+        RedmineEntry.assert_called_once_with("http://redmine", username="user", password="pass", pool_size=2,
+            api_key_file="TimeKeeperApiKey.json", ledger=None, activity_file="TimeKeeperActivities.json")
+        self.assertEqual(2, submitTimeEntry.call_count)
+        submitTimeEntry.assert_any_call(ANY, date(2021, 6, 1), 101, timedelta(hours=3), DEFAULT_ACTIVITY_ID, "Design")
+        submitTimeEntry.assert_any_call(
+            ANY, date(2021, 6, 1), 102, timedelta(hours=4, minutes=30), DEFAULT_ACTIVITY_ID, "Review")
+        self.assertIn("Submitted: #101 3.0 Design", sys.stdout.getvalue())
+
+    @patch("timekeeper.redmine_entry.RedmineEntry.resolveActivity", return_value=0)
+    @patch("timekeeper.redmine_entry.RedmineEntry.findInvalidTickets", return_value=[])
+    @patch("timekeeper.redmine_entry.RedmineEntry.submitTimeEntry", autospec=True)
+    @patch("timekeeper.redmine_entry.RedmineEntry.__init__", return_value=None)
+    def test_submit_failure(self, RedmineEntry, submitTimeEntry, findInvalidTickets, resolveActivity) -> None:
+        """Test submit command
+        when Redmine rejects an entry
+        """
+        def submit(redmine, date, ticket_number, logged_time, activity, comment):
+            result = SubmitResult(ticket_number, 1.0, activity, comment)
+            if ticket_number == 102:
+                result.error = "Issue is invalid"
+            return result
+        submitTimeEntry.side_effect = submit
+
+        self.assertEqual(1, main([
+            "submit", self.path_file, "--option", self.path_file + ".missing", "--server", "http://redmine",
+            "--outbox", "", "--ledger", "", "--no-reconcile"
+        ]))
+        self.assertIn("Failed: #102 1.0 Review: Issue is invalid", sys.stderr.getvalue())
+
+    @patch("timekeeper.redmine_entry.RedmineEntry.findInvalidTickets", return_value=[102])
+    @patch("timekeeper.redmine_entry.RedmineEntry.submitTimeEntry", autospec=True)
+    @patch("timekeeper.redmine_entry.RedmineEntry.__init__", return_value=None)
+    def test_submit_invalid_ticket(self, RedmineEntry, submitTimeEntry, findInvalidTickets) -> None:
+        """Test submit command
+        when a ticket is not on Redmine
+        """
+        self.assertEqual(1, main([
+            "submit", self.path_file, "--option", self.path_file + ".missing", "--server", "http://redmine",
+            "--outbox", "", "--ledger", "", "--no-reconcile"
+        ]))
+        self.assertEqual(0, submitTimeEntry.call_count)
+        self.assertIn("Tickets not found on Redmine: #102", sys.stderr.getvalue())
+
+    def test_submit_ticket_file(self) -> None:
+        """Test submit command with --ticket-file that the subjects are cached and shown
+        """
+        path_key = os.path.join(self.tmp_dir.name, "key.json")
+        path_tickets = os.path.join(self.tmp_dir.name, "tickets.sqlite3")
+        with FakeRedmine() as fake:
+            save_api_key(fake.url, "alice", fake.api_key, path_key)
+            self.assertEqual(0, main([
+                "submit", self.path_file, "--close", "17:30", "--option", self.path_file + ".missing",
+                "--server", fake.url, "--username", "alice", "--key-file", path_key, "--outbox", "", "--ledger", "",
+                "--activity-file", os.path.join(self.tmp_dir.name, "activities.json"), "--ticket-file", path_tickets
+            ]))
+            self.assertEqual([101, 102], sorted(entry["issue_id"] for entry in fake.time_entries.values()))
+        close_all()
+
+        self.assertIn("#101 Design", sys.stdout.getvalue())
+        self.assertIn("#102 Review", sys.stdout.getvalue())
+        ticket_cache = TicketCache(fake.url, path_tickets)
+        self.assertEqual([101, 102], sorted(ticket["id"] for ticket in ticket_cache.recent()))
+        self.assertEqual("Review", ticket_cache.subject(102))
+        ticket_cache.close()
+
+    def test_replay(self) -> None:
+        """Test replay command that the entries of the outbox are submitted
+        """
+        path_outbox = os.path.join(self.tmp_dir.name, "outbox.jsonl")
+        path_key = os.path.join(self.tmp_dir.name, "key.json")
+        outbox = Outbox(path_outbox)
+        outbox.put(date(2021, 6, 1), 101, 3.0, 1, "Design", delay=600)
+        outbox.put(date(2021, 6, 1), 999, 1.0, 1, "Invalid")
+
+        with FakeRedmine() as fake:
+            save_api_key(fake.url, "alice", fake.api_key, path_key)
+            self.assertEqual(1, main([
+                "replay", "--option", self.path_file + ".missing", "--server", fake.url,
+                "--username", "alice", "--key-file", path_key, "--outbox", path_outbox,
+                "--ledger", os.path.join(self.tmp_dir.name, "ledger.jsonl"),
+                "--activity-file", os.path.join(self.tmp_dir.name, "activities.json")
+            ]))
+            self.assertEqual([101], [entry["issue_id"] for entry in fake.time_entries.values()])
+        close_all()
+
+        self.assertIn("Submitted: #101 3.0 Design", sys.stdout.getvalue())
+        self.assertIn("Failed: #999 1.0 Invalid: Issue is invalid", sys.stderr.getvalue())
+        self.assertEqual(0, len(Outbox(path_outbox)))
+
+    def test_login(self) -> None:
+        """Test login command that the API key is cached
+        """
+        path_key = os.path.join(self.tmp_dir.name, "key.json")
+        with FakeRedmine() as fake:
+            self.assertEqual(0, main([
+                "login", "--option", self.path_file + ".missing", "--server", fake.url,
+                "--username", "alice", "--password", "pass", "--key-file", path_key
+            ]))
+            self.assertEqual(fake.api_key, load_api_key(fake.url, "alice", path_key))
+
+            self.assertEqual(1, main([
+                "login", "--option", self.path_file + ".missing", "--server", fake.url,
+                "--username", "alice", "--password", "wrong", "--key-file", path_key
+            ]))
+            self.assertIn("Cannot get API key", sys.stderr.getvalue())
+        close_all()
+
+    def test_report(self) -> None:
+        """Test report command
+        """
+        self.assertEqual(0, main(["report", self.tmp_dir.name, "--processes", "1"]))
+
+        lines = sys.stdout.getvalue().split("\n")
+        user = os.path.basename(self.tmp_dir.name)
+        self.assertIn(["2021-06-01", user, "101", "0", "3.0"], [line.split() for line in lines])
+        self.assertIn("files/s", sys.stderr.getvalue())
+
+    def test_report_cache_unreadable(self) -> None:
+        """Test report command with --cache that unreadable files are reported
+        """
+        path_broken = os.path.join(self.tmp_dir.name, "broken.json")
+        with open(path_broken, "w") as f:
+            f.write("{broken")
+
+        self.assertEqual(1, main(["report", self.tmp_dir.name, "--processes", "1", "--cache"]))
+
+        lines = sys.stdout.getvalue().split("\n")
+        user = os.path.basename(self.tmp_dir.name)
+        self.assertIn(["2021-06-01", user, "101", "0", "3.0"], [line.split() for line in lines])
+        self.assertIn(f"Cannot read: {path_broken}", sys.stderr.getvalue())
+
+    @unittest.skipIf(importlib.util.find_spec("numpy") is None, "numpy is not installed")
+    def test_rollup_unreadable(self) -> None:
+        """Test rollup command that unreadable files are reported
+        """
+        path_broken = os.path.join(self.tmp_dir.name, "broken.json")
+        with open(path_broken, "w") as f:
+            f.write("{bad")
+
+        self.assertEqual(1, main(["rollup", self.tmp_dir.name, "--period", "day"]))
+        self.assertIn("2021-06-01", sys.stdout.getvalue())
+        self.assertIn(f"Cannot read: {path_broken}", sys.stderr.getvalue())
+
+    def test_report_subjects(self) -> None:
+        """Test report command with the subjects of the cached tickets
+        """
+        path_tickets = os.path.join(self.tmp_dir.name, "tickets.sqlite3")
+        ticket_cache = TicketCache("http://redmine", path_tickets)
+        ticket_cache.put([{"id": 101, "subject": "Design doc"}])
+        ticket_cache.close()
+
+        self.assertEqual(0, main([
+            "report", self.tmp_dir.name, "--processes", "1", "--server", "http://redmine", "--ticket-file", path_tickets
+        ]))
+
+        lines = sys.stdout.getvalue().split("\n")
+        user = os.path.basename(self.tmp_dir.name)
+        self.assertIn(["2021-06-01", user, "101", "0", "3.0", "Design", "doc"], [line.split() for line in lines])
+        self.assertIn(["2021-06-01", user, "102", "0", "0.0"], [line.split() for line in lines])
+
+    def test_export(self) -> None:
+        """Test export command that the report of the exports is the same as of the save files
+        """
+        path_export = os.path.join(self.tmp_dir.name, "export.jsonl")
+        self.assertEqual(0, main(["export", self.tmp_dir.name, "-o", path_export]))
+
+        jsonFile = JsonFile()
+        jsonFile.open(path_export, "r")
+        days = list(jsonFile.read_lines())
+        del jsonFile
+        self.assertEqual(["2021-06-01"], [day["date"] for day in days])
+
+        main(["report", self.path_file, "--processes", "1"])
+        expected = sys.stdout.getvalue()
+        for path_export in [path_export, os.path.join(self.tmp_dir.name, "export.tkb")]:
+            main(["export", self.path_file, "-o", path_export])
+            sys.stdout = StringIO()
+            main(["report", path_export, "--processes", "1"])
+            self.assertEqual(expected, sys.stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_history_archive.py
+@author Y. Kasuga
+@date 2021/7/24
+"""
+
+from timekeeper.history_archive import HistoryArchive, write_archive
+from timekeeper.task_log_list import TaskLogList
+from tests.test_binary_file import make_days
+
+import unittest
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+
+
+class TestHistoryArchive(unittest.TestCase):
+    """Test case for HistoryArchive class
+    """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_file = os.path.join(self.tmp_dir.name, "archive.tkb")
+
+        # Every other day of a year in random order
+        self.days = make_days(730)[::2]
+        shuffled = list(self.days)
+        random.Random(0).shuffle(shuffled)
+        write_archive(self.path_file, shuffled)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_load_day(self) -> None:
+        """Test load_day() method
+        """
+        with HistoryArchive(self.path_file) as archive:
+            self.assertEqual(len(self.days), len(archive))
+            for day in self.days:
+                self.assertEqual(day, archive.load_day(date.fromisoformat(day["date"])))
+
+            # Days not archived
+            self.assertIsNone(archive.load_day(date(2021, 1, 2)))
+            self.assertIsNone(archive.load_day(date(2020, 12, 31)))
+            self.assertIsNone(archive.load_day(date(2023, 1, 1)))
+
+    def test_dates(self) -> None:
+        """Test dates() method that days are in order of date
+        """
+        with HistoryArchive(self.path_file) as archive:
+            self.assertEqual([date.fromisoformat(day["date"]) for day in self.days], list(archive.dates()))
+
+    def test_load_task_log_list(self) -> None:
+        """Test load_task_log_list() method
+        """
+        with HistoryArchive(self.path_file) as archive:
+            day = self.days[100]
+            task_log_list = archive.load_task_log_list(date.fromisoformat(day["date"]))
+            self.assertEqual(day, task_log_list.get_task_dict())
+            self.assertIsNone(archive.load_task_log_list(date(2021, 1, 2)))
+
+    def test_ticket_seconds(self) -> None:
+        """Test ticket_seconds() method is same as the sum of TaskLogList
+        """
+        start = date(2021, 4, 1)
+        end = date(2021, 9, 30)
+        expected = timedelta()
+        for day in self.days:
+            if start <= date.fromisoformat(day["date"]) <= end:
+                task_log_list = TaskLogList()
+                task_log_list.set_tasks(day)
+                expected += task_log_list.get_ticket_time(101)
+
+        with HistoryArchive(self.path_file) as archive:
+            self.assertEqual(expected.total_seconds(), archive.ticket_seconds(101, start, end))
+            self.assertLess(0, archive.ticket_seconds(101, start, end))
+            self.assertEqual(0, archive.ticket_seconds(101, date(2023, 1, 1), date(2023, 12, 31)))
+
+    def test_invalid(self) -> None:
+        """Test files which are not archives are rejected
+        """
+        path_file = os.path.join(self.tmp_dir.name, "empty.tkb")
+        open(path_file, "wb").close()
+        with self.assertRaises(ValueError):
+            HistoryArchive(path_file)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_history_store.py
+@author Y. Kasuga
+@date 2021/7/3
+"""
+
+from timekeeper.history_store import HistoryStore
+
+import unittest
+import os
+import tempfile
+from datetime import date
+
+
+def make_day(str_date: str, comment: str="Design") -> dict:
+    """Make a dictionary of the task list
+
+    Args:
+        str_date (str): Date of the day
+        comment (str): Comment of the task
+
+    Returns:
+        dict: Dictionary in the format of TaskLogList.get_task_dict()
+    """
+    return {
+        "date": str_date,
+        "task_list": [
+            {"start_time": "09:00:00", "ticket_id": 101, "activity_id": 1, "comment": comment},
+            {"start_time": "17:30:00", "ticket_id": 0, "activity_id": 1, "comment": "EndOfDay"},
+        ],
+        "version": 2
+    }
+
+
+class TestHistoryStore(unittest.TestCase):
+    """Test case for HistoryStore class
+    """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp_dir.name, "history")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_save_load_day(self) -> None:
+        """Test save_day() and load_day() method
+        """
+        store = HistoryStore(self.directory)
+        store.save_day(make_day("2021-06-30"))
+        store.save_day(make_day("2021-07-01"))
+        store.save_day(make_day("2021-07-02"))
+
+        self.assertEqual(make_day("2021-07-01"), store.load_day(date(2021, 7, 1)))
+        self.assertIsNone(store.load_day(date(2021, 7, 3)))
+        self.assertIsNone(store.load_day(date(2021, 8, 1)))
+
+        # Segmented by month
+        self.assertEqual(
+            ["2021-06.idx", "2021-06.jsonl", "2021-07.idx", "2021-07.jsonl"],
+            sorted(os.listdir(self.directory))
+        )
+
+    def test_save_day_again(self) -> None:
+        """Test save_day() method
+        that saving a day again replaces the day
+        """
+        store = HistoryStore(self.directory)
+        store.save_day(make_day("2021-07-01", "First"))
+        store.save_day(make_day("2021-07-02"))
+        store.save_day(make_day("2021-07-01", "Second"))
+
+        # Other instance reads the index from the file
+        store = HistoryStore(self.directory)
+        self.assertEqual(make_day("2021-07-01", "Second"), store.load_day(date(2021, 7, 1)))
+        self.assertEqual(make_day("2021-07-02"), store.load_day(date(2021, 7, 2)))
+
+    def test_dates(self) -> None:
+        """Test dates() method
+        """
+        store = HistoryStore(self.directory)
+        for str_date in ["2021-07-02", "2021-06-30", "2021-07-01", "2021-07-01"]:
+            store.save_day(make_day(str_date))
+
+        self.assertEqual([date(2021, 6, 30), date(2021, 7, 1), date(2021, 7, 2)], store.dates())
+
+    def test_compact(self) -> None:
+        """Test compact() method
+        """
+        store = HistoryStore(self.directory)
+        store.save_day(make_day("2021-07-01", "First"))
+        store.save_day(make_day("2021-07-01", "Second"))
+        store.save_day(make_day("2021-07-02"))
+        size = os.path.getsize(os.path.join(self.directory, "2021-07.jsonl"))
+
+        store.compact("2021-07")
+
+        self.assertGreater(size, os.path.getsize(os.path.join(self.directory, "2021-07.jsonl")))
+        self.assertEqual(make_day("2021-07-01", "Second"), store.load_day(date(2021, 7, 1)))
+        self.assertEqual(make_day("2021-07-02"), store.load_day(date(2021, 7, 2)))
+
+    def test_recover_unindexed_lines(self) -> None:
+        """Test that lines appended without updating the index are found
+        and a broken line is dropped
+        """
+        store = HistoryStore(self.directory)
+        store.save_day(make_day("2021-07-01"))
+        os.remove(os.path.join(self.directory, "2021-07.idx"))
+        with open(os.path.join(self.directory, "2021-07.jsonl"), "a") as f:
+            f.write('{"date": "2021-07-0')
+
+        store = HistoryStore(self.directory)
+        self.assertEqual(make_day("2021-07-01"), store.load_day(date(2021, 7, 1)))
+
+        store.save_day(make_day("2021-07-02"))
+        store = HistoryStore(self.directory)
+        self.assertEqual([date(2021, 7, 1), date(2021, 7, 2)], store.dates())
+
+    def test_archive(self) -> None:
+        """Test archive() method
+        that archived days are loaded after their segments are removed
+        """
+        store = HistoryStore(self.directory)
+        store.save_day(make_day("2021-06-30"))
+        store.save_day(make_day("2021-07-01", "First"))
+        self.assertEqual(2, store.archive())
+
+        for file_name in ["2021-06.idx", "2021-06.jsonl"]:
+            os.remove(os.path.join(self.directory, file_name))
+        store.save_day(make_day("2021-07-01", "Second"))
+
+        store = HistoryStore(self.directory)
+        self.assertEqual(make_day("2021-06-30"), store.load_day(date(2021, 6, 30)))
+        # Segments take precedence over the archive
+        self.assertEqual(make_day("2021-07-01", "Second"), store.load_day(date(2021, 7, 1)))
+        self.assertEqual([date(2021, 6, 30), date(2021, 7, 1)], store.dates())
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
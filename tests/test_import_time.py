@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_import_time.py
+@author Y. Kasuga
+@date 2021/6/6
+"""
+
+import unittest
+import json
+import subprocess
+import sys
+
+
+class TestImportTime(unittest.TestCase):
+    """Test case for import of timekeeper package
+    """
+
+    # Budget of import time in seconds
+    budget = 0.1
+
+    # Modules which should be importable without GUI
+    modules = [
+        "timekeeper.task_log_list",
+        "timekeeper.json_file",
+        "timekeeper.redmine_entry",
+        "timekeeper.option_struct",
+    ]
+
+    def _measure(self) -> dict:
+        """Import modules in a new interpreter
+
+        Returns:
+            dict: Import time in seconds and the names of loaded modules
+        """
+        script = "\n".join([
+            "import json, sys, time",
+            "start = time.perf_counter()",
+        ] + [f"import {module}" for module in self.modules] + [
+            "elapsed = time.perf_counter() - start",
+            "print(json.dumps({'elapsed': elapsed, 'modules': list(sys.modules)}))",
+        ])
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, check=True, text=True
+        ).stdout
+        return json.loads(output)
+
+    def test_import_without_gui(self) -> None:
+        """Test that importing does not load PyQt5 nor redminelib
+        """
+        loaded = self._measure()["modules"]
+
+        self.assertFalse([module for module in loaded if module.startswith("PyQt5")])
+        self.assertFalse([module for module in loaded if module.startswith("redminelib")])
+
+    def test_import_time(self) -> None:
+        """Test that importing is within the budget
+        """
+        # Best of a few runs not to fail on a busy machine
+        elapsed = min(self._measure()["elapsed"] for _ in range(3))
+        self.assertLess(elapsed, self.budget)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_journal.py
+@author Y. Kasuga
+@date 2021/7/10
+"""
+
+from timekeeper.journal import DayJournal
+from timekeeper.json_file import JsonFile
+
+import unittest
+import os
+import tempfile
+
+
+def read_json(path_file: str) -> dict:
+    jsonFile = JsonFile()
+    jsonFile.open(path_file, "r")
+    content = jsonFile.read()
+    del jsonFile
+    return content
+
+
+class TestDayJournal(unittest.TestCase):
+    """Test case for DayJournal class
+    """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_day = os.path.join(self.tmp_dir.name, "2021-07-10.json")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_recover_nothing(self) -> None:
+        """Test recover() without any file
+        """
+        self.assertIsNone(DayJournal(self.path_day).recover())
+
+    def test_recover_version_1(self) -> None:
+        """Test recover() with a day file saved before the activity could be chosen
+        """
+        jsonFile = JsonFile()
+        jsonFile.open(self.path_day, "w")
+        jsonFile.write({"date": "2021-07-10", "task_list": [
+            {"start_time": "09:00:00", "ticket_id": 101, "activity_id": 1, "comment": "Design"},
+            {"start_time": "10:00:00", "ticket_id": 102, "activity_id": 2, "comment": "Review"},
+        ]})
+        del jsonFile
+
+        task_dict = DayJournal(self.path_day).recover()
+        self.assertEqual(2, task_dict["version"])
+        self.assertEqual([0, 2], [task["activity_id"] for task in task_dict["task_list"]])
+
+    def test_flush(self) -> None:
+        """Test flush() compacts the records into the day file
+        """
+        journal = DayJournal(self.path_day, interval=60)
+        journal.start()
+        journal.record_date("2021-07-10")
+        journal.record_row_count(2)
+        journal.record_row(0, "09:00:00", 101, 1, "Design")
+        journal.record_row(1, "17:00:00", 0, 1, "EndOfDay")
+        journal.flush()
+
+        expected = {
+            "date": "2021-07-10",
+            "task_list": [
+                {"start_time": "09:00:00", "ticket_id": 101, "activity_id": 1, "comment": "Design"},
+                {"start_time": "17:00:00", "ticket_id": 0, "activity_id": 1, "comment": "EndOfDay"},
+            ],
+            "version": 2
+        }
+        self.assertEqual(expected, read_json(self.path_day))
+        self.assertEqual(0, os.path.getsize(journal.path_journal))
+
+        # Removing a row
+        journal.record_row_count(1)
+        journal.close()
+        self.assertEqual(expected["task_list"][:1], read_json(self.path_day)["task_list"])
+
+    def test_debounce(self) -> None:
+        """Test the day file is written after the debounce interval
+        """
+        journal = DayJournal(self.path_day, interval=0.05)
+        journal.start()
+        journal.record_date("2021-07-10")
+        journal.record_row(0, "09:00:00", 101, 1, "Design")
+
+        for _ in range(100):
+            if os.path.exists(self.path_day):
+                break
+            journal._thread.join(0.05)
+        self.assertEqual("Design", read_json(self.path_day)["task_list"][0]["comment"])
+        journal.close()
+
+    def test_write_error(self) -> None:
+        """Test that a failed write is reported and the writer thread keeps the edits to write later
+        """
+        path_folder = os.path.join(self.tmp_dir.name, "missing")
+        journal = DayJournal(os.path.join(path_folder, "2021-07-10.json"), interval=0.05)
+        journal.start()
+        journal.record_date("2021-07-10")
+        journal.record_row(0, "09:00:00", 101, 1, "Design")
+
+        self.assertFalse(journal.flush(timeout=5))
+        self.assertIsInstance(journal.error, OSError)
+        self.assertTrue(journal._thread.is_alive())
+
+        # Written once the folder can be written
+        os.makedirs(path_folder)
+        self.assertTrue(journal.flush(timeout=5))
+        self.assertIsNone(journal.error)
+        self.assertEqual("Design", read_json(journal.path_day)["task_list"][0]["comment"])
+        self.assertTrue(journal.close())
+
+    def test_recover_after_crash(self) -> None:
+        """Test recover() replays the journal on the day file and skips a broken tail
+        """
+        journal = DayJournal(self.path_day, interval=60)
+        journal.start()
+        journal.record_date("2021-07-10")
+        journal.record_row(0, "09:00:00", 101, 1, "Design")
+        journal.flush()
+
+        # Records synced to the journal but not compacted before a crash
+        journal._append([
+            {"op": "row", "row": 0, "start_time": "09:00:00", "ticket_id": 101, "activity_id": 1, "comment": "Review"},
+            {"op": "row", "row": 1, "start_time": "12:00:00", "ticket_id": -1, "activity_id": 1, "comment": "Lunch"},
+        ])
+        with open(journal.path_journal, "a") as f:
+            f.write('{"op":"rows","cou')
+
+        task_dict = DayJournal(self.path_day).recover()
+        self.assertEqual("2021-07-10", task_dict["date"])
+        self.assertEqual(["Review", "Lunch"], [task["comment"] for task in task_dict["task_list"]])
+
+        # Replaying the journal again after the day file was replaced does no harm
+        os.remove(self.path_day)
+        journal._compact()
+        with open(journal.path_journal, "a") as f:
+            f.write('{"op":"rows","count":2}\n')
+        self.assertEqual(task_dict, DayJournal(self.path_day).recover())
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,7 @@
 @date 2021/5/31
 """
 
-from src.json_file import JsonFile
+from timekeeper.json_file import JsonFile
 
 import unittest
 import os
@@ -93,6 +93,37 @@ class TestJsonFile(unittest.TestCase):
         # Close the file
         jsonFile_read = None
 
+    def test_read_write_lines(self):
+        """Test read_lines() and write_lines() method
+        """
+        path_file = self.test_dir + "/test_file.jsonl"
+        days = [
+            {"date": "2021-06-0{}".format(day), "task_list": [
+                {"start_time": "09:00:00", "ticket_id": day, "activity_id": 1, "comment": "Task {}".format(day)}
+            ]}
+            for day in range(1, 4)
+        ]
+
+        jsonFile_write = JsonFile()
+        # Write before openning file
+        self.assertFalse(jsonFile_write.write_lines(days))
+        jsonFile_write.open(path_file, "w")
+        # Generator is consumed one day at a time
+        self.assertTrue(jsonFile_write.write_lines(day for day in days))
+        jsonFile_write = None
+
+        with open(path_file) as f:
+            lines = f.readlines()
+        self.assertEqual(3, len(lines))
+        self.assertNotIn(": ", lines[0])
+
+        jsonFile_read = JsonFile()
+        jsonFile_read.open(path_file, "r")
+        self.assertEqual(days, list(jsonFile_read.read_lines()))
+        jsonFile_read = None
+
+        os.remove(path_file)
+
 
 if __name__ == "__main__":
     unittest.main()
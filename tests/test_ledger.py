@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_ledger.py
+@author Y. Kasuga
+@date 2021/9/4
+"""
+
+from timekeeper.ledger import SubmissionLedger, entry_key
+from timekeeper.redmine_client import close_all, save_api_key
+from timekeeper.redmine_entry import RedmineEntry
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID
+from timekeeper.task_log_list import TaskLogList
+from tests.fake_redmine import FakeRedmine
+
+import os
+import tempfile
+import unittest
+from datetime import date
+
+
+class TestLedger(unittest.TestCase):
+    """Test case for SubmissionLedger class
+    """
+
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path_ledger = os.path.join(self._dir.name, "ledger.jsonl")
+        self.path_key = os.path.join(self._dir.name, "key.json")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        close_all()
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def test_entry_key(self) -> None:
+        """Test entry_key() function that every field is in the hash
+        """
+        key = entry_key(date(2021, 9, 1), 101, 1, "Design", 1.5)
+        self.assertEqual(key, entry_key(date(2021, 9, 1), 101, 1, "Design", 1.50))
+        self.assertNotEqual(key, entry_key(date(2021, 9, 2), 101, 1, "Design", 1.5))
+        self.assertNotEqual(key, entry_key(date(2021, 9, 1), 102, 1, "Design", 1.5))
+        self.assertNotEqual(key, entry_key(date(2021, 9, 1), 101, 2, "Design", 1.5))
+        self.assertNotEqual(key, entry_key(date(2021, 9, 1), 101, 1, "Review", 1.5))
+        self.assertNotEqual(key, entry_key(date(2021, 9, 1), 101, 1, "Design", 1.75))
+
+    def test_durable(self) -> None:
+        """Test that records survive reopening the ledger
+        """
+        ledger = SubmissionLedger(self.path_ledger)
+        ledger.record("a", 1)
+        ledger.record("b", 2)
+        with open(self.path_ledger, "a") as f:
+            f.write('{"key":"c",')
+
+        ledger = SubmissionLedger(self.path_ledger)
+        self.assertEqual(2, len(ledger))
+        self.assertIn("a", ledger)
+        self.assertEqual(2, ledger.get("b"))
+        self.assertIsNone(ledger.get("c"))
+
+    def test_resubmit(self) -> None:
+        """Test that re-submitting a day posts only the entries not submitted yet
+        """
+        task_log_list = TaskLogList()
+        for n, ticket_number in enumerate([101, 102, 103]):
+            task_log_list.append_new((9 + n) * 3600, ticket_number, f"Task {n}")
+        task_log_list.close_day(12 * 3600)
+        tasks = task_log_list.get_tasks_sorted()
+
+        with FakeRedmine() as fake:
+            save_api_key(fake.url, "alice", fake.api_key, self.path_key)
+            redmine = RedmineEntry(fake.url, "alice", api_key_file=self.path_key,
+                ledger=SubmissionLedger(self.path_ledger),
+                activity_file=os.path.join(self._dir.name, "activities.json"))
+            redmine.resolveActivity(DEFAULT_ACTIVITY_ID)
+
+            # Interrupted in the middle
+            fake.fail_next = 1
+            results = redmine.submitTimeEntries(date(2021, 9, 1), tasks, max_workers=1)
+            self.assertEqual([False, True, True], [bool(result) for result in results])
+            self.assertEqual(2, len(fake.time_entries))
+
+            # Retried with the ledger of another run
+            redmine.ledger = SubmissionLedger(self.path_ledger)
+            results = redmine.submitTimeEntries(date(2021, 9, 1), tasks, max_workers=1)
+            self.assertTrue(all(results))
+            self.assertEqual([False, True, True], [result.skipped for result in results])
+            self.assertEqual([3, 1, 2], [result.entry_id for result in results])
+            self.assertEqual(3, len(fake.time_entries))
+            # 3 of the first run and 1 of the retry
+            self.assertEqual(4, len([request for request in fake.requests if request[0] == "POST"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_outbox.py
+@author Y. Kasuga
+@date 2021/8/28
+"""
+
+from timekeeper.outbox import Outbox, OutboxReplayer
+from timekeeper.redmine_client import close_all, save_api_key
+from timekeeper.redmine_entry import RedmineEntry
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID
+from timekeeper.task_log_list import TaskLogList
+from tests.fake_redmine import FakeRedmine
+
+import os
+import tempfile
+import time
+import unittest
+from datetime import date
+
+
+class TestOutbox(unittest.TestCase):
+    """Test case for Outbox and OutboxReplayer classes
+    """
+
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path_outbox = os.path.join(self._dir.name, "outbox.jsonl")
+        self.path_key = os.path.join(self._dir.name, "key.json")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        close_all()
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def redmine_entry(self, fake: FakeRedmine) -> RedmineEntry:
+        save_api_key(fake.url, "alice", fake.api_key, self.path_key)
+        redmine = RedmineEntry(fake.url, "alice", api_key_file=self.path_key,
+            activity_file=os.path.join(self._dir.name, "activities.json"))
+        # Activities are fetched before the requests under test
+        redmine.resolveActivity(DEFAULT_ACTIVITY_ID)
+        return redmine
+
+    def test_durable(self) -> None:
+        """Test that pending entries survive reopening the outbox
+        """
+        outbox = Outbox(self.path_outbox)
+        first = outbox.put(date(2021, 8, 23), 101, 1.5, 1, "Design")
+        second = outbox.put(date(2021, 8, 23), 102, 2.0, 1, "Review", "503", delay=60)
+        outbox.retry(second, "503 again", 120)
+        outbox.done(first)
+        del outbox
+
+        outbox = Outbox(self.path_outbox)
+        entries = outbox.entries()
+        self.assertEqual(1, len(outbox))
+        self.assertEqual(second, entries[0]["id"])
+        self.assertEqual(2, entries[0]["attempts"])
+        self.assertEqual("503 again", entries[0]["error"])
+        self.assertEqual([], outbox.due())
+        self.assertEqual(1, len(outbox.due(time.time() + 120)))
+
+        # Compacted to a line per pending entry
+        with open(self.path_outbox) as f:
+            self.assertEqual(1, len(f.readlines()))
+
+    def test_broken_line(self) -> None:
+        """Test that an interrupted append is dropped
+        """
+        outbox = Outbox(self.path_outbox)
+        outbox.put(date(2021, 8, 23), 101, 1.5, 1, "Design")
+        with open(self.path_outbox, "a") as f:
+            f.write('{"op":"put","id":')
+
+        self.assertEqual(1, len(Outbox(self.path_outbox)))
+
+    def test_backoff(self) -> None:
+        """Test backoff() method that the delay doubles up to the maximum
+        """
+        replayer = OutboxReplayer(Outbox(self.path_outbox), None, base_delay=1.0, max_delay=5.0)
+        self.assertEqual([1.0, 2.0, 4.0, 5.0, 5.0], [replayer.backoff(n) for n in range(1, 6)])
+
+    def test_submit_unavailable(self) -> None:
+        """Test that entries failed while the server is unavailable go to the outbox and are replayed
+        """
+        task_log_list = TaskLogList()
+        task_log_list.append_new(9 * 3600, 101, "Design")
+        task_log_list.append_new(12 * 3600, 102, "Review")
+        task_log_list.append_new(15 * 3600, 999, "Invalid")
+        task_log_list.close_day(17 * 3600)
+        outbox = Outbox(self.path_outbox)
+
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake)
+            fake.fail_next = 2
+            results = redmine.submitTimeEntries(
+                date(2021, 8, 23), task_log_list.get_tasks_sorted(), max_workers=1, outbox=outbox
+            )
+
+            # Rejected entries are not queued
+            self.assertEqual([True, True, False], [result.queued for result in results])
+            self.assertEqual("Issue is invalid", results[2].error)
+            self.assertEqual([101, 102], [entry["ticket_number"] for entry in outbox.entries()])
+            self.assertEqual(0, len(fake.time_entries))
+
+            replayer = OutboxReplayer(outbox, redmine.submitTimeEntry, base_delay=0.05)
+            results = replayer.drain(force=True)
+            self.assertTrue(all(results))
+            self.assertEqual(0, len(outbox))
+            self.assertEqual([101, 102], [entry["issue_id"] for entry in fake.time_entries.values()])
+            self.assertEqual([3.0, 3.0], [entry["hours"] for entry in fake.time_entries.values()])
+
+    def test_replayer(self) -> None:
+        """Test that the replayer thread drains the outbox once the server comes back
+        """
+        outbox = Outbox(self.path_outbox)
+        outbox.put(date(2021, 8, 23), 101, 1.5, 1, "Design")
+        outbox.put(date(2021, 8, 23), 102, 2.0, 1, "Review")
+        submitted = []
+
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake)
+            fake.fail_next = 3
+            replayer = OutboxReplayer(outbox, redmine.submitTimeEntry, base_delay=0.05, on_result=submitted.append)
+            replayer.start()
+
+            deadline = time.monotonic() + 5
+            while len(outbox) and time.monotonic() < deadline:
+                time.sleep(0.02)
+            replayer.stop()
+
+            self.assertEqual(0, len(outbox))
+            self.assertEqual(2, len(submitted))
+            self.assertEqual(2, len(fake.time_entries))
+            # A failure holds back the rest of the entries, so the server is not hit once per entry
+            self.assertEqual(5, len([request for request in fake.requests if request[0] == "POST"]))
+
+    def test_connection_refused(self) -> None:
+        """Test that an entry is queued when the server is down
+        """
+        outbox = Outbox(self.path_outbox)
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake)
+        # Server is shut down
+        redmine.redmine.engine.session.close()
+
+        task_log_list = TaskLogList()
+        task_log_list.append_new(9 * 3600, 101, "Design")
+        task_log_list.close_day(10 * 3600)
+        results = redmine.submitTimeEntries(date(2021, 8, 23), task_log_list.get_tasks_sorted(), outbox=outbox)
+
+        self.assertFalse(results[0])
+        self.assertTrue(results[0].queued)
+        self.assertEqual(1, len(outbox))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_reconcile.py
+@author Y. Kasuga
+@date 2021/9/11
+"""
+
+from timekeeper.ledger import SubmissionLedger
+from timekeeper.redmine_client import close_all, save_api_key
+from timekeeper.redmine_entry import RedmineEntry
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID
+from timekeeper.task_log_list import TaskLogList
+from tests.fake_redmine import FakeRedmine
+
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+
+class TestReconcile(unittest.TestCase):
+    """Test case for reconciliation of RedmineEntry with the time entries already logged
+    """
+
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path_key = os.path.join(self._dir.name, "key.json")
+
+        self.task_log_list = TaskLogList()
+        for n, ticket_number in enumerate([101, 102, 103]):
+            self.task_log_list.append_new((9 + n) * 3600, ticket_number, f"Task {n}")
+        self.task_log_list.close_day(12 * 3600)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        close_all()
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def redmine_entry(self, fake: FakeRedmine) -> RedmineEntry:
+        save_api_key(fake.url, "alice", fake.api_key, self.path_key)
+        redmine = RedmineEntry(fake.url, "alice", api_key_file=self.path_key,
+            activity_file=os.path.join(self._dir.name, "activities.json"))
+        # Activities are fetched before the requests under test
+        redmine.resolveActivity(DEFAULT_ACTIVITY_ID)
+        return redmine
+
+    @staticmethod
+    def log(fake: FakeRedmine, issue_id: int, hours: float, comments: str,
+        spent_on: str="2021-09-01", user_id: int=1) -> None:
+        entry_id = len(fake.time_entries) + 1
+        fake.time_entries[entry_id] = {
+            "id": entry_id, "issue_id": issue_id, "spent_on": spent_on,
+            "hours": hours, "comments": comments, "user_id": user_id
+        }
+
+    def requests(self, fake: FakeRedmine, method: str) -> list:
+        return [request for request in fake.requests if request[0] == method and request[1].startswith("/time_entries")]
+
+    def test_reconcile(self) -> None:
+        """Test that logged entries are skipped or updated and the others are created
+        """
+        with FakeRedmine() as fake:
+            self.log(fake, 101, 1.0, "Task 0")
+            self.log(fake, 102, 0.5, "Task 1")
+            self.log(fake, 102, 1.0, "Task 1", user_id=2)
+            self.log(fake, 103, 1.0, "Task 2", spent_on="2021-08-31")
+            self.log(fake, 103, 2.0, "Meeting")
+
+            results = self.redmine_entry(fake).submitTimeEntries(
+                date(2021, 9, 1), self.task_log_list.get_tasks_sorted(), reconcile=True
+            )
+
+            self.assertTrue(all(results))
+            self.assertEqual([True, False, False], [result.skipped for result in results])
+            self.assertEqual([False, True, False], [result.updated for result in results])
+            self.assertEqual([1, 2, 6], [result.entry_id for result in results])
+
+            self.assertEqual(1, len(self.requests(fake, "GET")))
+            self.assertEqual(1, len(self.requests(fake, "PUT")))
+            self.assertEqual(1, len(self.requests(fake, "POST")))
+            self.assertEqual(1.0, fake.time_entries[2]["hours"])
+            # Entries of the other users, days and tasks are left as they are
+            self.assertEqual(1.0, fake.time_entries[3]["hours"])
+            self.assertEqual(1.0, fake.time_entries[4]["hours"])
+            self.assertEqual(2.0, fake.time_entries[5]["hours"])
+
+            # Nothing is sent again
+            results = self.redmine_entry(fake).submitTimeEntries(
+                date(2021, 9, 1), self.task_log_list.get_tasks_sorted(), reconcile=True
+            )
+            self.assertTrue(all(result.skipped for result in results))
+            self.assertEqual(2, len(self.requests(fake, "GET")))
+            self.assertEqual(1, len(self.requests(fake, "PUT")))
+            self.assertEqual(1, len(self.requests(fake, "POST")))
+
+    def test_unknown_activity(self) -> None:
+        """Test that a logged entry of an unknown activity is rejected, not skipped
+        """
+        with FakeRedmine() as fake:
+            self.log(fake, 101, 1.0, "Task 0")
+            task = SimpleNamespace(ticket_number=101, logged_time=timedelta(hours=1), activity_id="Unknown",
+                comment="Task 0")
+
+            results = self.redmine_entry(fake).submitTimeEntries(date(2021, 9, 1), [task], reconcile=True)
+
+            self.assertFalse(results[0])
+            self.assertFalse(results[0].skipped)
+            self.assertEqual("Unknown activity: Unknown", results[0].error)
+            self.assertEqual(0, len(self.requests(fake, "PUT")))
+
+    def test_ledger(self) -> None:
+        """Test that nothing is fetched when every entry is in the ledger
+        """
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake)
+            redmine.ledger = SubmissionLedger(os.path.join(self._dir.name, "ledger.jsonl"))
+            tasks = self.task_log_list.get_tasks_sorted()
+
+            redmine.submitTimeEntries(date(2021, 9, 1), tasks, reconcile=True)
+            results = redmine.submitTimeEntries(date(2021, 9, 1), tasks, reconcile=True)
+
+            self.assertTrue(all(result.skipped for result in results))
+            self.assertEqual(1, len(self.requests(fake, "GET")))
+            self.assertEqual(3, len(self.requests(fake, "POST")))
+
+    def test_fetch_pages(self) -> None:
+        """Test fetchTimeEntries() method that every page is fetched
+        """
+        with FakeRedmine() as fake:
+            for n in range(250):
+                self.log(fake, 101, 0.25, f"Entry {n}")
+
+            entries = self.redmine_entry(fake).fetchTimeEntries(date(2021, 9, 1))
+
+            self.assertEqual(list(range(1, 251)), [entry["id"] for entry in entries])
+            self.assertEqual(3, len(self.requests(fake, "GET")))
+
+    def test_fetch_failure(self) -> None:
+        """Test that every entry is created if the logged entries cannot be fetched
+        """
+        with FakeRedmine() as fake:
+            self.log(fake, 101, 1.0, "Task 0")
+            redmine = self.redmine_entry(fake)
+            fake.fail_next = 1
+
+            results = redmine.submitTimeEntries(
+                date(2021, 9, 1), self.task_log_list.get_tasks_sorted(), reconcile=True
+            )
+            self.assertTrue(all(results))
+            self.assertEqual(3, len(self.requests(fake, "POST")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_redmine_client.py
+@author Y. Kasuga
+@date 2021/8/21
+"""
+
+from timekeeper import redmine_client
+from timekeeper.redmine_client import get_redmine, close_all, load_api_key, login, save_api_key
+from timekeeper.redmine_entry import RedmineEntry
+from timekeeper.task_log_list import TaskLogList
+from tests.fake_redmine import FakeRedmine
+
+import os
+import socket
+import stat
+import tempfile
+import time
+import unittest
+from datetime import date
+
+import requests
+from mock import patch
+
+
+class TestRedmineClient(unittest.TestCase):
+    """Test case for redmine_client
+    """
+
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path_key = os.path.join(self._dir.name, "TimeKeeperApiKey.json")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        close_all()
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def test_get_redmine(self) -> None:
+        """Test get_redmine() function that a client is shared by server and user
+        """
+        redmine = get_redmine("http://redmine", "alice", "pass")
+
+        self.assertIs(redmine, get_redmine("http://redmine", "alice", "pass"))
+        self.assertIsNot(redmine, get_redmine("http://redmine", "bob", "pass"))
+        self.assertIsNot(redmine, get_redmine("http://other", "alice", "pass"))
+
+        # Created again with a new password or a larger pool
+        redmine_password = get_redmine("http://redmine", "alice", "new")
+        self.assertIsNot(redmine, redmine_password)
+        self.assertIsNot(redmine_password, get_redmine("http://redmine", "alice", "new", pool_size=32))
+        self.assertEqual(32, redmine_client._clients[("http://redmine", "alice")][1])
+
+    def test_timeout(self) -> None:
+        """Test that a request to a server which never answers times out
+        """
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(1)
+        url = "http://127.0.0.1:{}".format(listener.getsockname()[1])
+
+        with patch.object(redmine_client, "REQUEST_TIMEOUT", 0.5):
+            redmine = get_redmine(url, "alice", "pass")
+        start = time.monotonic()
+        with self.assertRaises(requests.exceptions.Timeout):
+            redmine.engine.request("get", f"{url}/my/account.json")
+        self.assertLess(time.monotonic() - start, 5)
+        listener.close()
+
+    def test_keep_alive(self) -> None:
+        """Test that submissions reuse the connections of the pool
+        """
+        task_log_list = TaskLogList()
+        for n, ticket_number in enumerate([101, 102, 103, 101, 102, 103]):
+            task_log_list.append_new((9 + n) * 3600, ticket_number, f"Task {n}")
+        task_log_list.close_day(17 * 3600)
+
+        with FakeRedmine() as fake:
+            save_api_key(fake.url, "alice", fake.api_key, self.path_key)
+            for _ in range(3):
+                results = RedmineEntry(fake.url, "alice", pool_size=2, api_key_file=self.path_key,
+                    activity_file=os.path.join(self._dir.name, "activities.json")).submitTimeEntries(
+                    date(2021, 8, 23), task_log_list.get_tasks_sorted(), max_workers=2
+                )
+                self.assertTrue(all(results))
+
+            self.assertEqual(18, len(fake.time_entries))
+            # Connections are opened once per worker, not once per entry
+            self.assertLessEqual(len(fake.connections), 2)
+
+    def test_api_key(self) -> None:
+        """Test save_api_key() and load_api_key() functions
+        """
+        self.assertEqual("", load_api_key("http://redmine", "alice", self.path_key))
+
+        save_api_key("http://redmine/", "alice", "abc", self.path_key)
+        save_api_key("http://redmine", "bob", "def", self.path_key)
+        self.assertEqual("abc", load_api_key("http://redmine", "alice", self.path_key))
+        self.assertEqual("def", load_api_key("http://redmine", "bob", self.path_key))
+        self.assertEqual("", load_api_key("http://other", "alice", self.path_key))
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.path_key).st_mode))
+
+        # Forget the key
+        save_api_key("http://redmine", "alice", "", self.path_key)
+        self.assertEqual("", load_api_key("http://redmine", "alice", self.path_key))
+        self.assertEqual("def", load_api_key("http://redmine", "bob", self.path_key))
+
+    def test_login(self) -> None:
+        """Test login() function that the password is used only to fetch the API key
+        """
+        with FakeRedmine() as fake:
+            redmine = login(fake.url, "alice", "pass", path_file=self.path_key)
+            self.assertEqual(fake.api_key, load_api_key(fake.url, "alice", self.path_key))
+            self.assertEqual(["basic"], fake.auths)
+            self.assertEqual("/my/account.json", fake.requests[0][1])
+
+            redmine.time_entry.create(issue_id=101, hours=1.0)
+            # The cached key is used without a password
+            login(fake.url, "alice", path_file=self.path_key).time_entry.create(issue_id=102, hours=1.0)
+            self.assertEqual(["basic", "key", "key"], fake.auths)
+            self.assertEqual(2, len(fake.time_entries))
+
+    def test_login_wrong_password(self) -> None:
+        """Test login() function with a password the server rejects
+        """
+        with FakeRedmine() as fake:
+            login(fake.url, "alice", "wrong", path_file=self.path_key)
+            self.assertEqual("", load_api_key(fake.url, "alice", self.path_key))
+            self.assertFalse(os.path.exists(self.path_key))
+
+
+if __name__ == "__main__":
+    unittest.main()
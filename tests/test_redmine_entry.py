@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_redmine_entry.py
+@author Y. Kasuga
+@date 2021/8/7
+"""
+
+from timekeeper.activity_catalogue import ActivityCatalogue
+from timekeeper.redmine_entry import RedmineEntry, SubmitResult
+from timekeeper.task_log_list import TaskLogList
+
+import unittest
+import threading
+import time
+from datetime import date, timedelta
+
+
+class FakeTimeEntry(object):
+    """Time entry of FakeRedmine which takes a while to save
+    """
+    def __init__(self, redmine: "FakeRedmine") -> None:
+        self.redmine = redmine
+
+    def save(self) -> None:
+        with self.redmine.lock:
+            self.redmine.running += 1
+            self.redmine.max_running = max(self.redmine.max_running, self.redmine.running)
+        time.sleep(0.02)
+        with self.redmine.lock:
+            self.redmine.running -= 1
+            if self.issue_id in self.redmine.invalid_issues:
+                raise ValueError(f"Issue {self.issue_id} is invalid")
+            self.redmine.saved.append(self)
+            self.id = len(self.redmine.saved)
+
+
+class FakeRedmine(object):
+    """Stand-in of redminelib.Redmine
+    """
+    def __init__(self, invalid_issues=()) -> None:
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.saved = []
+        self.invalid_issues = set(invalid_issues)
+        self.time_entry = self
+
+    def new(self) -> FakeTimeEntry:
+        return FakeTimeEntry(self)
+
+
+def make_redmine_entry(redmine: FakeRedmine, ledger=None) -> RedmineEntry:
+    redmine_entry = RedmineEntry.__new__(RedmineEntry)
+    redmine_entry.redmine = redmine
+    redmine_entry.ledger = ledger
+    redmine_entry.activities = ActivityCatalogue("http://redmine", path_file="")
+    redmine_entry._activities_loaded = True
+    return redmine_entry
+
+
+class TestRedmineEntry(unittest.TestCase):
+    """Test case for RedmineEntry class
+    """
+
+    def setUp(self) -> None:
+        self.task_log_list = TaskLogList()
+        for hour in range(8):
+            self.task_log_list.append_new(timedelta(hours=9 + hour).seconds, 100 + hour, f"Task {hour}")
+        self.task_log_list.close_day(timedelta(hours=17).seconds)
+        return super().setUp()
+
+    def test_submitTimeEntry(self) -> None:
+        """Test submitTimeEntry() method
+        """
+        redmine = FakeRedmine(invalid_issues=[102])
+        redmine_entry = make_redmine_entry(redmine)
+
+        result = redmine_entry.submitTimeEntry(date(2021, 8, 2), 101, timedelta(minutes=90), 1, "Design")
+        self.assertTrue(result)
+        self.assertEqual(1, result.entry_id)
+        self.assertEqual(1.5, result.hours)
+        self.assertEqual(date(2021, 8, 2), redmine.saved[0].spent_on)
+
+        result = redmine_entry.submitTimeEntry(date(2021, 8, 2), 102, timedelta(minutes=90), 1, "Design")
+        self.assertFalse(result)
+        self.assertEqual("Issue 102 is invalid", result.error)
+
+    def test_submitTimeEntries(self) -> None:
+        """Test submitTimeEntries() method
+        that entries are submitted concurrently up to max_workers and results are in order
+        """
+        redmine = FakeRedmine(invalid_issues=[103])
+        redmine_entry = make_redmine_entry(redmine)
+        tasks = self.task_log_list.get_tasks_sorted()
+        finished = []
+
+        results = redmine_entry.submitTimeEntries(
+            date(2021, 8, 2), tasks, max_workers=3,
+            on_result=lambda index, result: finished.append(index)
+        )
+
+        self.assertEqual([task.ticket_number for task in tasks], [result.ticket_number for result in results])
+        self.assertEqual([task.ticket_number != 103 for task in tasks], [bool(result) for result in results])
+        self.assertEqual(list(range(len(tasks))), sorted(finished))
+        self.assertEqual(len(tasks) - 1, len(redmine.saved))
+        self.assertEqual(3, redmine.max_running)
+
+        self.assertEqual([], redmine_entry.submitTimeEntries(date(2021, 8, 2), []))
+
+    def test_submitTimeEntries_cancel(self) -> None:
+        """Test submitTimeEntries() method
+        that entries not started after cancel fail as cancelled
+        """
+        redmine = FakeRedmine()
+        redmine_entry = make_redmine_entry(redmine)
+        tasks = self.task_log_list.get_tasks_sorted()
+        cancel = threading.Event()
+
+        def on_result(index, result):
+            cancel.set()
+
+        results = redmine_entry.submitTimeEntries(
+            date(2021, 8, 2), tasks, max_workers=2, on_result=on_result, cancel=cancel
+        )
+
+        self.assertEqual(len(tasks), len(results))
+        self.assertLessEqual(len(redmine.saved), 2)
+        self.assertEqual(len(redmine.saved), sum(bool(result) for result in results))
+        self.assertIn("Cancelled", [result.error for result in results])
+
+    def test_submit_result(self) -> None:
+        """Test SubmitResult class
+        """
+        result = SubmitResult(101, 1.5, 1, "Design")
+        self.assertTrue(result.success)
+        result.error = "Forbidden"
+        self.assertFalse(result)
+        self.assertIn("Forbidden", repr(result))
+
+
+if __name__ == "__main__":
+    unittest.main()
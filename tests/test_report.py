@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_report.py
+@author Y. Kasuga
+@date 2021/6/12
+"""
+
+from timekeeper.report import day_rows, aggregate_chunk, aggregate_files, find_save_files, format_report
+from timekeeper.json_file import JsonFile
+
+import unittest
+import os
+import tempfile
+
+
+def write_day(path_file: str, str_date: str, task_list: list) -> None:
+    """Write a save file of a day
+
+    Args:
+        path_file (str): Path to the save file
+        str_date (str): Date of the day
+        task_list (list): List of (start_time, ticket_id, activity_id, comment)
+    """
+    os.makedirs(os.path.dirname(path_file), exist_ok=True)
+    jsonFile = JsonFile()
+    jsonFile.open(path_file, "w")
+    jsonFile.write({
+        "date": str_date,
+        "task_list": [
+            {"start_time": start_time, "ticket_id": ticket_id, "activity_id": activity_id, "comment": comment}
+            for start_time, ticket_id, activity_id, comment in task_list
+        ],
+        "version": 2
+    })
+    del jsonFile
+
+
+class TestReport(unittest.TestCase):
+    """Test case for report
+    """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.day = [
+            ("09:00:00", 101, 1, "Design"),
+            ("10:00:00", 102, 2, "Review"),
+            ("12:00:00", -1, 1, "Lunch"),
+            ("13:00:00", 101, 1, "Test"),
+            ("17:30:00", 0, 1, "EndOfDay"),
+        ]
+        self.paths = []
+        for user in ["alice", "bob"]:
+            for day in range(1, 11):
+                path_file = os.path.join(self.tmp_dir.name, user, f"2021-06-{day:02}.json")
+                write_day(path_file, f"2021-06-{day:02}", self.day)
+                self.paths.append(path_file)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_day_rows(self) -> None:
+        """Test day_rows() function
+        """
+        rows = day_rows({
+            "date": "2021-06-01",
+            "task_list": [
+                {"start_time": start_time, "ticket_id": ticket_id, "activity_id": activity_id, "comment": comment}
+                for start_time, ticket_id, activity_id, comment in self.day
+            ],
+            "version": 2
+        }, "alice")
+
+        self.assertEqual([
+            ("2021-06-01", "alice", 101, 1, 3600),
+            ("2021-06-01", "alice", 102, 2, 7200),
+            ("2021-06-01", "alice", 101, 1, 16200),
+        ], rows)
+
+    def test_aggregate_chunk(self) -> None:
+        """Test aggregate_chunk() function
+        """
+        totals, num_files, errors = aggregate_chunk(self.paths[:2] + ["file_doesnt_exist.json"])
+
+        self.assertEqual(2, num_files)
+        self.assertEqual(["file_doesnt_exist.json"], errors)
+        self.assertEqual({
+            ("2021-06-01", "alice", 101, 1): 19800,
+            ("2021-06-01", "alice", 102, 2): 7200,
+            ("2021-06-02", "alice", 101, 1): 19800,
+            ("2021-06-02", "alice", 102, 2): 7200,
+        }, totals)
+
+    def test_aggregate_files(self) -> None:
+        """Test aggregate_files() function
+        that the process pool gives the same result as a single process
+        """
+        expected = aggregate_files(self.paths, processes=1)
+        totals, num_files, errors = aggregate_files(self.paths, processes=2)
+
+        self.assertEqual(expected[0], totals)
+        self.assertEqual(20, num_files)
+        self.assertEqual([], errors)
+
+    def test_find_save_files(self) -> None:
+        """Test find_save_files() function
+        """
+        self.assertEqual(sorted(self.paths), sorted(find_save_files([self.tmp_dir.name])))
+        self.assertEqual(["some_file.json"], find_save_files(["some_file.json"]))
+
+    def test_format_report(self) -> None:
+        """Test format_report() function
+        """
+        lines = format_report({
+            ("2021-06-02", "bob", 101, 1): 5400,
+            ("2021-06-01", "alice", 102, 2): 900,
+        }).split("\n")
+
+        self.assertEqual(3, len(lines))
+        self.assertEqual(["2021-06-01", "alice", "102", "2", "0.25"], lines[1].split())
+        self.assertEqual(["2021-06-02", "bob", "101", "1", "1.5"], lines[2].split())
+
+
+if __name__ == "__main__":
+    unittest.main()
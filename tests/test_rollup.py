@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_rollup.py
+@author Y. Kasuga
+@date 2021/6/19
+"""
+
+import unittest
+import os
+import random
+import tempfile
+from datetime import timedelta
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from timekeeper.json_file import JsonFile
+from timekeeper.timedelta_to_hour import timedelta_to_hour
+
+
+def make_day(str_date: str, task_list: list) -> dict:
+    """Make a dictionary of the task list
+
+    Args:
+        str_date (str): Date of the day
+        task_list (list): List of (start_time, ticket_id, activity_id)
+
+    Returns:
+        dict: Dictionary in the format of TaskLogList.get_task_dict()
+    """
+    return {
+        "date": str_date,
+        "task_list": [
+            {"start_time": start_time, "ticket_id": ticket_id, "activity_id": activity_id, "comment": ""}
+            for start_time, ticket_id, activity_id in task_list
+        ],
+        "version": 2
+    }
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestRollup(unittest.TestCase):
+    """Test case for rollup
+    """
+
+    def setUp(self) -> None:
+        from timekeeper.rollup import load_columns
+
+        # 2021-06-06 is Sunday and 2021-06-07 is Monday
+        self.days = [
+            make_day("2021-05-31", [("09:00:00", 101, 1), ("10:00:00", 102, 2), ("10:30:00", 0, 1)]),
+            make_day("2021-06-06", [("09:00:00", 101, 1), ("11:00:00", -1, 1), ("12:00:00", 0, 1)]),
+            make_day("2021-06-07", [("09:00:00", 102, 1), ("09:15:00", 101, 2), ("10:00:00", 0, 1)]),
+        ]
+        self.columns = load_columns(self.days)
+        return super().setUp()
+
+    def test_load_columns(self) -> None:
+        """Test load_columns() function
+        """
+        self.assertEqual(5, len(self.columns))
+        self.assertEqual(np.datetime64("2021-05-31"), self.columns.date[0])
+        self.assertEqual([101, 102, 101, 102, 101], self.columns.ticket.tolist())
+        self.assertEqual([1, 2, 1, 1, 2], self.columns.activity.tolist())
+        self.assertEqual([3600, 1800, 7200, 900, 2700], self.columns.seconds.tolist())
+
+    def test_load_files(self) -> None:
+        """Test load_files() function
+        that files which cannot be read are returned and the others are loaded
+        """
+        from timekeeper.report import find_save_files
+        from timekeeper.rollup import load_files
+
+        with tempfile.TemporaryDirectory() as directory:
+            for day in self.days:
+                jsonFile = JsonFile()
+                jsonFile.open(os.path.join(directory, day["date"] + ".json"), "w")
+                jsonFile.write(day)
+                del jsonFile
+            path_broken = os.path.join(directory, "broken.json")
+            with open(path_broken, "w") as f:
+                f.write("{bad")
+
+            columns, errors = load_files(find_save_files([directory]))
+
+        self.assertEqual([path_broken], errors)
+        self.assertEqual(sorted(self.columns.seconds.tolist()), sorted(columns.seconds.tolist()))
+
+    def test_period_start(self) -> None:
+        """Test period_start() function
+        """
+        from timekeeper.rollup import period_start
+
+        dates = np.array(["2021-06-06", "2021-06-07", "2021-06-13", "2021-07-01"], dtype="datetime64[D]")
+        self.assertEqual(["2021-05-31", "2021-06-07", "2021-06-07", "2021-06-28"],
+            period_start(dates, "week").astype(str).tolist())
+        self.assertEqual(["2021-06-01", "2021-06-01", "2021-06-01", "2021-07-01"],
+            period_start(dates, "month").astype(str).tolist())
+        with self.assertRaises(ValueError):
+            period_start(dates, "year")
+
+    def test_group_sum(self) -> None:
+        """Test group_sum() function
+        """
+        from timekeeper.rollup import group_sum
+
+        keys, seconds = group_sum(self.columns, ("ticket", "activity"))
+        self.assertEqual([[101, 1], [101, 2], [102, 1], [102, 2]], keys.tolist())
+        self.assertEqual([10800, 2700, 900, 1800], seconds.tolist())
+
+    def test_pivot(self) -> None:
+        """Test pivot() function
+        """
+        from timekeeper.rollup import pivot
+
+        periods, tickets, hours = pivot(self.columns, "week")
+        self.assertEqual(["2021-05-31", "2021-06-07"], periods.astype(str).tolist())
+        self.assertEqual([101, 102], tickets.tolist())
+        self.assertEqual([[3.0, 0.5], [0.75, 0.25]], hours.tolist())
+
+        periods, activities, hours = pivot(self.columns, "month", "activity")
+        self.assertEqual(["2021-05-01", "2021-06-01"], periods.astype(str).tolist())
+        self.assertEqual([1, 2], activities.tolist())
+        self.assertEqual([[1.0, 0.5], [2.25, 0.75]], hours.tolist())
+
+    def test_pivot_same_as_timedelta_to_hour(self) -> None:
+        """Test pivot() function
+        that hours are rounded the same as timedelta_to_hour()
+        """
+        from timekeeper.rollup import HourColumns, pivot
+
+        rand = random.Random(0)
+        seconds = [rand.randrange(1, 600) * 60 for _ in range(1000)]
+        columns = HourColumns(
+            np.array(["2021-06-01"] * len(seconds), dtype="datetime64[D]"),
+            np.arange(len(seconds)),
+            np.ones(len(seconds), dtype=np.int64),
+            np.array(seconds)
+        )
+
+        _, _, hours = pivot(columns, "day")
+        self.assertEqual([timedelta_to_hour(timedelta(seconds=second)) for second in seconds],
+            hours[0].tolist())
+
+    def test_to_hours(self) -> None:
+        """Test to_hours() function
+        """
+        from timekeeper.rollup import to_hours
+
+        self.assertEqual([0.0, 0.25, 1.0, 0.0, 0.02, 0.02], to_hours(np.array([0, 900, 3600, 18, 54, 90])).tolist())
+        self.assertEqual([0.2], to_hours(np.array([900]), 1).tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
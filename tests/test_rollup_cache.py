@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_rollup_cache.py
+@author Y. Kasuga
+@date 2021/6/26
+"""
+
+from timekeeper.rollup_cache import RollupCache
+from timekeeper.report import aggregate_files, find_save_files
+
+import unittest
+import os
+import tempfile
+
+from tests.test_report import write_day
+
+
+class TestRollupCache(unittest.TestCase):
+    """Test case for RollupCache class
+    """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+        self.day = [
+            ("09:00:00", 101, 1, "Design"),
+            ("10:00:00", 102, 2, "Review"),
+            ("12:00:00", 0, 1, "EndOfDay"),
+        ]
+        # 2021-06-07 is Monday
+        for user in ["alice", "bob"]:
+            for day in range(7, 21):
+                write_day(self._path(user, day), f"2021-06-{day:02}", self.day)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def _path(self, user: str, day: int) -> str:
+        return os.path.join(self.directory, user, f"2021-06-{day:02}.json")
+
+    def test_update(self) -> None:
+        """Test update() method
+        that only new or changed files are read
+        """
+        cache = RollupCache(self.directory)
+        self.assertEqual((28, []), cache.update())
+        cache.save()
+
+        # Nothing changed
+        cache = RollupCache(self.directory)
+        self.assertEqual((0, []), cache.update())
+
+        # Edit a day and add a day
+        write_day(self._path("alice", 8), "2021-06-08", self.day[1:])
+        write_day(self._path("alice", 21), "2021-06-21", self.day)
+        self.assertEqual((2, []), cache.update())
+        self.assertEqual((0, []), cache.update())
+
+    def test_day_totals(self) -> None:
+        """Test day_totals() method
+        that it gives the same totals as aggregate_files()
+        """
+        cache = RollupCache(self.directory)
+        cache.update()
+        write_day(self._path("bob", 9), "2021-06-09", self.day[1:])
+        os.remove(self._path("bob", 10))
+        cache.update()
+
+        expected, _, _ = aggregate_files(find_save_files([self.directory]), processes=1)
+        self.assertEqual(expected, cache.day_totals())
+
+    def test_week_totals(self) -> None:
+        """Test week_totals() method
+        """
+        cache = RollupCache(self.directory)
+        cache.update()
+
+        week_totals = cache.week_totals()
+        self.assertEqual(7 * 3600, week_totals[("2021-06-07", "alice", 101, 1)])
+        self.assertEqual(7 * 7200, week_totals[("2021-06-14", "bob", 102, 2)])
+
+        # Only the changed week is summed up again
+        write_day(self._path("alice", 15), "2021-06-15", self.day[1:])
+        cache.update()
+        week_totals = cache.week_totals()
+        self.assertEqual(7 * 3600, week_totals[("2021-06-07", "alice", 101, 1)])
+        self.assertEqual(6 * 3600, week_totals[("2021-06-14", "alice", 101, 1)])
+
+    def test_unreadable_file(self) -> None:
+        """Test update() method
+        that files which cannot be read are returned and read again on the next update
+        """
+        path_broken = self._path("alice", 21)
+        with open(path_broken, "w") as f:
+            f.write("{broken")
+
+        cache = RollupCache(self.directory)
+        self.assertEqual((28, [path_broken]), cache.update())
+        self.assertEqual((0, [path_broken]), cache.update())
+        self.assertNotIn("2021-06-21", [day["date"] for day in cache.days.values()])
+
+        write_day(path_broken, "2021-06-21", self.day)
+        self.assertEqual((1, []), cache.update())
+
+    def test_broken_cache(self) -> None:
+        """Test that a broken cache file is ignored
+        """
+        with open(os.path.join(self.directory, RollupCache.cache_file_name), "w") as f:
+            f.write("{broken")
+
+        cache = RollupCache(self.directory)
+        self.assertEqual((28, []), cache.update())
+
+
+if __name__ == "__main__":
+    unittest.main()
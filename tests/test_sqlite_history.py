@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_sqlite_history.py
+@author Y. Kasuga
+@date 2021/7/31
+"""
+
+from timekeeper.sqlite_history import SqliteHistory
+from timekeeper.history_store import HistoryStore, open_history
+from timekeeper.report import aggregate_files
+from tests.test_history_store import make_day
+from tests.test_report import write_day
+
+import unittest
+import os
+import tempfile
+from datetime import date
+
+
+class TestSqliteHistory(unittest.TestCase):
+    """Test case for SqliteHistory class
+    """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path_file = os.path.join(self.tmp_dir.name, "history.sqlite3")
+        self.history = SqliteHistory(self.path_file)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.history.close()
+        self.tmp_dir.cleanup()
+        return super().tearDown()
+
+    def test_save_load_day(self) -> None:
+        """Test save_day() and load_day() method
+        """
+        self.history.save_day(make_day("2021-07-01", "First"))
+        self.history.save_day(make_day("2021-07-02"))
+        self.history.save_day(make_day("2021-07-01", "Second"))
+
+        self.assertEqual(make_day("2021-07-01", "Second"), self.history.load_day(date(2021, 7, 1)))
+        self.assertIsNone(self.history.load_day(date(2021, 7, 3)))
+        self.assertEqual([date(2021, 7, 1), date(2021, 7, 2)], self.history.dates())
+
+        # WAL mode
+        (journal_mode,) = self.history._connection.execute("PRAGMA journal_mode").fetchone()
+        self.assertEqual("wal", journal_mode)
+
+    def test_import_files(self) -> None:
+        """Test import_files() method and range queries against timekeeper.report
+        """
+        day = [
+            ("09:00:00", 101, 1, "Design"),
+            ("10:00:00", 102, 2, "Review"),
+            ("12:00:00", -1, 1, "Lunch"),
+            ("13:00:00", 101, 1, "Test"),
+            ("17:30:00", 0, 1, "EndOfDay"),
+        ]
+        paths = []
+        for month in range(6, 10):
+            for day_of_month in range(1, 29, 3):
+                path_file = os.path.join(self.tmp_dir.name, "alice", f"2021-{month:02}-{day_of_month:02}.json")
+                write_day(path_file, f"2021-{month:02}-{day_of_month:02}", day)
+                paths.append(path_file)
+
+        num_days, errors = self.history.import_files(paths + ["file_doesnt_exist.json"], batch_size=7)
+        self.assertEqual(len(paths), num_days)
+        self.assertEqual(["file_doesnt_exist.json"], errors)
+
+        # Q3
+        start, end = date(2021, 7, 1), date(2021, 9, 30)
+        totals, _, _ = aggregate_files(paths, processes=1)
+        expected = {}
+        for (str_date, _, ticket_id, activity_id), seconds in totals.items():
+            if start <= date.fromisoformat(str_date) <= end:
+                expected[ticket_id] = expected.get(ticket_id, 0) + seconds
+
+        self.assertEqual(expected, self.history.totals(start, end))
+        self.assertEqual(expected[101], self.history.ticket_seconds(101, start, end))
+        self.assertEqual({1: expected[101], 2: expected[102]}, self.history.totals(start, end, by="activity"))
+
+        # Query by ticket uses its index
+        plan = " ".join(str(row) for row in self.history._connection.execute(
+            "EXPLAIN QUERY PLAN SELECT SUM(logged_seconds) FROM entries"
+            " WHERE ticket_id = 101 AND date BETWEEN '2021-07-01' AND '2021-09-30'"
+        ))
+        self.assertIn("entries_ticket", plan)
+
+    def test_import_malformed_day(self) -> None:
+        """Test import_files() method with files which are JSON but not days
+        """
+        day = [("09:00:00", 101, 1, "Design"), ("17:30:00", 0, 1, "EndOfDay")]
+        paths = []
+        for day_of_month in range(1, 6):
+            path_file = os.path.join(self.tmp_dir.name, f"2021-06-{day_of_month:02}.json")
+            write_day(path_file, f"2021-06-{day_of_month:02}", day)
+            paths.append(path_file)
+        path_malformed = os.path.join(self.tmp_dir.name, "malformed.json")
+        with open(path_malformed, "w") as f:
+            f.write('{"foo": 1}')
+        path_bad_date = os.path.join(self.tmp_dir.name, "bad_date.json")
+        with open(path_bad_date, "w") as f:
+            f.write('{"date": "June", "task_list": []}')
+
+        for batch_size in (2, 500):
+            num_days, errors = self.history.import_files(
+                paths[:2] + [path_malformed] + paths[2:] + [path_bad_date], batch_size=batch_size
+            )
+            self.assertEqual(5, num_days)
+            self.assertEqual([path_malformed, path_bad_date], errors)
+            self.assertEqual([date(2021, 6, n) for n in range(1, 6)], self.history.dates())
+
+    def test_open_history(self) -> None:
+        """Test open_history() function chooses the backend by the path
+        """
+        history = open_history(os.path.join(self.tmp_dir.name, "other.sqlite3"))
+        self.assertIsInstance(history, SqliteHistory)
+        history.close()
+
+        history = open_history(os.path.join(self.tmp_dir.name, "history"))
+        self.assertIsInstance(history, HistoryStore)
+        history.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,29 +5,28 @@
 @date 2021/5/30
 """
 
-from src.task_log import TaskLog
+from timekeeper.task_log import TaskLog
 
 import unittest
-from datetime import datetime
+from datetime import datetime, time, timedelta
 import sys
 from io import StringIO
-from PyQt5.QtCore import QTime
 
 
 class TestTaskLog(unittest.TestCase):
     """Test case for TaskLog class
     """
     def setUp(self) -> None:
-        self._task1_time = QTime(9, 0, 0)
+        self._task1_time = time(9, 0, 0)
         self.task1 = TaskLog(1, self._task1_time, 1, "comment1")
-        self.task2 = TaskLog(2, QTime(10, 0, 0), 2, "comment2")
-        self.task3 = TaskLog(3, QTime(11, 0, 0), 1, "comment1")
-        self.task4 = TaskLog(4, QTime(12, 0, 0), 1, "comment1.2")
+        self.task2 = TaskLog(2, time(10, 0, 0), 2, "comment2")
+        self.task3 = TaskLog(3, time(11, 0, 0), 1, "comment1")
+        self.task4 = TaskLog(4, time(12, 0, 0), 1, "comment1.2")
 
-        self.task1.logged_time = 1
-        self.task2.logged_time = 1
-        self.task3.logged_time = 1
-        self.task4.logged_time = 1
+        self.task1.logged_time = timedelta(hours=1)
+        self.task2.logged_time = timedelta(hours=1)
+        self.task3.logged_time = timedelta(hours=1)
+        self.task4.logged_time = timedelta(hours=1)
 
         self.org_stdout, sys.stdout = sys.stdout, StringIO()
 
@@ -61,7 +60,7 @@ class TestTaskLog(unittest.TestCase):
         """Test sho() method
         """
         self.task1.show()
-        actual = f"1 : {self._task1_time.toString('%H:%M:%S')} 1 1 comment1\n"
+        actual = f"1 : {self._task1_time.strftime('%H:%M:%S')} 1:00:00 1 comment1\n"
         self.assertEqual(sys.stdout.getvalue(), actual)
 
     def test_is_end_of_day(self) -> None:
@@ -79,6 +78,6 @@ class TestTaskLog(unittest.TestCase):
     def test_merge(self) -> None:
         """Test merge() method
         """
-        self.assertEqual(1, self.task1.logged_time)
+        self.assertEqual(timedelta(hours=1), self.task1.logged_time)
         self.task1.merge(self.task3)
-        self.assertEqual(2, self.task1.logged_time)
+        self.assertEqual(timedelta(hours=2), self.task1.logged_time)
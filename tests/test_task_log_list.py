@@ -5,14 +5,49 @@
 @date 2021/5/23
 """
 
+import copy
 import datetime
-from src.task_log_list import TaskLogList
+import random
+from timekeeper.task_log_list import TaskLogList
 
 import unittest
-from PyQt5.QtCore import QTime
+from datetime import time
 
-from src.redmine_entry import timedelta_to_hour
-from src.task_log import TaskLog
+from timekeeper.timedelta_to_hour import timedelta_to_hour
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID, TaskLog
+
+
+def legacy_sort(tasks: list) -> list:
+    """Reference implementation of TaskLogList.sort() based on deepcopy and neighbour merging
+
+    Args:
+        tasks (list): List of TaskLog in order of start time
+
+    Returns:
+        list: Merged list of TaskLog in order of ticket id
+    """
+    tasks_sorted = [copy.deepcopy(task) for task in tasks]
+    tasks_sorted.sort()
+
+    n = 0
+    while n < len(tasks_sorted) - 1:
+        n = n + 1
+
+        while n < len(tasks_sorted) - 1:
+            if tasks_sorted[n] == tasks_sorted[n+1]:
+                tasks_sorted[n].merge(tasks_sorted[n+1])
+                del tasks_sorted[n+1]
+            else:
+                break
+
+    n = -1
+    while n < len(tasks_sorted) - 1:
+        n = n + 1
+        if tasks_sorted[n].ticket_number <= 0:
+            del tasks_sorted[n]
+            n -= 1
+
+    return tasks_sorted
 
 
 class TestTaskLogList(unittest.TestCase):
@@ -20,10 +55,10 @@ class TestTaskLogList(unittest.TestCase):
     """
 
     def setUp(self) -> None:
-        self.new_task1 = TaskLog(1, QTime(11, 34, 56), 101, "New task1")
-        self.new_task2 = TaskLog(2, QTime(12, 34, 56), 102, "New task2")
-        self.new_task3 = TaskLog(3, QTime(13, 34, 56), 103, "New task3")
-        self.close_time = QTime(17, 30, 0)
+        self.new_task1 = TaskLog(1, time(11, 34, 56), 101, "New task1")
+        self.new_task2 = TaskLog(2, time(12, 34, 56), 102, "New task2")
+        self.new_task3 = TaskLog(3, time(13, 34, 56), 103, "New task3")
+        self.close_time = time(17, 30, 0)
         return super().setUp()
 
     def tearDown(self) -> None:
@@ -101,6 +136,39 @@ class TestTaskLogList(unittest.TestCase):
         self.assertTrue(taskList.remove_task(1))
         self.assertEqual(1, len(taskList.tasks))
 
+    def test_insert_new_in_order_of_start_time(self) -> None:
+        """Test insert_new() method
+        that the new task is inserted in order of start time
+        """
+        taskList = TaskLogList()
+        self.assertTrue(taskList.append_new(time(9, 0, 0), 101, "First"))
+        self.assertTrue(taskList.append_new(time(11, 0, 0), 103, "Third"))
+        self.assertTrue(taskList.insert_new(time(10, 0, 0), 102, "Second"))
+        self.assertTrue(taskList.insert_new(time(11, 0, 0), 104, "Fourth"))
+
+        self.assertEqual([101, 102, 103, 104], [task.ticket_number for task in taskList.tasks])
+        self.assertEqual(datetime.timedelta(hours=1), taskList.tasks[0].logged_time)
+        self.assertEqual(datetime.timedelta(hours=1), taskList.tasks[1].logged_time)
+        self.assertEqual(datetime.timedelta(0), taskList.tasks[2].logged_time)
+
+    def test_remove_task_keeps_ids(self) -> None:
+        """Test remove_task() method
+        that ids of the other tasks stay valid after removal
+        """
+        taskList = TaskLogList()
+        self.assertTrue(taskList.append_new(time(9, 0, 0), 101, "First"))
+        self.assertTrue(taskList.append_new(time(10, 0, 0), 102, "Second"))
+        self.assertTrue(taskList.append_new(time(11, 0, 0), 103, "Third"))
+
+        self.assertTrue(taskList.remove_task(0))
+        # Removed id is not valid anymore
+        self.assertFalse(taskList.remove_task(0))
+        self.assertIsNone(taskList.get_task(0))
+        # Other ids are still valid
+        self.assertEqual(103, taskList.get_task(2).ticket_number)
+        self.assertTrue(taskList.remove_task(2))
+        self.assertEqual([1], [task.id for task in taskList.tasks])
+
     def test_close_day(self) -> None:
         """Test close_day() method
         """
@@ -176,10 +244,10 @@ class TestTaskLogList(unittest.TestCase):
     def test_sort(self) -> None:
         """Test sort() method
         """
-        new_task1 = TaskLog(1, QTime(11, 34, 56), 101, "New task1")
-        new_task2 = TaskLog(2, QTime(12, 34, 56), 102, "New task2")
-        new_task3 = TaskLog(3, QTime(13, 34, 56), 103, "New task3")
-        new_task4 = TaskLog(4, QTime(14, 34, 56), 101, "New task1")
+        new_task1 = TaskLog(1, time(11, 34, 56), 101, "New task1")
+        new_task2 = TaskLog(2, time(12, 34, 56), 102, "New task2")
+        new_task3 = TaskLog(3, time(13, 34, 56), 103, "New task3")
+        new_task4 = TaskLog(4, time(14, 34, 56), 101, "New task1")
 
         taskList = TaskLogList()
         self.assertTrue(taskList.append_new(
@@ -218,10 +286,10 @@ class TestTaskLogList(unittest.TestCase):
         """Test sort() method
         that it should not change original task list (tasks)
         """
-        new_task1 = TaskLog(1, QTime(11, 34, 56), 101, "New task1")
-        new_task2 = TaskLog(2, QTime(12, 34, 56), 102, "New task2")
-        new_task3 = TaskLog(3, QTime(13, 34, 56), 103, "New task3")
-        new_task4 = TaskLog(4, QTime(14, 34, 56), 101, "New task1")
+        new_task1 = TaskLog(1, time(11, 34, 56), 101, "New task1")
+        new_task2 = TaskLog(2, time(12, 34, 56), 102, "New task2")
+        new_task3 = TaskLog(3, time(13, 34, 56), 103, "New task3")
+        new_task4 = TaskLog(4, time(14, 34, 56), 101, "New task1")
 
         taskList = TaskLogList()
         self.assertTrue(taskList.append_new(
@@ -245,6 +313,64 @@ class TestTaskLogList(unittest.TestCase):
         self.assertEqual(datetime.timedelta(hours=1), taskList.tasks[2].logged_time)
         self.assertEqual(datetime.timedelta(hours=2, minutes=55, seconds=4), taskList.tasks[3].logged_time)
 
+    def test_sort_merges_all_tasks_of_same_ticket_and_comment(self) -> None:
+        """Test sort() method
+        that it merges tasks with the same ticket and comment even if they are not neighbours
+        """
+        taskList = TaskLogList()
+        self.assertTrue(taskList.append_new(time(9, 0, 0), 101, "Design"))
+        self.assertTrue(taskList.append_new(time(10, 0, 0), 101, "Review"))
+        self.assertTrue(taskList.append_new(time(11, 0, 0), 101, "Design"))
+        self.assertTrue(taskList.close_day(time(12, 0, 0)))
+
+        # Number of sorted tasks
+        self.assertEqual(2, len(taskList.tasks_sorted))
+        # Groups are in order of the first task
+        self.assertEqual("Design", taskList.tasks_sorted[0].comment)
+        self.assertEqual("Review", taskList.tasks_sorted[1].comment)
+        # Logged time
+        self.assertEqual(datetime.timedelta(hours=2), taskList.tasks_sorted[0].logged_time)
+        self.assertEqual(datetime.timedelta(hours=1), taskList.tasks_sorted[1].logged_time)
+
+    def test_sort_same_as_legacy_sort_on_long_day(self) -> None:
+        """Test sort() method
+        that it gives the same result as the legacy implementation for thousands of tasks
+        """
+        rand = random.Random(0)
+        tickets = [-1] + list(range(100, 150))
+
+        taskList = TaskLogList()
+        for n in range(5000):
+            ticket = rand.choice(tickets)
+            self.assertTrue(taskList.append_new(
+                n * 15, ticket, f"Comment of {ticket}"
+            ))
+        self.assertTrue(taskList.close_day(time(23, 0, 0)))
+
+        expected = legacy_sort(taskList.tasks)
+        taskList.sort()
+
+        self.assertEqual(len(expected), len(taskList.tasks_sorted))
+        for task_expected, task_actual in zip(expected, taskList.tasks_sorted):
+            self.assertEqual(task_expected.id, task_actual.id)
+            self.assertEqual(task_expected.start_time, task_actual.start_time)
+            self.assertEqual(task_expected.ticket_number, task_actual.ticket_number)
+            self.assertEqual(task_expected.comment, task_actual.comment)
+            self.assertEqual(task_expected.logged_time, task_actual.logged_time)
+
+    def test_sort_should_not_share_tasks(self) -> None:
+        """Test sort() method
+        that merging sorted tasks does not change original task list (tasks)
+        """
+        taskList = TaskLogList()
+        self.assertTrue(taskList.append_new(time(9, 0, 0), 101, "Design"))
+        self.assertTrue(taskList.append_new(time(10, 0, 0), 101, "Design"))
+        self.assertTrue(taskList.close_day(time(11, 0, 0)))
+
+        self.assertEqual(datetime.timedelta(hours=2), taskList.tasks_sorted[0].logged_time)
+        self.assertEqual(datetime.timedelta(hours=1), taskList.tasks[0].logged_time)
+        self.assertEqual(datetime.timedelta(hours=1), taskList.tasks[1].logged_time)
+
     # def test_clear(self) -> None:
 
     # def test_get_tasks_sorted(self) -> None:
@@ -267,13 +393,13 @@ class TestTaskLogList(unittest.TestCase):
         # task1
         expected += "{:10} {:>10} {:>10} {}\n".format(
             self.new_task1.ticket_number,
-            timedelta_to_hour(self.new_task1.logged_time),
+            timedelta_to_hour(datetime.timedelta(hours=1)),
             self.new_task1.activity_id,
             self.new_task1.comment)
-        # task2
+        # task2 is not finished yet
         expected += "{:10} {:>10} {:>10} {}\n".format(
             self.new_task2.ticket_number,
-            timedelta_to_hour(self.new_task2.logged_time),
+            timedelta_to_hour(datetime.timedelta(0)),
             self.new_task2.activity_id,
             self.new_task2.comment)
         # Total time
@@ -298,7 +424,138 @@ class TestTaskLogList(unittest.TestCase):
 
         self.assertEqual(1., taskList.get_total_time())
 
-    # def test_set_tasks(self) -> None:
+    def test_get_total_time_after_changes(self) -> None:
+        """Test get_total_time() method
+        that the total is kept up to date by append, insert, remove and close
+        """
+        rand = random.Random(1)
+        taskList = TaskLogList()
+        for n in range(200):
+            self.assertTrue(taskList.append_new(
+                8 * 3600 + n * 120, rand.choice([-1, 101, 102, 103]), "Comment"
+            ))
+        for n in range(50):
+            self.assertTrue(taskList.insert_new(
+                8 * 3600 + rand.randrange(200 * 120), rand.choice([101, 104]), "Inserted"
+            ))
+        for n in range(50):
+            self.assertTrue(taskList.remove_task(rand.choice(taskList.tasks).id))
+        self.assertTrue(taskList.close_day(time(17, 0, 0)))
+
+        # Logged time of every task from start times
+        group_time = {}
+        for task, task_next in zip(taskList.tasks, taskList.tasks[1:]):
+            if task.ticket_number > 0:
+                key = (task.ticket_number, task.comment)
+                group_time[key] = group_time.get(key, datetime.timedelta(0)) \
+                    + datetime.timedelta(seconds=task_next.start_seconds - task.start_seconds)
+        expected = round(sum(timedelta_to_hour(time) for time in group_time.values()), 2)
+        self.assertEqual(expected, taskList.get_total_time())
+
+        # Same as recalculating from scratch
+        taskList.calculate_logged_time()
+        self.assertEqual(expected, taskList.get_total_time())
+
+    def test_remove_task_updates_logged_time(self) -> None:
+        """Test remove_task() method
+        that the previous task takes over the time of the removed task
+        """
+        taskList = TaskLogList()
+        self.assertTrue(taskList.append_new(time(9, 0, 0), 101, "Design"))
+        self.assertTrue(taskList.append_new(time(10, 0, 0), 102, "Review"))
+        self.assertTrue(taskList.append_new(time(11, 0, 0), 103, "Test"))
+        self.assertEqual(2., taskList.get_total_time())
+
+        self.assertTrue(taskList.remove_task(1))
+        self.assertEqual(datetime.timedelta(hours=2), taskList.tasks[0].logged_time)
+        self.assertEqual(datetime.timedelta(hours=2), taskList.get_ticket_time(101))
+        self.assertEqual(datetime.timedelta(0), taskList.get_ticket_time(102))
+        self.assertEqual(2., taskList.get_total_time())
+
+        # The last task has no end
+        self.assertTrue(taskList.remove_task())
+        self.assertEqual(datetime.timedelta(0), taskList.tasks[0].logged_time)
+        self.assertEqual(0., taskList.get_total_time())
+
+    def test_get_ticket_time(self) -> None:
+        """Test get_ticket_time() method
+        """
+        taskList = TaskLogList()
+        self.assertTrue(taskList.append_new(time(9, 0, 0), 101, "Design"))
+        self.assertTrue(taskList.append_new(time(10, 0, 0), 102, "Review"))
+        self.assertTrue(taskList.append_new(time(10, 30, 0), 101, "Test"))
+        self.assertTrue(taskList.close_day(time(11, 0, 0)))
+
+        self.assertEqual(datetime.timedelta(hours=1, minutes=30), taskList.get_ticket_time(101))
+        self.assertEqual(datetime.timedelta(minutes=30), taskList.get_ticket_time(102))
+        self.assertEqual(datetime.timedelta(0), taskList.get_ticket_time(999))
+
+    def test_set_comment(self) -> None:
+        """Test set_comment() method
+        that the logged time moves to the group of the new comment
+        """
+        taskList = TaskLogList()
+        self.assertTrue(taskList.append_new(time(9, 0, 0), 101, "Design"))
+        self.assertTrue(taskList.append_new(time(10, 0, 0), 101, "Review"))
+        self.assertTrue(taskList.close_day(time(11, 0, 0)))
+        self.assertEqual(2, len(taskList.tasks_sorted))
+
+        self.assertTrue(taskList.set_comment(taskList.tasks[1].id, "Design"))
+        taskList.sort()
+        self.assertEqual(1, len(taskList.tasks_sorted))
+        self.assertEqual("Design", taskList.tasks_sorted[0].comment)
+        self.assertEqual(datetime.timedelta(hours=2), taskList.tasks_sorted[0].logged_time)
+        self.assertEqual(datetime.timedelta(hours=2), taskList.get_ticket_time(101))
+        self.assertEqual(2., taskList.get_total_time())
+
+        # End of day and unknown tasks
+        self.assertFalse(taskList.set_comment(taskList.tasks[2].id, "Overtime"))
+        self.assertFalse(taskList.set_comment(999, "Design"))
+
+        # Tasks of the list are changed only through the list
+        with self.assertRaises(AttributeError):
+            taskList.tasks[0].comment = "Review"
+        self.assertEqual("Design", taskList.tasks[0].comment)
+
+    def test_set_tasks(self) -> None:
+        """Test set_tasks() method
+        with the dictionary from get_task_dict()
+        """
+        taskList = TaskLogList()
+        self.assertTrue(taskList.append_new(time(9, 0, 0), 101, "Design", 2))
+        self.assertTrue(taskList.append_new(time(10, 30, 0), -1, "Lunch"))
+        self.assertTrue(taskList.append_new(time(11, 15, 0), 102, "Review", 3))
+        task_dict = taskList.get_task_dict()
+
+        self.assertEqual("09:00:00", task_dict["task_list"][0]["start_time"])
+        self.assertEqual(2, task_dict["task_list"][0]["activity_id"])
+
+        taskListLoaded = TaskLogList()
+        taskListLoaded.set_tasks(task_dict)
+
+        self.assertEqual(task_dict, taskListLoaded.get_task_dict())
+        self.assertEqual(time(11, 15, 0), taskListLoaded.tasks[2].start_time)
+        self.assertEqual(datetime.timedelta(hours=1, minutes=30), taskListLoaded.tasks[0].logged_time)
+        self.assertEqual(1.5, taskListLoaded.get_total_time())
+
+    def test_set_tasks_version_1(self) -> None:
+        """Test set_tasks() method
+        with a dictionary saved before the activity could be chosen
+        """
+        task_dict = {"date": "2021-06-01", "task_list": [
+            {"start_time": "09:00:00", "ticket_id": 101, "activity_id": 1, "comment": "Design"},
+            {"start_time": "10:00:00", "ticket_id": 102, "activity_id": 2, "comment": "Review"},
+            {"start_time": "11:00:00", "ticket_id": 103, "comment": "Test"},
+        ]}
+
+        taskList = TaskLogList()
+        taskList.set_tasks(task_dict)
+        self.assertEqual([DEFAULT_ACTIVITY_ID, 2, DEFAULT_ACTIVITY_ID], [task.activity_id for task in taskList.tasks])
+
+        # Activity id 1 is chosen on purpose in version 2
+        task_dict["version"] = 2
+        taskList.set_tasks(task_dict)
+        self.assertEqual([1, 2, DEFAULT_ACTIVITY_ID], [task.activity_id for task in taskList.tasks])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_task_log_table.py
+@author Y. Kasuga
+@date 2021/6/5
+"""
+
+from timekeeper.task_log_table import TaskLogTable
+
+import unittest
+
+
+class TestTaskLogTable(unittest.TestCase):
+    """Test case for TaskLogTable class
+    """
+
+    def setUp(self) -> None:
+        self.table = TaskLogTable()
+        self.table.append(0, 9 * 3600, 101, 1, "Design")
+        self.table.append(1, 10 * 3600, 102, 2, "Review")
+        self.table.append(2, 11 * 3600, 101, 1, "Design")
+        return super().setUp()
+
+    def test_insert(self) -> None:
+        """Test insert() method
+        """
+        self.table.insert(1, 3, 9 * 3600 + 1800, 103, 1, "Test", 60)
+
+        self.assertEqual(4, len(self.table))
+        self.assertEqual([0, 3, 1, 2], list(self.table.ids))
+        self.assertEqual(103, self.table.ticket_numbers[1])
+        self.assertEqual(60, self.table.logged_seconds[1])
+        self.assertEqual("Test", self.table.comment(1))
+
+    def test_delete(self) -> None:
+        """Test delete() method
+        """
+        self.table.delete(1)
+
+        self.assertEqual(2, len(self.table))
+        self.assertEqual([0, 2], list(self.table.ids))
+        self.assertEqual([101, 101], list(self.table.ticket_numbers))
+
+    def test_intern_comment(self) -> None:
+        """Test intern_comment() method
+        """
+        # Same comments share an entry of the table
+        self.assertEqual(["Design", "Review"], self.table.comments)
+        self.assertEqual(self.table.comment_indexes[0], self.table.comment_indexes[2])
+        self.assertEqual(2, self.table.intern_comment("Test"))
+        self.assertEqual(0, self.table.intern_comment("Design"))
+
+    def test_clear(self) -> None:
+        """Test clear() method
+        """
+        self.table.clear()
+
+        self.assertEqual(0, len(self.table))
+        self.assertEqual([], self.table.comments)
+
+
+if __name__ == "__main__":
+    unittest.main()
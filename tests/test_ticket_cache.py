@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_ticket_cache.py
+@author Y. Kasuga
+@date 2021/10/2
+"""
+
+from timekeeper.redmine_client import close_all, save_api_key
+from timekeeper.redmine_entry import RedmineEntry
+from timekeeper.ticket_cache import TicketCache, parse_ticket
+from timekeeper.ticket_validator import clear_cache
+from tests.fake_redmine import FakeRedmine
+
+import os
+import tempfile
+import unittest
+
+
+class TestTicketCache(unittest.TestCase):
+    """Test case for TicketCache class
+    """
+
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path_key = os.path.join(self._dir.name, "key.json")
+        self.path_tickets = os.path.join(self._dir.name, "tickets.sqlite3")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        clear_cache()
+        close_all()
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def redmine_entry(self, fake: FakeRedmine) -> RedmineEntry:
+        save_api_key(fake.url, "alice", fake.api_key, self.path_key)
+        return RedmineEntry(fake.url, "alice", api_key_file=self.path_key,
+            activity_file=os.path.join(self._dir.name, "activities.json"))
+
+    def issue_requests(self, fake: FakeRedmine) -> list:
+        return [request for request in fake.requests if request[1] == "/issues.json"]
+
+    def test_parse_ticket(self) -> None:
+        """Test parse_ticket() function
+        """
+        self.assertEqual(101, parse_ticket("101"))
+        self.assertEqual(101, parse_ticket(" #101 Design doc"))
+        self.assertEqual(-1, parse_ticket("-1 Lunch"))
+        with self.assertRaises(ValueError):
+            parse_ticket("Design")
+        with self.assertRaises(ValueError):
+            parse_ticket("")
+
+    def test_fetch(self) -> None:
+        """Test fetch() method that only missing or expired tickets are fetched in one query
+        """
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake).redmine
+            cache = TicketCache(fake.url, self.path_tickets)
+
+            self.assertEqual(2, cache.fetch(redmine, [101, 103, 999, -1, 0]))
+            self.assertEqual(1, len(self.issue_requests(fake)))
+            self.assertEqual(
+                {"id": 103, "subject": "Test", "project": "TimeKeeper", "status": "New", "parent": 101},
+                {key: value for key, value in cache.get(103).items() if key != "fetched"}
+            )
+            self.assertIsNone(cache.get(101)["parent"])
+            self.assertEqual("#101 Design", cache.title(101))
+            self.assertEqual("999", cache.title(999))
+            self.assertEqual("", cache.subject(-1))
+
+            # Fresh tickets are not fetched again
+            self.assertEqual(1, cache.fetch(redmine, [101, 102, 103]))
+            self.assertEqual(2, len(self.issue_requests(fake)))
+            self.assertEqual(0, cache.fetch(redmine, [101, 102, 103]))
+            self.assertEqual(2, len(self.issue_requests(fake)))
+
+            # Expired tickets are fetched again
+            fake.issues[101] = "Design doc"
+            cache.ttl = 0
+            self.assertEqual(1, cache.fetch(redmine, [101]))
+            self.assertEqual("Design doc", cache.subject(101))
+            cache.close()
+
+    def test_persistent(self) -> None:
+        """Test that tickets are kept in the database beyond the memory
+        """
+        cache = TicketCache("http://redmine", self.path_tickets, capacity=2)
+        cache.put([{"id": n, "subject": f"Ticket {n}"} for n in range(1, 6)])
+        self.assertEqual([4, 5], list(cache._memory))
+
+        # Looked up from the database and kept as the most recently used
+        self.assertEqual("Ticket 1", cache.subject(1))
+        self.assertEqual([5, 1], list(cache._memory))
+        self.assertEqual("Ticket 5", cache.subject(5))
+        self.assertEqual([1, 5], list(cache._memory))
+
+        cache.touch([3])
+        cache.touch([2])
+        self.assertEqual([2, 3, 1], [ticket["id"] for ticket in cache.recent(3)])
+        cache.close()
+
+        cache = TicketCache("http://redmine/", self.path_tickets)
+        self.assertEqual("Ticket 4", cache.subject(4))
+        self.assertEqual("", TicketCache("http://other", self.path_tickets).subject(4))
+        cache.close()
+
+    def test_find_invalid_tickets(self) -> None:
+        """Test that tickets checked before submitting are cached
+        """
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake)
+            cache = TicketCache(fake.url, path_file="")
+
+            self.assertEqual([999], redmine.findInvalidTickets([101, 102, 999], cache))
+            self.assertEqual("Review", cache.subject(102))
+            self.assertEqual(0, cache.fetch(redmine.redmine, [101, 102]))
+            self.assertEqual(1, len(self.issue_requests(fake)))
+            cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
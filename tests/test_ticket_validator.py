@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_ticket_validator.py
+@author Y. Kasuga
+@date 2021/9/18
+"""
+
+from timekeeper.redmine_client import close_all, save_api_key
+from timekeeper.redmine_entry import RedmineEntry
+from timekeeper.ticket_validator import clear_cache, fetch_issues, find_invalid_tickets
+from tests.fake_redmine import FakeRedmine
+
+import os
+import tempfile
+import unittest
+
+
+class TestTicketValidator(unittest.TestCase):
+    """Test case for ticket_validator
+    """
+
+    def setUp(self) -> None:
+        self._dir = tempfile.TemporaryDirectory()
+        self.path_key = os.path.join(self._dir.name, "key.json")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        clear_cache()
+        close_all()
+        self._dir.cleanup()
+        return super().tearDown()
+
+    def redmine_entry(self, fake: FakeRedmine) -> RedmineEntry:
+        save_api_key(fake.url, "alice", fake.api_key, self.path_key)
+        return RedmineEntry(fake.url, "alice", api_key_file=self.path_key)
+
+    def issue_requests(self, fake: FakeRedmine) -> list:
+        return [request for request in fake.requests if request[1] == "/issues.json"]
+
+    def test_find_invalid_tickets(self) -> None:
+        """Test findInvalidTickets() method that tickets are checked in one query and the valid ones cached
+        """
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake)
+
+            self.assertEqual([999], redmine.findInvalidTickets([101, 102, 999, 101, -1]))
+            requests = self.issue_requests(fake)
+            self.assertEqual(1, len(requests))
+            self.assertEqual("101,102,999", requests[0][2]["issue_id"])
+            self.assertEqual("*", requests[0][2]["status_id"])
+
+            # Only the new tickets and the invalid one are asked
+            self.assertEqual([888, 999], redmine.findInvalidTickets([101, 999, 103, 888]))
+            self.assertEqual(2, len(self.issue_requests(fake)))
+            self.assertEqual("103,888,999", self.issue_requests(fake)[1][2]["issue_id"])
+
+            # Nothing is asked
+            self.assertEqual([], redmine.findInvalidTickets([101, 103, 0]))
+            self.assertEqual(2, len(self.issue_requests(fake)))
+
+            # Found once the issue is created
+            fake.issues[999] = "New"
+            self.assertEqual([], redmine.findInvalidTickets([999]))
+            self.assertEqual(3, len(self.issue_requests(fake)))
+
+            # Asked again for another user
+            self.assertEqual([], find_invalid_tickets(redmine.redmine, [101], username="bob"))
+            self.assertEqual(4, len(self.issue_requests(fake)))
+            self.assertEqual("101", self.issue_requests(fake)[3][2]["issue_id"])
+
+    def test_fetch_issues(self) -> None:
+        """Test fetch_issues() function
+        """
+        with FakeRedmine() as fake:
+            redmine = self.redmine_entry(fake).redmine
+            self.assertEqual([], fetch_issues(redmine, []))
+            self.assertEqual([], self.issue_requests(fake))
+
+            issues = fetch_issues(redmine, [103, 101])
+            self.assertEqual([101, 103], [issue["id"] for issue in issues])
+            self.assertEqual("Design", issues[0]["subject"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+@file test_time_of_day.py
+@author Y. Kasuga
+@date 2021/6/5
+"""
+
+from timekeeper.time_of_day import time_to_seconds, seconds_to_time, seconds_to_str, str_to_seconds
+
+import unittest
+from datetime import datetime, time
+
+
+class TestTimeOfDay(unittest.TestCase):
+    """Test class for time_of_day
+    """
+
+    def test_time_to_seconds(self):
+        """Test time_to_seconds() method
+        """
+        self.assertEqual(34200, time_to_seconds(time(9, 30, 0)))
+        self.assertEqual(34201, time_to_seconds(datetime(2021, 6, 1, 9, 30, 1)))
+        self.assertEqual(100, time_to_seconds(100))
+
+    def test_seconds_to_time(self):
+        """Test seconds_to_time() method
+        """
+        self.assertEqual(time(9, 30, 1), seconds_to_time(34201))
+
+    def test_seconds_to_str(self):
+        """Test seconds_to_str() method
+        """
+        self.assertEqual("09:30:01", seconds_to_str(34201))
+
+    def test_str_to_seconds(self):
+        """Test str_to_seconds() method
+        """
+        self.assertEqual(34201, str_to_seconds("09:30:01"))
+        self.assertEqual(34200, str_to_seconds("9:30"))
+
+
+if __name__ == "__main__":
+    unittest.main()
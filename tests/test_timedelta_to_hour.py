@@ -5,7 +5,7 @@
 @date 2021/5/23
 """
 
-from src.timedelta_to_hour import timedelta_to_hour
+from timekeeper.timedelta_to_hour import timedelta_to_hour
 
 import unittest
 import datetime
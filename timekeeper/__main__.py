@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+@file __main__.py
+@author Y. Kasuga
+@date 2021/6/6
+@brief Entry point of TimeKeeper without GUI.
+"""
+
+import sys
+
+from timekeeper.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+@file activity_catalogue.py
+@author Y. Kasuga
+@date 2021/9/25
+@brief Time entry activities of a Redmine server, cached on the disk.
+"""
+
+import threading
+import time
+from typing import List, Union
+
+from timekeeper.json_file import JsonFile, write_atomic
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID
+
+
+# Default file of the cached activities
+ACTIVITY_FILE = "TimeKeeperActivities.json"
+
+# Seconds until the cached activities are fetched again
+ACTIVITY_TTL = 24 * 3600
+
+
+class ActivityCatalogue(object):
+    """
+    @class ActivityCatalogue
+    @brief Activities of time entries of a server, fetched once and cached in a file with a TTL.
+    @detail The file keeps the activities of every server, keyed by the URL.
+            Activities can be looked up by id or by name without a request.
+    """
+    def __init__(self, url: str, path_file: str=ACTIVITY_FILE, ttl: float=ACTIVITY_TTL) -> None:
+        """
+        @fn __init__
+        @brief Constructor of ActivityCatalogue class. Nothing is loaded until load().
+        @param url URL of the Redmine's root page.
+        @param path_file Path to the cache file. Empty not to cache on the disk.
+        @param ttl Seconds until the cached activities expire.
+        """
+        self.url = url.rstrip("/")
+        self.path_file = path_file
+        self.ttl = ttl
+
+        # {"id", "name", "is_default"} of each active activity
+        self.activities: List[dict] = []
+        self.fetched = 0.0
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        """
+        @fn is_fresh
+        @brief Whether the activities are fetched within the TTL.
+        @return True if fresh.
+        """
+        return bool(self.activities) and time.time() - self.fetched < self.ttl
+
+    def load(self, redmine=None) -> bool:
+        """
+        @fn load
+        @brief Load the activities from the cache file, and fetch them if the cache has expired.
+        @detail If they cannot be fetched, the expired cache is used.
+        @param redmine redminelib.Redmine to fetch the activities. None to read only the cache file.
+        @return Any activity is loaded or not.
+        """
+        with self._lock:
+            if self.is_fresh():
+                return True
+
+            cache = self._read_file().get(self.url)
+            if cache:
+                self.activities = cache["activities"]
+                self.fetched = cache["fetched"]
+            if self.is_fresh() or redmine is None:
+                return bool(self.activities)
+
+            try:
+                self._fetch(redmine)
+            except Exception as e:
+                print(f"Cannot fetch activities: {e or type(e).__name__}")
+            return bool(self.activities)
+
+    def refresh(self, redmine) -> None:
+        """
+        @fn refresh
+        @brief Fetch the activities now and cache them.
+        @param redmine redminelib.Redmine
+        @exception Exception of redminelib or requests if the server cannot be asked.
+        """
+        with self._lock:
+            self._fetch(redmine)
+
+    def names(self) -> List[str]:
+        """
+        @fn names
+        @brief Get the names of the activities.
+        @return Names in order of the server.
+        """
+        return [activity["name"] for activity in self.activities]
+
+    def name(self, activity_id: int) -> str:
+        """
+        @fn name
+        @brief Get the name of an activity.
+        @param activity_id Activity id.
+        @return Name, or the id in string if unknown.
+        """
+        for activity in self.activities:
+            if activity["id"] == activity_id:
+                return activity["name"]
+        return str(activity_id)
+
+    def default_id(self) -> int:
+        """
+        @fn default_id
+        @brief Get the id of the default activity of the server.
+        @return Activity id or DEFAULT_ACTIVITY_ID if the server has no default activity.
+        """
+        for activity in self.activities:
+            if activity.get("is_default"):
+                return activity["id"]
+        return DEFAULT_ACTIVITY_ID
+
+    def resolve(self, activity: Union[int, str]) -> int:
+        """
+        @fn resolve
+        @brief Get the id of an activity given by id or name.
+        @detail Ids are passed as they are. Names are compared case-insensitively.
+                DEFAULT_ACTIVITY_ID, None and "" resolve to the default activity.
+        @param activity Activity id or name.
+        @return Activity id, DEFAULT_ACTIVITY_ID to leave it to the server, or None if the name is unknown.
+        """
+        if activity is None or activity == "" or activity == DEFAULT_ACTIVITY_ID:
+            return self.default_id()
+        if isinstance(activity, int):
+            return activity
+        if activity.strip().isdigit():
+            return self.resolve(int(activity))
+
+        name = activity.strip().casefold()
+        for candidate in self.activities:
+            if candidate["name"].casefold() == name:
+                return candidate["id"]
+        return None
+
+    def _fetch(self, redmine) -> None:
+        """
+        @fn _fetch
+        @brief Fetch the activities and write them to the cache file.
+        @param redmine redminelib.Redmine
+        """
+        response = redmine.engine.request("get", f"{redmine.url}/enumerations/time_entry_activities.json")
+        self.activities = [
+            {"id": activity["id"], "name": activity["name"], "is_default": activity.get("is_default", False)}
+            for activity in response["time_entry_activities"] if activity.get("active", True)
+        ]
+        self.fetched = time.time()
+
+        if self.path_file:
+            cache = self._read_file()
+            cache[self.url] = {"fetched": self.fetched, "activities": self.activities}
+            write_atomic(self.path_file, cache)
+
+    def _read_file(self) -> dict:
+        """
+        @fn _read_file
+        @brief Read the cache file.
+        @return Cache of every server. Empty if the file cannot be read.
+        """
+        if not self.path_file:
+            return {}
+
+        jsonFile = JsonFile()
+        if not jsonFile.open(self.path_file, "r"):
+            return {}
+        try:
+            return jsonFile.read()
+        except ValueError:
+            return {}
+        finally:
+            del jsonFile
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+@file binary_file.py
+@author Y. Kasuga
+@date 2021/7/17
+@brief Compact binary format of the tasks of many days.
+"""
+
+import struct
+from datetime import date
+from typing import Iterable, List
+
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID, TASK_DICT_VERSION, saved_activity_id
+from timekeeper.task_log_list import TaskLogList
+from timekeeper.time_of_day import seconds_to_str, str_to_seconds
+
+
+MAGIC = b"TKPB"
+# 1: string table of lengths, 2: string table of end offsets for random access,
+# 3: activity id 0 for the default activity instead of 1 (see TASK_DICT_VERSION)
+VERSION = 3
+
+# Magic, version, reserved, number of days, number of tasks, number of strings
+HEADER = struct.Struct("<4sHHIII")
+# Ordinal of the date, index of the first task, number of tasks
+DAY = struct.Struct("<III")
+# Start seconds, ticket id, activity id, index of the comment in the string table
+TASK = struct.Struct("<IiiI")
+# End offset of a string in the string data, or length in version 1
+OFFSET = struct.Struct("<I")
+
+
+def dump_days(task_dicts: Iterable[dict]) -> bytes:
+    """
+    @fn dump_days
+    @brief Convert days to the binary format.
+    @detail The file is a header, a record per day, a record per task and a table of comments
+            in which each distinct comment is stored once.
+            The table is the end offset of each comment followed by the comments in UTF-8.
+    @param task_dicts Dictionaries of the task list from TaskLogList.get_task_dict().
+    @return Content of the binary file.
+    """
+    days = []
+    tasks = []
+    strings = []
+    string_indexes = {}
+
+    for task_dict in task_dicts:
+        day = date.fromisoformat(task_dict["date"])
+        version = task_dict.get("version", 1)
+        first = len(tasks)
+        for task in task_dict["task_list"]:
+            comment = str(task["comment"])
+            index = string_indexes.get(comment)
+            if index is None:
+                index = string_indexes[comment] = len(strings)
+                strings.append(comment.encode("utf-8"))
+            tasks.append(TASK.pack(
+                str_to_seconds(task["start_time"]),
+                int(task["ticket_id"]),
+                saved_activity_id(int(task.get("activity_id", DEFAULT_ACTIVITY_ID)), version),
+                index
+            ))
+        days.append(DAY.pack(day.toordinal(), first, len(tasks) - first))
+
+    offsets = []
+    offset = 0
+    for string in strings:
+        offset += len(string)
+        offsets.append(OFFSET.pack(offset))
+
+    return b"".join([
+        HEADER.pack(MAGIC, VERSION, 0, len(days), len(tasks), len(strings)),
+        *days,
+        *tasks,
+        *offsets,
+        *strings,
+    ])
+
+
+def unpack_header(buffer) -> tuple:
+    """
+    @fn unpack_header
+    @brief Unpack and check the header of the binary format.
+    @param buffer Content of the binary file. Any object supporting the buffer protocol, e.g. mmap.
+    @return Version, number of days, number of tasks and number of strings.
+    """
+    if len(buffer) < HEADER.size:
+        raise ValueError("Not a TimeKeeper binary file")
+    magic, version, _, num_days, num_tasks, num_strings = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a TimeKeeper binary file")
+    if version not in (1, 2, VERSION):
+        raise ValueError(f"Unsupported version of TimeKeeper binary file: {version}")
+
+    return version, num_days, num_tasks, num_strings
+
+
+def _unpack(buffer: bytes) -> tuple:
+    """
+    @fn _unpack
+    @brief Unpack the records of the binary format.
+    @param buffer Content of the binary file.
+    @return Days as (ordinal, first, count), tasks as (seconds, ticket, activity, comment index)
+            and the comments. Activity ids of versions before 3 are converted.
+    """
+    version, num_days, num_tasks, num_strings = unpack_header(buffer)
+
+    offset = HEADER.size
+    end = offset + num_days * DAY.size
+    days = list(DAY.iter_unpack(buffer[offset:end]))
+
+    offset, end = end, end + num_tasks * TASK.size
+    tasks = list(TASK.iter_unpack(buffer[offset:end]))
+    if version < 3:
+        tasks = [
+            (start_seconds, ticket_id, saved_activity_id(activity_id, 1), comment_index)
+            for start_seconds, ticket_id, activity_id, comment_index in tasks
+        ]
+
+    offset, end = end, end + num_strings * OFFSET.size
+    comments = []
+    data = end
+    for (value,) in OFFSET.iter_unpack(buffer[offset:end]):
+        start = end
+        end = end + value if version == 1 else data + value
+        comments.append(bytes(buffer[start:end]).decode("utf-8"))
+
+    if len(days) != num_days or len(tasks) != num_tasks or end > len(buffer):
+        raise ValueError("Truncated TimeKeeper binary file")
+
+    return days, tasks, comments
+
+
+def load_days(buffer: bytes) -> List[dict]:
+    """
+    @fn load_days
+    @brief Convert the binary format to days.
+    @param buffer Content of the binary file.
+    @return Dictionaries of the task list in the format of TaskLogList.get_task_dict().
+    """
+    days, tasks, comments = _unpack(buffer)
+
+    return [
+        {
+            "date": date.fromordinal(ordinal).isoformat(),
+            "task_list": [
+                {
+                    "start_time": seconds_to_str(start_seconds),
+                    "ticket_id": ticket_id,
+                    "activity_id": activity_id,
+                    "comment": comments[comment_index],
+                }
+                for start_seconds, ticket_id, activity_id, comment_index in tasks[first:first + count]
+            ],
+            "version": TASK_DICT_VERSION
+        }
+        for ordinal, first, count in days
+    ]
+
+
+def load_task_log_lists(buffer: bytes) -> List[TaskLogList]:
+    """
+    @fn load_task_log_lists
+    @brief Load the binary format into task lists without formatting and parsing times.
+    @param buffer Content of the binary file.
+    @return Task list of each day.
+    """
+    days, tasks, comments = _unpack(buffer)
+
+    task_log_lists = []
+    for ordinal, first, count in days:
+        task_log_list = TaskLogList()
+        task_log_list.date = date.fromordinal(ordinal)
+        for start_seconds, ticket_id, activity_id, comment_index in tasks[first:first + count]:
+            task_log_list.append_new(start_seconds, ticket_id, comments[comment_index], activity_id)
+        task_log_lists.append(task_log_list)
+
+    return task_log_lists
+
+
+def write_binary(path_file: str, task_dicts: Iterable[dict]) -> None:
+    """
+    @fn write_binary
+    @brief Write days to a binary file.
+    @param path_file Path to the binary file.
+    @param task_dicts Dictionaries of the task list from TaskLogList.get_task_dict().
+    """
+    with open(path_file, "wb") as f:
+        f.write(dump_days(task_dicts))
+
+
+def read_binary(path_file: str) -> List[dict]:
+    """
+    @fn read_binary
+    @brief Read days from a binary file.
+    @param path_file Path to the binary file.
+    @return Dictionaries of the task list in the format of TaskLogList.get_task_dict().
+    """
+    with open(path_file, "rb") as f:
+        return load_days(f.read())
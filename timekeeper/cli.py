@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+"""
+@file cli.py
+@author Y. Kasuga
+@date 2021/6/6
+@brief Command line interface of TimeKeeper.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import List
+
+from timekeeper.json_file import JsonFile
+from timekeeper.option_struct import OptionStruct, read_option_file
+from timekeeper.task_log_list import TaskLogList
+from timekeeper.time_of_day import str_to_seconds
+
+
+def load_task_log_list(path_file: str, close_time: str="") -> TaskLogList:
+    """
+    @fn load_task_log_list
+    @brief Load tasks from a save file.
+    @param path_file Path to the save file written by TaskListWidget.save.
+    @param close_time Time to close the day in "HH:mm" if it is not closed yet.
+    @return Tasks of the day or None if the file cannot be opened or read.
+    """
+    jsonFile = JsonFile()
+    if not jsonFile.open(path_file, "r"):
+        return None
+    task_log_list = TaskLogList()
+    try:
+        task_log_list.set_tasks(jsonFile.read())
+    except (ValueError, KeyError, TypeError):
+        return None
+    finally:
+        del jsonFile
+
+    if close_time:
+        task_log_list.close_day(str_to_seconds(close_time))
+    task_log_list.sort()
+
+    return task_log_list
+
+
+def summary(args: argparse.Namespace) -> int:
+    """
+    @fn summary
+    @brief Print tasks of each save file sorted in order of ticket id.
+    @param args Parsed arguments.
+    @return Exit status.
+    """
+    status = 0
+
+    for path_file in args.files:
+        task_log_list = load_task_log_list(path_file, args.close)
+        if task_log_list is None:
+            print(f"Cannot read: {path_file}", file=sys.stderr)
+            status = 1
+            continue
+
+        print(f"{path_file} ({task_log_list.date})")
+        print(task_log_list.get_str_tasks_sorted())
+        print("")
+
+    return status
+
+
+def submit(args: argparse.Namespace) -> int:
+    """
+    @fn submit
+    @brief Submit tasks of each save file to Redmine.
+    @param args Parsed arguments.
+    @return Exit status.
+    """
+    # Deferred not to load redminelib for summary
+    from timekeeper.ledger import SubmissionLedger
+    from timekeeper.outbox import Outbox
+    from timekeeper.redmine_entry import RedmineEntry
+    from timekeeper.ticket_cache import TicketCache
+
+    optionStruct = read_option_file(args.option) or OptionStruct()
+    redmine_server = args.server or optionStruct.redmine_server
+    username = args.username or optionStruct.username
+    password = args.password or optionStruct.password
+
+    if not redmine_server:
+        print("Redmine server is not specified", file=sys.stderr)
+        return 1
+
+    max_workers = args.jobs or optionStruct.max_workers
+    redmine = RedmineEntry(redmine_server, username=username, password=password, pool_size=max_workers,
+        api_key_file=args.key_file, ledger=SubmissionLedger(args.ledger) if args.ledger else None,
+        activity_file=args.activity_file)
+    outbox = Outbox(args.outbox) if args.outbox else None
+    ticket_cache = TicketCache(redmine_server, args.ticket_file) if args.ticket_file else None
+    ticket_title = ticket_cache.title if ticket_cache is not None else None
+    status = 0
+
+    for path_file in args.files:
+        task_log_list = load_task_log_list(path_file, args.close)
+        if task_log_list is None:
+            print(f"Cannot read: {path_file}", file=sys.stderr)
+            status = 1
+            continue
+
+        # Nothing of the day is sent if some tickets are not on Redmine
+        ticket_numbers = [task.ticket_number for task in task_log_list.get_tasks_sorted()]
+        try:
+            invalid_tickets = redmine.findInvalidTickets(ticket_numbers, ticket_cache)
+        except Exception as e:
+            print(f"Cannot check tickets: {e or type(e).__name__}", file=sys.stderr)
+            invalid_tickets = []
+
+        print(f"{path_file} ({task_log_list.date})")
+        print(task_log_list.get_str_tasks_sorted(ticket_title=ticket_title))
+        if invalid_tickets:
+            print("Tickets not found on Redmine: " + " ".join(f"#{ticket}" for ticket in invalid_tickets),
+                file=sys.stderr)
+            status = 1
+            print("")
+            continue
+
+        results = redmine.submitTimeEntries(
+            task_log_list.date or date.today(), task_log_list.get_tasks_sorted(), max_workers,
+            outbox=outbox, reconcile=args.reconcile
+        )
+        if ticket_cache is not None:
+            ticket_cache.touch(ticket_numbers)
+        for result in results:
+            if result:
+                state = "Skipped" if result.skipped else "Updated" if result.updated else "Submitted"
+                print(f"{state}: #{result.ticket_number} {result.hours} {result.comment}")
+            elif result.queued:
+                print(f"Queued: #{result.ticket_number} {result.hours} {result.comment}: {result.error}",
+                    file=sys.stderr)
+            else:
+                print(f"Failed: #{result.ticket_number} {result.hours} {result.comment}: {result.error}",
+                    file=sys.stderr)
+                status = 1
+        print("")
+
+    if ticket_cache is not None:
+        ticket_cache.close()
+    return status
+
+
+def replay(args: argparse.Namespace) -> int:
+    """
+    @fn replay
+    @brief Submit the entries of the outbox now, until the server turns out to be unavailable.
+    @param args Parsed arguments.
+    @return Exit status. 1 if any entry is rejected or left in the outbox.
+    """
+    # Deferred not to load redminelib for summary
+    from timekeeper.ledger import SubmissionLedger
+    from timekeeper.outbox import Outbox, OutboxReplayer
+    from timekeeper.redmine_entry import RedmineEntry
+
+    optionStruct = read_option_file(args.option) or OptionStruct()
+    redmine_server = args.server or optionStruct.redmine_server
+    username = args.username or optionStruct.username
+    password = args.password or optionStruct.password
+
+    if not redmine_server:
+        print("Redmine server is not specified", file=sys.stderr)
+        return 1
+
+    redmine = RedmineEntry(redmine_server, username=username, password=password, api_key_file=args.key_file,
+        ledger=SubmissionLedger(args.ledger) if args.ledger else None, activity_file=args.activity_file)
+    outbox = Outbox(args.outbox)
+    status = 0
+
+    for result in OutboxReplayer(outbox, redmine.submitTimeEntry).drain(force=True):
+        if result:
+            state = "Skipped" if result.skipped else "Submitted"
+            print(f"{state}: #{result.ticket_number} {result.hours} {result.comment}")
+        else:
+            print(f"Failed: #{result.ticket_number} {result.hours} {result.comment}: {result.error}",
+                file=sys.stderr)
+            status = 1
+
+    if len(outbox):
+        print(f"{len(outbox)} entries left in {args.outbox}", file=sys.stderr)
+        status = 1
+
+    return status
+
+
+def login(args: argparse.Namespace) -> int:
+    """
+    @fn login
+    @brief Fetch the API key of the user with the password and cache it,
+           so that the password doesn't have to be kept in the option file.
+    @param args Parsed arguments.
+    @return Exit status.
+    """
+    # Deferred not to load redminelib for summary
+    from timekeeper.redmine_client import fetch_api_key, save_api_key
+
+    optionStruct = read_option_file(args.option) or OptionStruct()
+    redmine_server = args.server or optionStruct.redmine_server
+    username = args.username or optionStruct.username
+    password = args.password or optionStruct.password
+
+    if not redmine_server:
+        print("Redmine server is not specified", file=sys.stderr)
+        return 1
+    if not password:
+        import getpass
+        password = getpass.getpass(f"Password of {username}: ")
+
+    try:
+        key = fetch_api_key(redmine_server, username, password)
+    except Exception as e:
+        print(f"Cannot get API key: {e or type(e).__name__}", file=sys.stderr)
+        return 1
+
+    save_api_key(redmine_server, username, key, args.key_file)
+    print(f"API key of {username} is saved to {args.key_file}")
+    return 0
+
+
+def report(args: argparse.Namespace) -> int:
+    """
+    @fn report
+    @brief Print logged time summed by date, user, ticket and activity over save files.
+    @param args Parsed arguments.
+    @return Exit status.
+    """
+    # Deferred not to load multiprocessing for the other commands
+    from timekeeper.report import aggregate_files, find_save_files, format_report, merge_totals
+    from timekeeper.rollup_cache import RollupCache
+    from timekeeper.ticket_cache import TicketCache
+
+    start = time.perf_counter()
+    if args.cache:
+        # Directories are summed up through their caches
+        totals = {}
+        num_files = 0
+        errors = []
+        for directory in [path for path in args.paths if os.path.isdir(path)]:
+            cache = RollupCache(directory)
+            num_read, cache_errors = cache.update()
+            cache.save()
+            merge_totals(totals, cache.day_totals())
+            num_files += num_read
+            errors += cache_errors
+
+        paths = find_save_files([path for path in args.paths if not os.path.isdir(path)])
+        file_totals, num_aggregated, file_errors = aggregate_files(paths, args.processes)
+        merge_totals(totals, file_totals)
+        num_files += num_aggregated
+        errors += file_errors
+    else:
+        paths = find_save_files(args.paths)
+        totals, num_files, errors = aggregate_files(paths, args.processes)
+    elapsed = time.perf_counter() - start
+
+    if args.server and args.ticket_file:
+        # Subjects are read from the cache only, without a request
+        ticket_cache = TicketCache(args.server, args.ticket_file)
+        print(format_report(totals, ticket_cache.subject))
+        ticket_cache.close()
+    else:
+        print(format_report(totals))
+    for path_file in errors:
+        print(f"Cannot read: {path_file}", file=sys.stderr)
+    print(f"{num_files} files in {elapsed:.2f} s ({num_files / max(elapsed, 1e-9):.0f} files/s)",
+        file=sys.stderr)
+
+    return 1 if errors else 0
+
+
+def rollup(args: argparse.Namespace) -> int:
+    """
+    @fn rollup
+    @brief Print a table of hours by period and ticket or activity over save files.
+    @param args Parsed arguments.
+    @return Exit status.
+    """
+    # Deferred not to load numpy for the other commands
+    from timekeeper.report import find_save_files
+    from timekeeper.rollup import load_files, pivot, format_pivot
+
+    columns, errors = load_files(find_save_files(args.paths))
+    print(format_pivot(*pivot(columns, args.period, args.by)))
+    for path_file in errors:
+        print(f"Cannot read: {path_file}", file=sys.stderr)
+
+    return 1 if errors else 0
+
+
+def export(args: argparse.Namespace) -> int:
+    """
+    @fn export
+    @brief Write save files to a JSON Lines file with a day per line, or to a binary file "*.tkb".
+    @detail Save files are read one at a time, so a JSON Lines export is never held in memory.
+    @param args Parsed arguments.
+    @return Exit status.
+    """
+    from timekeeper.report import find_save_files
+
+    errors = []
+
+    def read_files():
+        for path_file in find_save_files(args.paths):
+            jsonFile = JsonFile()
+            if not jsonFile.open(path_file, "r"):
+                errors.append(path_file)
+                continue
+            try:
+                yield jsonFile.read()
+            except ValueError:
+                errors.append(path_file)
+            finally:
+                del jsonFile
+
+    if args.output.endswith(".tkb"):
+        from timekeeper.binary_file import write_binary
+        write_binary(args.output, read_files())
+    else:
+        jsonFile = JsonFile()
+        jsonFile.open(args.output, "w")
+        jsonFile.write_lines(read_files())
+        del jsonFile
+
+    for path_file in errors:
+        print(f"Cannot read: {path_file}", file=sys.stderr)
+
+    return 1 if errors else 0
+
+
+def archive(args: argparse.Namespace) -> int:
+    """
+    @fn archive
+    @brief Write the days of a history folder to its memory-mapped archive.
+    @param args Parsed arguments.
+    @return Exit status.
+    """
+    from timekeeper.history_store import HistoryStore
+
+    store = HistoryStore(args.history_folder)
+    num_days = store.archive()
+    store.close()
+    print(f"{num_days} days archived to {store.path_archive}")
+
+    return 0
+
+
+def import_files(args: argparse.Namespace) -> int:
+    """
+    @fn import_files
+    @brief Import save files into a SQLite history database.
+    @param args Parsed arguments.
+    @return Exit status.
+    """
+    from timekeeper.report import find_save_files
+    from timekeeper.sqlite_history import SqliteHistory
+
+    history = SqliteHistory(args.database)
+    num_days, errors = history.import_files(find_save_files(args.paths), args.batch)
+    history.close()
+
+    print(f"{num_days} days imported to {args.database}")
+    for path_file in errors:
+        print(f"Cannot read: {path_file}", file=sys.stderr)
+
+    return 1 if errors else 0
+
+
+def hours(args: argparse.Namespace) -> int:
+    """
+    @fn hours
+    @brief Print hours by ticket or activity between two dates from a SQLite history database.
+    @param args Parsed arguments.
+    @return Exit status.
+    """
+    from timekeeper.sqlite_history import SqliteHistory
+    from timekeeper.timedelta_to_hour import timedelta_to_hour
+
+    history = SqliteHistory(args.database)
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end)
+    if args.ticket is not None:
+        totals = {args.ticket: history.ticket_seconds(args.ticket, start, end)}
+    else:
+        totals = history.totals(start, end, args.by)
+    history.close()
+
+    for key, seconds in totals.items():
+        print("{:>10} {:>10}".format(key, timedelta_to_hour(timedelta(seconds=seconds))))
+
+    return 0
+
+
+def main(argv: List[str]=None) -> int:
+    """
+    @fn main
+    @brief Entry point of the command line interface.
+    @param argv Arguments without the program name. None for sys.argv.
+    @return Exit status.
+    """
+    parser = argparse.ArgumentParser(
+        prog="timekeeper",
+        description="Summarise and submit save files of TimeKeeper without GUI."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_summary = subparsers.add_parser("summary", help="print tasks sorted in order of ticket id")
+    parser_summary.set_defaults(func=summary)
+
+    parser_submit = subparsers.add_parser("submit", help="submit tasks to Redmine")
+    parser_submit.set_defaults(func=submit)
+    parser_submit.add_argument("--jobs", type=int, default=None,
+        help="number of entries submitted at the same time. Overrides the option file.")
+    parser_submit.add_argument("--no-reconcile", dest="reconcile", action="store_false",
+        help="create every entry without checking the entries already logged on Redmine")
+
+    parser_replay = subparsers.add_parser("replay",
+        help="submit the entries left in the outbox while Redmine was unavailable")
+    parser_replay.set_defaults(func=replay)
+
+    for subparser in (parser_submit, parser_replay):
+        subparser.add_argument("--outbox", default="TimeKeeperOutbox.jsonl",
+            help="file of the entries to submit later. Empty not to keep them. (default: %(default)s)")
+        subparser.add_argument("--ledger", default="TimeKeeperLedger.jsonl",
+            help="file of the submitted entries, not to submit them twice. Empty not to check."
+            " (default: %(default)s)")
+        subparser.add_argument("--activity-file", default="TimeKeeperActivities.json",
+            help="file of the cached activities of Redmine (default: %(default)s)")
+
+    parser_login = subparsers.add_parser("login",
+        help="fetch the API key of Redmine with the password and cache it")
+    parser_login.set_defaults(func=login)
+
+    for subparser in (parser_submit, parser_replay, parser_login):
+        subparser.add_argument("--option", default="TimeKeeperOption.txt",
+            help="option file of TimeKeeper (default: %(default)s)")
+        subparser.add_argument("--server", help="URL of Redmine. Overrides the option file.")
+        subparser.add_argument("--username", help="username of Redmine. Overrides the option file.")
+        subparser.add_argument("--password",
+            help="password of Redmine. Overrides the option file. Not needed once the API key is cached.")
+        subparser.add_argument("--key-file", default="TimeKeeperApiKey.json",
+            help="file of the cached API keys (default: %(default)s)")
+
+    parser_report = subparsers.add_parser("report",
+        help="sum up logged time by date, user, ticket and activity")
+    parser_report.set_defaults(func=report)
+    parser_report.add_argument("paths", nargs="+", help="save files or directories of save files")
+    parser_report.add_argument("--processes", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)")
+    parser_report.add_argument("--cache", action="store_true",
+        help="keep totals of directories in a cache and read only new or changed files")
+    parser_report.add_argument("--server",
+        help="URL of Redmine to show the subjects of the tickets cached for it in --ticket-file")
+
+    for subparser in (parser_submit, parser_report):
+        subparser.add_argument("--ticket-file", default="",
+            help="database of the cached subjects of the tickets, e.g. TimeKeeperTickets.sqlite3 (default: not kept)")
+
+    parser_rollup = subparsers.add_parser("rollup",
+        help="print hours by week or month and ticket or activity")
+    parser_rollup.set_defaults(func=rollup)
+    parser_rollup.add_argument("paths", nargs="+", help="save files or directories of save files")
+    parser_rollup.add_argument("--period", choices=["day", "week", "month"], default="week",
+        help="period of the rows (default: %(default)s)")
+    parser_rollup.add_argument("--by", choices=["ticket", "activity"], default="ticket",
+        help="column of the table (default: %(default)s)")
+
+    parser_export = subparsers.add_parser("export",
+        help="write save files to a JSON Lines file with a day per line or a binary file (*.tkb)")
+    parser_export.set_defaults(func=export)
+    parser_export.add_argument("paths", nargs="+", help="save files or directories of save files")
+    parser_export.add_argument("-o", "--output", required=True,
+        help="path to the JSON Lines file, or to the binary file if it ends with .tkb")
+
+    parser_archive = subparsers.add_parser("archive",
+        help="write the days of a history folder to its archive")
+    parser_archive.set_defaults(func=archive)
+    parser_archive.add_argument("history_folder", help="history folder of TimeKeeper")
+
+    parser_import = subparsers.add_parser("import",
+        help="import save files into a SQLite history database")
+    parser_import.set_defaults(func=import_files)
+    parser_import.add_argument("database", help="SQLite history database (*.sqlite3)")
+    parser_import.add_argument("paths", nargs="+", help="save files or directories of save files")
+    parser_import.add_argument("--batch", type=int, default=500,
+        help="number of days per transaction (default: %(default)s)")
+
+    parser_hours = subparsers.add_parser("hours",
+        help="print hours by ticket or activity between two dates from a SQLite history database")
+    parser_hours.set_defaults(func=hours)
+    parser_hours.add_argument("database", help="SQLite history database (*.sqlite3)")
+    parser_hours.add_argument("--from", dest="start", required=True, help="first date in YYYY-MM-DD")
+    parser_hours.add_argument("--to", dest="end", required=True, help="last date in YYYY-MM-DD")
+    parser_hours.add_argument("--ticket", type=int, default=None, help="sum up only this ticket")
+    parser_hours.add_argument("--by", choices=["ticket", "activity"], default="ticket",
+        help="column to sum up by (default: %(default)s)")
+
+    for subparser in (parser_summary, parser_submit):
+        subparser.add_argument("files", nargs="+", help="save files written by TimeKeeper")
+        subparser.add_argument("--close", default="",
+            help="close the day at HH:mm if it is not closed")
+
+    args = parser.parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+@file history_archive.py
+@author Y. Kasuga
+@date 2021/7/24
+@brief Memory-mapped archive of past days with random access by date.
+"""
+
+import mmap
+import os
+from datetime import date
+from typing import Iterable, Iterator
+
+from timekeeper.binary_file import DAY, HEADER, OFFSET, TASK, VERSION, dump_days, unpack_header
+from timekeeper.task_log import TASK_DICT_VERSION, saved_activity_id
+from timekeeper.task_log_list import TaskLogList
+from timekeeper.time_of_day import seconds_to_str
+
+
+def write_archive(path_file: str, task_dicts: Iterable[dict]) -> None:
+    """
+    @fn write_archive
+    @brief Write days to an archive in order of date, replacing the old archive at once.
+    @param path_file Path to the archive.
+    @param task_dicts Dictionaries of the task list from TaskLogList.get_task_dict().
+                      The last one of the same date is kept.
+    """
+    days = {task_dict["date"]: task_dict for task_dict in task_dicts}
+    path_tmp = path_file + ".tmp"
+    with open(path_tmp, "wb") as f:
+        f.write(dump_days(days[str_date] for str_date in sorted(days)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path_tmp, path_file)
+
+
+class HistoryArchive(object):
+    """
+    @class HistoryArchive
+    @brief Reader of an archive in the binary format of timekeeper.binary_file with days in order of date.
+    @detail The file is memory-mapped and only the header is read on opening.
+            A day is found by binary search on the fixed-width day records,
+            so a lookup touches only the pages of the records it reads.
+    """
+    def __init__(self, path_file: str) -> None:
+        """
+        @fn __init__
+        @brief Constructor of HistoryArchive class. Opens and maps the archive.
+        @param path_file Path to the archive written by write_archive().
+        """
+        self.path_file = path_file
+        self._file = open(path_file, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file cannot be mapped
+            self._file.close()
+            raise ValueError("Not a TimeKeeper binary file")
+
+        try:
+            version, self._num_days, num_tasks, num_strings = unpack_header(self._map)
+        except ValueError:
+            self.close()
+            raise
+        if version not in (2, VERSION):
+            self.close()
+            raise ValueError(f"Archive needs version 2 or {VERSION} of TimeKeeper binary file: {version}")
+        # Version of the task dictionaries which the activity ids are saved in
+        self._task_dict_version = TASK_DICT_VERSION if version >= 3 else 1
+
+        self._offset_days = HEADER.size
+        self._offset_tasks = self._offset_days + self._num_days * DAY.size
+        self._offset_strings = self._offset_tasks + num_tasks * TASK.size
+        self._offset_data = self._offset_strings + num_strings * OFFSET.size
+
+    def close(self) -> None:
+        """
+        @fn close
+        @brief Unmap and close the archive.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self) -> "HistoryArchive":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._num_days
+
+    def _day(self, index: int) -> tuple:
+        """
+        @fn _day
+        @brief Read a day record.
+        @param index Index of the day.
+        @return (ordinal, first, count)
+        """
+        return DAY.unpack_from(self._map, self._offset_days + index * DAY.size)
+
+    def _bisect(self, ordinal: int) -> int:
+        """
+        @fn _bisect
+        @brief Find the first day on or after a date.
+        @param ordinal Ordinal of the date.
+        @return Index of the day.
+        """
+        low, high = 0, self._num_days
+        while low < high:
+            middle = (low + high) // 2
+            if self._day(middle)[0] < ordinal:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _tasks(self, first: int, count: int) -> Iterator[tuple]:
+        """
+        @fn _tasks
+        @brief Read task records.
+        @param first Index of the first task.
+        @param count Number of tasks.
+        @return (start_seconds, ticket_id, activity_id, comment_index) of each task.
+        """
+        offset = self._offset_tasks + first * TASK.size
+        return TASK.iter_unpack(self._map[offset:offset + count * TASK.size])
+
+    def _comment(self, index: int) -> str:
+        """
+        @fn _comment
+        @brief Read a comment from the string table.
+        @param index Index of the comment.
+        @return Comment.
+        """
+        offset = self._offset_strings + index * OFFSET.size
+        start = OFFSET.unpack_from(self._map, offset - OFFSET.size)[0] if index else 0
+        end = OFFSET.unpack_from(self._map, offset)[0]
+        return self._map[self._offset_data + start:self._offset_data + end].decode("utf-8")
+
+    def _find(self, day: date) -> tuple:
+        """
+        @fn _find
+        @brief Find the day record of a date.
+        @param day Date of the day.
+        @return (ordinal, first, count) or None if the day is not archived.
+        """
+        ordinal = day.toordinal()
+        index = self._bisect(ordinal)
+        if index == self._num_days:
+            return None
+        record = self._day(index)
+        return record if record[0] == ordinal else None
+
+    def dates(self) -> Iterator[date]:
+        """
+        @fn dates
+        @brief Iterate the archived days.
+        @return Dates in order.
+        """
+        for index in range(self._num_days):
+            yield date.fromordinal(self._day(index)[0])
+
+    def load_day(self, day: date) -> dict:
+        """
+        @fn load_day
+        @brief Load the tasks of a day.
+        @param day Date of the day.
+        @return Dictionary of the task list as TaskLogList.get_task_dict() or None if the day is not archived.
+        """
+        record = self._find(day)
+        if record is None:
+            return None
+
+        _, first, count = record
+        return {
+            "date": day.isoformat(),
+            "task_list": [
+                {
+                    "start_time": seconds_to_str(start_seconds),
+                    "ticket_id": ticket_id,
+                    "activity_id": saved_activity_id(activity_id, self._task_dict_version),
+                    "comment": self._comment(comment_index),
+                }
+                for start_seconds, ticket_id, activity_id, comment_index in self._tasks(first, count)
+            ],
+            "version": TASK_DICT_VERSION
+        }
+
+    def load_task_log_list(self, day: date) -> TaskLogList:
+        """
+        @fn load_task_log_list
+        @brief Load the tasks of a day into a task list.
+        @param day Date of the day.
+        @return Task list or None if the day is not archived.
+        """
+        record = self._find(day)
+        if record is None:
+            return None
+
+        _, first, count = record
+        task_log_list = TaskLogList()
+        task_log_list.date = day
+        for start_seconds, ticket_id, activity_id, comment_index in self._tasks(first, count):
+            task_log_list.append_new(start_seconds, ticket_id, self._comment(comment_index),
+                saved_activity_id(activity_id, self._task_dict_version))
+        return task_log_list
+
+    def ticket_seconds(self, ticket_number: int, start: date, end: date) -> int:
+        """
+        @fn ticket_seconds
+        @brief Sum up logged time of a ticket over days without reading comments.
+        @detail A task lasts until the start of the next task of the day, same as TaskLogList.
+        @param ticket_number Ticket number.
+        @param start First date to sum up.
+        @param end Last date to sum up.
+        @return Logged time in seconds.
+        """
+        seconds = 0
+        end_ordinal = end.toordinal()
+        for index in range(self._bisect(start.toordinal()), self._num_days):
+            ordinal, first, count = self._day(index)
+            if ordinal > end_ordinal:
+                break
+
+            previous = None
+            for start_seconds, ticket_id, _, _ in self._tasks(first, count):
+                if previous is not None and previous[1] == ticket_number:
+                    seconds += start_seconds - previous[0]
+                previous = (start_seconds, ticket_id)
+
+        return seconds
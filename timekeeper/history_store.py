@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+@file history_store.py
+@author Y. Kasuga
+@date 2021/7/3
+@brief Append-only store of the tasks of every day.
+"""
+
+import json
+import os
+from datetime import date
+from typing import List
+
+from timekeeper.history_archive import HistoryArchive, write_archive
+from timekeeper.json_file import JsonFile, write_atomic
+
+
+class HistoryStore(object):
+    """
+    @class HistoryStore
+    @brief Append-only store of task lists segmented by month.
+    @detail A segment "YYYY-MM.jsonl" has a day per line in the format of TaskLogList.get_task_dict().
+            Saving a day appends a new line, and the index "YYYY-MM.idx" of the month
+            points the date to the offset and the length of the latest line.
+            Opening or saving a day touches only the segment and the index of its month.
+            Days not in the segments are looked up in the memory-mapped archive "archive.tkb"
+            written by archive().
+    """
+    archive_file_name = "archive.tkb"
+
+    def __init__(self, directory: str) -> None:
+        """
+        @fn __init__
+        @brief Constructor of HistoryStore class.
+        @param directory Directory of the segments. Created if it doesn't exist.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        # Month -> {"size": size of the segment, "days": {date: [offset, length]}}
+        self._indexes = {}
+        self.path_archive = os.path.join(directory, self.archive_file_name)
+        self._archive: HistoryArchive = None
+
+    @staticmethod
+    def _month(str_date: str) -> str:
+        return str_date[:7]
+
+    def _path_segment(self, month: str) -> str:
+        return os.path.join(self.directory, month + ".jsonl")
+
+    def _path_index(self, month: str) -> str:
+        return os.path.join(self.directory, month + ".idx")
+
+    def _index(self, month: str) -> dict:
+        """
+        @fn _index
+        @brief Get the index of a month.
+        @detail Lines appended after the index was written, e.g. by a crash
+                between appending and indexing, are indexed by scanning the tail of the segment.
+        @param month Month in "YYYY-MM".
+        @return Index of the month.
+        """
+        index = self._indexes.get(month)
+        if index is None:
+            index = {"size": 0, "days": {}}
+            jsonFile = JsonFile()
+            if jsonFile.open(self._path_index(month), "r"):
+                try:
+                    index = jsonFile.read()
+                except ValueError:
+                    pass
+            del jsonFile
+            self._indexes[month] = index
+
+        path_segment = self._path_segment(month)
+        size = os.path.getsize(path_segment) if os.path.exists(path_segment) else 0
+        if size != index["size"]:
+            self._scan(month, index, min(index["size"], size))
+
+        return index
+
+    def _scan(self, month: str, index: dict, offset: int) -> None:
+        """
+        @fn _scan
+        @brief Index the lines of a segment from an offset.
+        @param month Month in "YYYY-MM".
+        @param index Index to update.
+        @param offset Offset to start scanning.
+        """
+        if offset == 0:
+            index["days"] = {}
+
+        with open(self._path_segment(month), "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    str_date = json.loads(line)["date"]
+                except (ValueError, KeyError):
+                    # Broken line of an interrupted append
+                    break
+                index["days"][str_date] = [offset, len(line)]
+                offset += len(line)
+
+        index["size"] = offset
+        self._write_index(month, index)
+
+    def _write_index(self, month: str, index: dict) -> None:
+        """
+        @fn _write_index
+        @brief Write the index of a month, replacing the old one at once.
+        @param month Month in "YYYY-MM".
+        @param index Index to write.
+        """
+        write_atomic(self._path_index(month), index)
+
+    def save_day(self, task_dict: dict) -> None:
+        """
+        @fn save_day
+        @brief Save the tasks of a day. The previous save of the day is kept in the segment.
+        @param task_dict Dictionary of the task list from TaskLogList.get_task_dict().
+        """
+        str_date = task_dict["date"]
+        month = self._month(str_date)
+        index = self._index(month)
+
+        line = (json.dumps(task_dict, separators=(",", ":")) + "\n").encode("utf-8")
+        with open(self._path_segment(month), "ab") as f:
+            # Drop a broken tail of an interrupted append
+            f.truncate(index["size"])
+            f.write(line)
+
+        index["days"][str_date] = [index["size"], len(line)]
+        index["size"] += len(line)
+        self._write_index(month, index)
+
+    def get_archive(self) -> HistoryArchive:
+        """
+        @fn get_archive
+        @brief Get the archive of the store.
+        @return Archive or None if it is not written yet.
+        """
+        if self._archive is None and os.path.exists(self.path_archive):
+            self._archive = HistoryArchive(self.path_archive)
+        return self._archive
+
+    def close(self) -> None:
+        """
+        @fn close
+        @brief Close the archive.
+        """
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def archive(self) -> int:
+        """
+        @fn archive
+        @brief Write the latest save of every day to the archive.
+        @detail Segments are kept. Saves in the segments take precedence over the archive.
+        @return Number of days in the archive.
+        """
+        days = self.dates()
+        task_dicts = [self.load_day(day) for day in days]
+
+        self.close()
+        write_archive(self.path_archive, task_dicts)
+        return len(days)
+
+    def load_day(self, day: date) -> dict:
+        """
+        @fn load_day
+        @brief Load the tasks of a day.
+        @param day Date of the day.
+        @return Dictionary of the task list or None if the day is not saved.
+        """
+        str_date = day.isoformat()
+        month = self._month(str_date)
+        entry = None
+        if os.path.exists(self._path_segment(month)):
+            entry = self._index(month)["days"].get(str_date)
+
+        if entry is None:
+            archive = self.get_archive()
+            return archive.load_day(day) if archive is not None else None
+
+        offset, length = entry
+        with open(self._path_segment(month), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def dates(self) -> List[date]:
+        """
+        @fn dates
+        @brief List the saved days.
+        @return Dates in order.
+        """
+        months = [
+            file_name[:-len(".jsonl")] for file_name in os.listdir(self.directory)
+            if file_name.endswith(".jsonl")
+        ]
+        days = {
+            date.fromisoformat(str_date)
+            for month in months for str_date in self._index(month)["days"]
+        }
+
+        archive = self.get_archive()
+        if archive is not None:
+            days.update(archive.dates())
+
+        return sorted(days)
+
+    def compact(self, month: str) -> None:
+        """
+        @fn compact
+        @brief Rewrite a segment with only the latest save of each day.
+        @param month Month in "YYYY-MM".
+        """
+        index = self._index(month)
+        path_segment = self._path_segment(month)
+        path_tmp = path_segment + ".tmp"
+
+        days = {}
+        offset = 0
+        with open(path_segment, "rb") as f_in, open(path_tmp, "wb") as f_out:
+            for str_date, (old_offset, length) in sorted(index["days"].items()):
+                f_in.seek(old_offset)
+                f_out.write(f_in.read(length))
+                days[str_date] = [offset, length]
+                offset += length
+
+        os.replace(path_tmp, path_segment)
+        index["days"] = days
+        index["size"] = offset
+        self._write_index(month, index)
+
+
+def open_history(path: str):
+    """
+    @fn open_history
+    @brief Open the history backend of a path.
+    @param path "*.sqlite3" or "*.db" for SqliteHistory, otherwise a folder of HistoryStore.
+    @return SqliteHistory or HistoryStore, both with save_day(), load_day(), dates() and close().
+    """
+    if path.endswith((".sqlite3", ".db")):
+        # Deferred not to load sqlite3 for the folder backend
+        from timekeeper.sqlite_history import SqliteHistory
+        return SqliteHistory(path)
+
+    return HistoryStore(path)
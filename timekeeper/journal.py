@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+@file journal.py
+@author Y. Kasuga
+@date 2021/7/10
+@brief Write-ahead journal of edits with background autosave of the day file.
+"""
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from timekeeper.json_file import JsonFile, write_atomic
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID, TASK_DICT_VERSION, saved_activity_id
+
+
+class DayJournal(object):
+    """
+    @class DayJournal
+    @brief Journal of the edits of a day, compacted into the day file in the background.
+    @detail Every edit is queued by the UI thread without touching the disk.
+            A writer thread appends the queued records to "<day file>.journal" and syncs them,
+            then rewrites the day file at once after no edit for the debounce interval
+            and empties the journal.
+            Records overwrite a row or the number of rows, so replaying a record twice does no harm
+            and a crash between replacing the day file and emptying the journal loses nothing.
+            A failed write is reported and kept in error, and the writer thread tries again
+            after the debounce interval with the edits kept in memory.
+    """
+    empty_row = {"start_time": "00:00:00", "ticket_id": -1, "activity_id": DEFAULT_ACTIVITY_ID, "comment": ""}
+
+    def __init__(self, path_day: str, interval: float=2.0) -> None:
+        """
+        @fn __init__
+        @brief Constructor of DayJournal class.
+        @param path_day Path to the day file in the format of TaskLogList.get_task_dict().
+        @param interval Debounce interval of the autosave in seconds.
+        """
+        self.path_day = path_day
+        self.path_journal = path_day + ".journal"
+        self.interval = interval
+
+        self._date = ""
+        self._rows = []
+        self._queue = queue.Queue()
+        self._thread = None
+        # Error of the last write, None once the day file is written
+        self.error: Exception = None
+
+    def recover(self) -> dict:
+        """
+        @fn recover
+        @brief Load the day file and replay the journal on it. Call before start().
+        @return Dictionary of the task list or None if nothing is saved.
+        """
+        jsonFile = JsonFile()
+        if jsonFile.open(self.path_day, "r"):
+            try:
+                task_dict = jsonFile.read()
+                self._date = task_dict["date"]
+                version = task_dict.get("version", 1)
+                self._rows = [
+                    dict(row, activity_id=saved_activity_id(row.get("activity_id", DEFAULT_ACTIVITY_ID), version))
+                    for row in task_dict["task_list"]
+                ]
+            except (ValueError, KeyError, TypeError):
+                pass
+        del jsonFile
+
+        num_records = 0
+        if os.path.exists(self.path_journal):
+            with open(self.path_journal, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Broken line of an interrupted append
+                        break
+                    self._apply(record)
+                    num_records += 1
+
+        if not self._date and not self._rows and not num_records:
+            return None
+
+        return self.task_dict()
+
+    def task_dict(self) -> dict:
+        """
+        @fn task_dict
+        @brief Get the journaled tasks. Only the writer thread changes them once started.
+        @return Dictionary of the task list.
+        """
+        return {"date": self._date, "task_list": [dict(row) for row in self._rows], "version": TASK_DICT_VERSION}
+
+    def start(self) -> None:
+        """
+        @fn start
+        @brief Start the writer thread.
+        """
+        self._thread = threading.Thread(target=self._run, name="DayJournal", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float=10.0) -> bool:
+        """
+        @fn close
+        @brief Write pending records, compact them into the day file and stop the writer thread.
+        @param timeout Seconds to wait for the writer thread.
+        @return Written to the day file or not.
+        """
+        if self._thread is None:
+            return self.error is None
+        self._queue.put(None)
+        self._thread.join(timeout)
+        written = not self._thread.is_alive() and self.error is None
+        self._thread = None
+        return written
+
+    def flush(self, timeout: float=10.0) -> bool:
+        """
+        @fn flush
+        @brief Wait until the records queued so far are compacted into the day file.
+        @param timeout Seconds to wait.
+        @return Written to the day file or not, i.e. False if it timed out or the write failed.
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout) and self.error is None
+
+    def record_date(self, str_date: str) -> None:
+        """
+        @fn record_date
+        @brief Record the date of the day.
+        @param str_date Date in "YYYY-MM-DD".
+        """
+        self._queue.put({"op": "date", "date": str_date})
+
+    def record_row_count(self, count: int) -> None:
+        """
+        @fn record_row_count
+        @brief Record the number of tasks. Rows out of the count are dropped.
+        @param count Number of tasks.
+        """
+        self._queue.put({"op": "rows", "count": count})
+
+    def record_row(self, row: int, start_time: str, ticket_id: int,
+        activity_id: int, comment: str) -> None:
+        """
+        @fn record_row
+        @brief Record a task.
+        @param row Row of the task.
+        @param start_time Start time in "HH:MM:SS".
+        @param ticket_id Ticket number.
+        @param activity_id Activity id.
+        @param comment Comment of the task.
+        """
+        self._queue.put({
+            "op": "row", "row": row, "start_time": start_time,
+            "ticket_id": ticket_id, "activity_id": activity_id, "comment": comment
+        })
+
+    def _apply(self, record: dict) -> None:
+        """
+        @fn _apply
+        @brief Apply a record to the tasks.
+        @param record Journal record.
+        """
+        op = record.get("op")
+        if op == "date":
+            self._date = record["date"]
+        elif op == "rows":
+            del self._rows[record["count"]:]
+            while len(self._rows) < record["count"]:
+                self._rows.append(dict(self.empty_row))
+        elif op == "row":
+            row = record["row"]
+            while len(self._rows) <= row:
+                self._rows.append(dict(self.empty_row))
+            self._rows[row] = {
+                "start_time": record["start_time"],
+                "ticket_id": record["ticket_id"],
+                "activity_id": record["activity_id"],
+                "comment": record["comment"],
+            }
+
+    def _run(self) -> None:
+        """
+        @fn _run
+        @brief Main loop of the writer thread.
+        """
+        dirty = False
+        deadline = None
+        running = True
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                items = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                dirty = not self._write(self._compact)
+                deadline = time.monotonic() + self.interval if dirty else None
+                continue
+
+            # Batch everything queued meanwhile into one sync
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [item for item in items if isinstance(item, dict)]
+            if records:
+                self._write(lambda: self._append(records))
+                dirty = True
+                deadline = time.monotonic() + self.interval
+
+            waiters = [item for item in items if isinstance(item, threading.Event)]
+            running = None not in items
+            if dirty and (waiters or not running):
+                dirty = not self._write(self._compact)
+                deadline = time.monotonic() + self.interval if dirty else None
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, write) -> bool:
+        """
+        @fn _write
+        @brief Call a write of the writer thread and report its error without stopping the thread.
+        @param write Function which writes to the disk.
+        @return Succeeded or not.
+        """
+        try:
+            write()
+        except Exception as e:
+            if self.error is None:
+                print(f"Cannot autosave to {self.path_day}: {e}", file=sys.stderr)
+            self.error = e
+            return False
+        return True
+
+    def _append(self, records: list) -> None:
+        """
+        @fn _append
+        @brief Append records to the journal and apply them.
+        @detail Records are applied even if the append fails, so the next compaction writes them.
+        @param records Journal records.
+        """
+        try:
+            with open(self.path_journal, "a") as f:
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            for record in records:
+                self._apply(record)
+
+    def _compact(self) -> None:
+        """
+        @fn _compact
+        @brief Replace the day file with the journaled tasks and empty the journal.
+        """
+        write_atomic(self.path_day, self.task_dict())
+        with open(self.path_journal, "w") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.error = None
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+@file json.py
+@author Y. Kasuga
+@date 2021/5/31
+"""
+
+import os
+import json
+from typing import Iterable, Iterator
+
+
+class JsonFile(object):
+    """IO class of json file
+    """
+    def __init__(self) -> None:
+        """Constructor of JsonFile class
+        """
+        self.file = None
+        super().__init__()
+
+    def __del__(self) -> None:
+        """Destructor of JsonFile class
+        """
+        if self.file:
+            self.file.close()
+
+    def open(self, path_file: str, mode: str) -> bool:
+        """Open a new file
+
+        Args:
+            path_file (str): Path to the file
+            mode (str): Open mode: "r" or "w"
+
+        Returns:
+            bool: True for success, False for failure
+        """
+        mode_read = "r"
+        mode_write = "w"
+
+        # Already opened a file
+        if self.file:
+            return False
+
+        # Read mode but file doesn't exits
+        if mode == mode_read and not os.path.exists(path_file):
+            return False
+
+        # Write mode but file already exists
+        # if mode == mode_write and os.path.exists(path_file):
+        #     return False
+
+        self.file = open(path_file, mode)
+        return True
+
+    def read(self) -> str:
+        """Read json file
+
+        Returns:
+            str: Content in the file
+        """
+        if not self.file:
+            return None
+
+        content = json.load(self.file)
+        return content
+
+    def read_lines(self) -> Iterator:
+        """Read JSON Lines file one line at a time
+
+        Yields:
+            Content of each non-empty line
+        """
+        if not self.file:
+            return
+
+        for line in self.file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+    def write(self, content: str, compact: bool=False) -> bool:
+        """Write string to json file
+
+        Args:
+            content (str): Content to write to the file
+            compact (bool): Write without indent and spaces
+
+        Returns:
+            bool: True for success, False for failure
+        """
+        if not self.file:
+            return False
+
+        if compact:
+            json_str = json.dumps(content, separators=(",", ":"))
+        else:
+            json_str = json.dumps(content, indent=4)
+        self.file.writelines(json_str)
+
+        return True
+
+    def write_lines(self, contents: Iterable, compact: bool=True) -> bool:
+        """Write JSON Lines file one content per line
+
+        The contents are consumed one at a time, so a generator is never materialized.
+
+        Args:
+            contents (Iterable): Contents to write, e.g. days or tasks
+            compact (bool): Write without spaces
+
+        Returns:
+            bool: True for success, False for failure
+        """
+        if not self.file:
+            return False
+
+        separators = (",", ":") if compact else None
+        for content in contents:
+            self.file.write(json.dumps(content, separators=separators) + "\n")
+
+        return True
+
+
+def write_atomic(path_file: str, content) -> None:
+    """Write json file, replacing the old one at once
+
+    The content is written to a temporary file next to the file and synced to the disk
+    before the rename, so that a crash leaves either the old or the new file.
+
+    Args:
+        path_file (str): Path to the file
+        content: Content to write to the file
+    """
+    path_tmp = path_file + ".tmp"
+    jsonFile = JsonFile()
+    jsonFile.open(path_tmp, "w")
+    jsonFile.write(content)
+    jsonFile.file.flush()
+    os.fsync(jsonFile.file.fileno())
+    del jsonFile
+    os.replace(path_tmp, path_file)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+@file ledger.py
+@author Y. Kasuga
+@date 2021/9/4
+@brief Ledger of time entries already submitted to Redmine.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import date
+from typing import Dict
+
+
+# Default file of the ledger
+LEDGER_FILE = "TimeKeeperLedger.jsonl"
+
+
+def entry_key(day: date, ticket_number: int, activity_id: int, comment: str, hours: float) -> str:
+    """
+    @fn entry_key
+    @brief Get the content hash of a time entry.
+    @detail Tasks of a day are unique by ticket number and comment once sorted,
+            so the hash identifies an entry of the day.
+    @param day Logged date.
+    @param ticket_number Issue ID.
+    @param activity_id Activity id.
+    @param comment Comment.
+    @param hours Logged hours.
+    @return Hash in hex.
+    """
+    content = json.dumps([day.isoformat(), ticket_number, activity_id, comment, f"{hours:.2f}"])
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SubmissionLedger(object):
+    """
+    @class SubmissionLedger
+    @brief Ids of the time entries created on Redmine by the content hash of the entries.
+    @detail The ledger is kept in memory as a dictionary and appended to a JSON Lines file,
+            synced on every record, so a retried submission skips what was sent before a crash.
+            Methods may be called from any thread.
+    """
+    def __init__(self, path_file: str=LEDGER_FILE) -> None:
+        """
+        @fn __init__
+        @brief Constructor of SubmissionLedger class. Loads the file if it exists.
+        @param path_file Path to the ledger.
+        """
+        self.path_file = path_file
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+
+        if os.path.exists(path_file):
+            with open(path_file, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Broken line of an interrupted append
+                        break
+                    self._ids[record["key"]] = record["id"]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def get(self, key: str) -> int:
+        """
+        @fn get
+        @brief Get the id of the time entry submitted with a content hash.
+        @param key Content hash from entry_key().
+        @return Id of the time entry or None if not submitted.
+        """
+        return self._ids.get(key)
+
+    def record(self, key: str, entry_id: int) -> None:
+        """
+        @fn record
+        @brief Record a submitted time entry.
+        @param key Content hash from entry_key().
+        @param entry_id Id of the time entry created on Redmine.
+        """
+        with self._lock:
+            with open(self.path_file, "a") as f:
+                f.write(json.dumps({"key": key, "id": entry_id}, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._ids[key] = entry_id
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+@file option_struct.py
+@author Y. Kasuga
+@date 2021/1/29
+@brief Option parameters of TimeKeeper.
+"""
+
+from datetime import date
+
+
+class OptionStruct(object):
+    """
+    @class OptionStruct
+    @brief Option parameters.
+    """
+    def __init__(self) -> None:
+        """
+        @fn __init__()
+        @brief Constructor of OptionStruct class.
+        """
+        self.redmine_server: str = ""
+        self.userfolder: str = ""
+        self.username: str = ""
+        self.password: str = ""
+        self.today: date = date.today()
+        self.save_file: str = ""
+        self.history_folder: str = ""
+        # Number of time entries submitted at the same time
+        self.max_workers: int = 4
+
+
+def read_option_file(path_file: str) -> OptionStruct:
+    """
+    @fn read_option_file
+    @brief Read option parameters from the option file.
+    @detail The option file has a parameter per line:
+            redmine server, userfolder, username, password, save file, history folder
+            and number of concurrent submissions.
+            Missing or invalid lines are left as default.
+    @param path_file Path to the option file.
+    @return Option parameters or None if the file doesn't exist.
+    """
+    optionStruct = OptionStruct()
+
+    try:
+        with open(path_file, "r") as f:
+            lines = [s.strip() for s in f.readlines()]
+    except FileNotFoundError:
+        return None
+
+    keys = ["redmine_server", "userfolder", "username", "password", "save_file", "history_folder",
+        "max_workers"]
+    for key, line in zip(keys, lines):
+        if isinstance(getattr(optionStruct, key), int):
+            try:
+                line = int(line)
+            except ValueError:
+                continue
+        setattr(optionStruct, key, line)
+
+    return optionStruct
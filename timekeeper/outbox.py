@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+@file outbox.py
+@author Y. Kasuga
+@date 2021/8/28
+@brief Durable outbox of time entries which Redmine has not accepted yet, and its replayer.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+from timekeeper.json_file import JsonFile
+from timekeeper.redmine_entry import SubmitResult
+
+
+# Default file of the outbox
+OUTBOX_FILE = "TimeKeeperOutbox.jsonl"
+
+
+class Outbox(object):
+    """
+    @class Outbox
+    @brief Time entries waiting to be submitted, kept in a JSON Lines log on the disk.
+    @detail Every change is appended to the log and synced before it returns,
+            so an entry put in the outbox survives a crash until it is marked done.
+            The log is compacted to the pending entries when it is opened
+            and when it holds more finished records than pending entries.
+            Methods may be called from any thread.
+    """
+    def __init__(self, path_file: str=OUTBOX_FILE) -> None:
+        """
+        @fn __init__
+        @brief Constructor of Outbox class. Loads the pending entries of the log.
+        @param path_file Path to the log.
+        """
+        self.path_file = path_file
+        self._lock = threading.Lock()
+        # id -> entry, in order of put
+        self._entries: Dict[str, dict] = {}
+        self._num_records = 0
+
+        if os.path.exists(path_file):
+            with open(path_file, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Broken line of an interrupted append
+                        break
+                    self._apply(record)
+            self._compact()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def put(self, day: date, ticket_number: int, hours: float, activity_id: int, comment: str,
+        error: str="", delay: float=0.0) -> str:
+        """
+        @fn put
+        @brief Add an entry to the outbox.
+        @param day Logged date.
+        @param ticket_number Issue ID.
+        @param hours Logged hours.
+        @param activity_id Activity id.
+        @param comment Comment.
+        @param error Error of the last try, if it was tried.
+        @param delay Seconds to wait before the first try.
+        @return Id of the entry in the outbox.
+        """
+        entry_id = uuid.uuid4().hex
+        self._write({
+            "op": "put", "id": entry_id, "date": day.isoformat(), "ticket_number": ticket_number,
+            "hours": hours, "activity_id": activity_id, "comment": comment,
+            "attempts": 1 if error else 0, "next_try": time.time() + delay, "error": error
+        })
+        return entry_id
+
+    def retry(self, entry_id: str, error: str, delay: float) -> None:
+        """
+        @fn retry
+        @brief Record a failed try of an entry and when to try it next.
+        @param entry_id Id of the entry.
+        @param error Error of the try.
+        @param delay Seconds to wait before the next try.
+        """
+        with self._lock:
+            attempts = self._entries[entry_id]["attempts"] + 1 if entry_id in self._entries else 1
+        self._write({
+            "op": "retry", "id": entry_id, "attempts": attempts,
+            "next_try": time.time() + delay, "error": error
+        })
+
+    def done(self, entry_id: str) -> None:
+        """
+        @fn done
+        @brief Remove an entry which is submitted or is given up.
+        @param entry_id Id of the entry.
+        """
+        self._write({"op": "done", "id": entry_id})
+
+    def entries(self) -> List[dict]:
+        """
+        @fn entries
+        @brief Get the pending entries.
+        @return Copies of the entries in order of put.
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._entries.values()]
+
+    def due(self, now: float=None) -> List[dict]:
+        """
+        @fn due
+        @brief Get the entries to try now.
+        @param now Time in seconds since the epoch. None for the current time.
+        @return Copies of the entries whose next try has come, in order of put.
+        """
+        now = time.time() if now is None else now
+        return [entry for entry in self.entries() if entry["next_try"] <= now]
+
+    def next_try(self) -> float:
+        """
+        @fn next_try
+        @brief Get when the earliest entry is tried next.
+        @return Time in seconds since the epoch or None if the outbox is empty.
+        """
+        with self._lock:
+            return min((entry["next_try"] for entry in self._entries.values()), default=None)
+
+    def _apply(self, record: dict) -> None:
+        """
+        @fn _apply
+        @brief Apply a record of the log to the entries.
+        @param record Log record.
+        """
+        op = record.get("op")
+        self._num_records += 1
+        if op == "put":
+            entry = dict(record)
+            del entry["op"]
+            self._entries[entry["id"]] = entry
+        elif op == "retry" and record["id"] in self._entries:
+            self._entries[record["id"]].update(
+                attempts=record["attempts"], next_try=record["next_try"], error=record["error"]
+            )
+        elif op == "done":
+            self._entries.pop(record["id"], None)
+
+    def _write(self, record: dict) -> None:
+        """
+        @fn _write
+        @brief Append a record to the log, sync it and apply it.
+        @param record Log record.
+        """
+        with self._lock:
+            with open(self.path_file, "a") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(record)
+
+            if self._num_records > 2 * len(self._entries) + 16:
+                self._compact()
+
+    def _compact(self) -> None:
+        """
+        @fn _compact
+        @brief Replace the log with a put record per pending entry.
+        """
+        path_tmp = self.path_file + ".tmp"
+        jsonFile = JsonFile()
+        jsonFile.open(path_tmp, "w")
+        jsonFile.write_lines({"op": "put", **entry} for entry in self._entries.values())
+        jsonFile.file.flush()
+        os.fsync(jsonFile.file.fileno())
+        del jsonFile
+        os.replace(path_tmp, self.path_file)
+        self._num_records = len(self._entries)
+
+
+class OutboxReplayer(object):
+    """
+    @class OutboxReplayer
+    @brief Thread which submits the entries of an outbox when their tries come.
+    @detail A try which fails while the server is unavailable is retried after a delay
+            doubled on every failure, from base_delay up to max_delay.
+            The rest of the due entries wait for the next round,
+            so a server which is down is not hit once per entry.
+            An entry which the server rejects is given up and reported with its error.
+    """
+    def __init__(self, outbox: Outbox,
+        submit: Callable[[date, int, timedelta, int, str], SubmitResult],
+        base_delay: float=5.0, max_delay: float=600.0,
+        on_result: Callable[[SubmitResult], None]=None) -> None:
+        """
+        @fn __init__
+        @brief Constructor of OutboxReplayer class.
+        @param outbox Outbox to drain.
+        @param submit Submits an entry with the arguments of RedmineEntry.submitTimeEntry.
+        @param base_delay Seconds to wait after the first failure.
+        @param max_delay Maximum seconds to wait between tries.
+        @param on_result Called with the result of every entry submitted or given up, from the thread.
+        """
+        self.outbox = outbox
+        self.submit = submit
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_result = on_result
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        # No entry is tried until this time after the server turned out to be unavailable
+        self._resume = 0.0
+
+    def backoff(self, attempts: int) -> float:
+        """
+        @fn backoff
+        @brief Get the delay after a number of failed tries.
+        @param attempts Number of failed tries.
+        @return Delay in seconds.
+        """
+        return min(self.max_delay, self.base_delay * 2 ** max(0, attempts - 1))
+
+    def drain(self, force: bool=False) -> List[SubmitResult]:
+        """
+        @fn drain
+        @brief Try the due entries once in order, until the server turns out to be unavailable.
+        @param force Try every entry even if its next try has not come.
+        @return Result of every entry tried.
+        """
+        results = []
+        for entry in (self.outbox.entries() if force else self.outbox.due()):
+            if self._stop.is_set():
+                break
+
+            try:
+                result = self.submit(
+                    date.fromisoformat(entry["date"]), entry["ticket_number"],
+                    timedelta(hours=entry["hours"]), entry["activity_id"], entry["comment"]
+                )
+            except Exception as e:
+                # No client, e.g. the server is not set yet. Kept to try later.
+                result = SubmitResult(entry["ticket_number"], entry["hours"], entry["activity_id"], entry["comment"])
+                result.error = str(e) or type(e).__name__
+                result.queued = True
+            results.append(result)
+
+            if result.queued:
+                delay = self.backoff(entry["attempts"] + 1)
+                self.outbox.retry(entry["id"], result.error, delay)
+                self._resume = time.time() + delay
+                break
+
+            self.outbox.done(entry["id"])
+            if self.on_result is not None:
+                self.on_result(result)
+
+        return results
+
+    def wake(self) -> None:
+        """
+        @fn wake
+        @brief Check the outbox now, e.g. after entries are put.
+        """
+        self._wake.set()
+
+    def start(self) -> None:
+        """
+        @fn start
+        @brief Start the thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="OutboxReplayer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        @fn stop
+        @brief Stop the thread after the entry being submitted. Pending entries stay in the outbox.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        """
+        @fn _run
+        @brief Main loop of the thread.
+        """
+        while not self._stop.is_set():
+            if time.time() >= self._resume:
+                self.drain()
+
+            next_try = self.outbox.next_try()
+            timeout = None if next_try is None else max(0.0, max(next_try, self._resume) - time.time())
+            self._wake.wait(timeout)
+            self._wake.clear()
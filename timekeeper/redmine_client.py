@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+@file redmine_client.py
+@author Y. Kasuga
+@date 2021/8/21
+@brief Registry of Redmine clients shared for the life of the app.
+"""
+
+import os
+import threading
+from typing import Dict, Tuple
+
+from timekeeper.json_file import JsonFile, write_atomic
+
+
+# (url, username) -> ((password, key), pool size, Redmine)
+_clients: Dict[Tuple[str, str], tuple] = {}
+_lock = threading.Lock()
+
+# Default number of connections kept alive per server
+POOL_SIZE = 8
+
+# Seconds to wait for the server, so that a server which doesn't answer doesn't block a submission
+REQUEST_TIMEOUT = 30
+
+# Default file of the API keys
+API_KEY_FILE = "TimeKeeperApiKey.json"
+
+
+def _engine_class(pool_size: int, timeout: float):
+    """
+    @fn _engine_class
+    @brief Engine of redminelib with a sized pool of keep-alive connections and a timeout of every request.
+    @detail requests.Session has no timeout of its own, so the timeout is given to each request.
+    @param pool_size Number of connections kept alive.
+    @param timeout Seconds to wait for the server to connect and to answer.
+    @return Subclass of redminelib.engines.SyncEngine.
+    """
+    # Deferred not to load redminelib until something is sent to Redmine
+    from redminelib.engines import SyncEngine
+    from requests.adapters import HTTPAdapter
+
+    class PooledEngine(SyncEngine):
+        @staticmethod
+        def create_session(**params):
+            session = SyncEngine.create_session(**params)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            return session
+
+        @staticmethod
+        def construct_request_kwargs(method, headers, params, data):
+            kwargs = SyncEngine.construct_request_kwargs(method, headers, params, data)
+            kwargs["timeout"] = timeout
+            return kwargs
+
+    return PooledEngine
+
+
+def get_redmine(url: str, username: str="", password: str="", pool_size: int=POOL_SIZE, key: str=""):
+    """
+    @fn get_redmine
+    @brief Get the client of a server and a user, creating it on first use.
+    @detail A client keeps one requests session and reuses its connections
+            for submissions, ticket lookups and activity lookups.
+            The client is created again if the credentials have changed or its pool is too small.
+    @param url URL of the Redmine's root page.
+    @param username User's ID to login.
+    @param password Password to login. Not used if key is given.
+    @param pool_size Number of connections kept alive, e.g. the number of concurrent submissions.
+    @param key API key to login.
+    @return redminelib.Redmine
+    """
+    from redminelib import Redmine
+
+    credentials = ("", key) if key else (password, "")
+    with _lock:
+        client_credentials, client_pool_size, redmine = _clients.get((url, username), (None, 0, None))
+        if redmine is not None and client_credentials == credentials and client_pool_size >= pool_size:
+            return redmine
+
+        if redmine is not None:
+            redmine.engine.session.close()
+
+        pool_size = max(pool_size, POOL_SIZE)
+        auth = {"key": key} if key else {"username": username, "password": password}
+        redmine = Redmine(url=url, engine=_engine_class(pool_size, REQUEST_TIMEOUT), requests={'verify': False}, **auth)
+        _clients[(url, username)] = (credentials, pool_size, redmine)
+
+    return redmine
+
+
+def _api_key_name(url: str, username: str) -> str:
+    return f"{username}@{url.rstrip('/')}"
+
+
+def load_api_key(url: str, username: str, path_file: str=API_KEY_FILE) -> str:
+    """
+    @fn load_api_key
+    @brief Load the cached API key of a server and a user.
+    @param url URL of the Redmine's root page.
+    @param username User's ID.
+    @param path_file Path to the file of the API keys.
+    @return API key or "" if not cached.
+    """
+    jsonFile = JsonFile()
+    if not jsonFile.open(path_file, "r"):
+        return ""
+    try:
+        keys = jsonFile.read()
+    except ValueError:
+        return ""
+    finally:
+        del jsonFile
+
+    return keys.get(_api_key_name(url, username), "")
+
+
+def save_api_key(url: str, username: str, key: str, path_file: str=API_KEY_FILE) -> None:
+    """
+    @fn save_api_key
+    @brief Cache the API key of a server and a user. The file is readable only by the owner.
+    @param url URL of the Redmine's root page.
+    @param username User's ID.
+    @param key API key. "" to forget the key.
+    @param path_file Path to the file of the API keys.
+    """
+    keys = {}
+    jsonFile = JsonFile()
+    if jsonFile.open(path_file, "r"):
+        try:
+            keys = jsonFile.read()
+        except ValueError:
+            pass
+    del jsonFile
+
+    if key:
+        keys[_api_key_name(url, username)] = key
+    else:
+        keys.pop(_api_key_name(url, username), None)
+
+    write_atomic(path_file, keys)
+    os.chmod(path_file, 0o600)
+
+
+def fetch_api_key(url: str, username: str, password: str) -> str:
+    """
+    @fn fetch_api_key
+    @brief Get the API key of a user from "/my/account" of Redmine with the password.
+    @param url URL of the Redmine's root page.
+    @param username User's ID to login.
+    @param password Password to login.
+    @return API key.
+    @exception Exception of redminelib or requests if the server rejects the password.
+    """
+    redmine = get_redmine(url, username, password)
+    response = redmine.engine.request("get", f"{redmine.url}/my/account.json")
+    return response["user"]["api_key"]
+
+
+def login(url: str, username: str, password: str="", pool_size: int=POOL_SIZE,
+    path_file: str=API_KEY_FILE):
+    """
+    @fn login
+    @brief Get the client of a server and a user, authenticated by the API key if possible.
+    @detail The API key is fetched with the password only once and cached in the file.
+            Without a cached key and a password, the client uses the password as before.
+    @param url URL of the Redmine's root page.
+    @param username User's ID to login.
+    @param password Password to fetch the API key. Not needed once the key is cached.
+    @param pool_size Number of connections kept alive.
+    @param path_file Path to the file of the API keys.
+    @return redminelib.Redmine
+    """
+    key = load_api_key(url, username, path_file)
+    if not key and password:
+        try:
+            key = fetch_api_key(url, username, password)
+        except Exception as e:
+            # REST API or the key may be disabled on the server
+            print(f"Cannot get API key: {e}")
+        else:
+            save_api_key(url, username, key, path_file)
+
+    if key:
+        return get_redmine(url, username, pool_size=pool_size, key=key)
+    return get_redmine(url, username, password, pool_size)
+
+
+def close_all() -> None:
+    """
+    @fn close_all
+    @brief Close the connections of every client and forget them.
+    """
+    with _lock:
+        for _, _, redmine in _clients.values():
+            redmine.engine.session.close()
+        _clients.clear()
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""
+@file redmine_entry.py
+@author Y. Kasuga
+@date 2021/1/30
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List
+
+from timekeeper.activity_catalogue import ACTIVITY_FILE, ActivityCatalogue
+from timekeeper.ledger import SubmissionLedger, entry_key
+from timekeeper.redmine_client import API_KEY_FILE, POOL_SIZE, login
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID
+from timekeeper.ticket_validator import find_invalid_tickets
+from timekeeper.timedelta_to_hour import timedelta_to_hour
+
+
+# Seconds before an entry failed on submit is tried again from the outbox
+OUTBOX_DELAY = 5.0
+
+
+class SubmitResult(object):
+    """
+    @class SubmitResult
+    @brief Result of submitting a time entry.
+    @detail True in a boolean context if the entry was saved.
+            An entry which failed while the server was unavailable is queued to be tried again.
+            An entry found in the ledger or already logged on Redmine is skipped
+            with the id of the entry submitted before.
+    """
+    def __init__(self, ticket_number: int, hours: float, activity_id: int, comment: str) -> None:
+        """
+        @fn __init__
+        @brief Constructor of SubmitResult class.
+        @param ticket_number Issue ID.
+        @param hours Logged hours.
+        @param activity_id Activity id.
+        @param comment Comment.
+        """
+        self.ticket_number = ticket_number
+        self.hours = hours
+        self.activity_id = activity_id
+        self.comment = comment
+        # Id of the time entry created on Redmine
+        self.entry_id: int = None
+        # Error message. Empty on success.
+        self.error: str = ""
+        # Failed while the server was unavailable, and worth trying again
+        self.queued: bool = False
+        # Not sent since it was submitted before
+        self.skipped: bool = False
+        # Sent to correct the entry already logged on Redmine
+        self.updated: bool = False
+
+    @property
+    def success(self) -> bool:
+        return not self.error
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    def __repr__(self) -> str:
+        if self.success:
+            state = f"{'skipped' if self.skipped else 'updated' if self.updated else 'id'}={self.entry_id}"
+        else:
+            state = f"{'queued' if self.queued else 'error'}={self.error!r}"
+        return f"SubmitResult(#{self.ticket_number}, {self.hours} h, {self.comment!r}, {state})"
+
+
+def is_unavailable(e: Exception) -> bool:
+    """
+    @fn is_unavailable
+    @brief Whether an error of a request means the server is unavailable for now,
+           rather than rejecting the request.
+    @param e Exception raised by redminelib.
+    @return True for connection errors, timeouts and 5xx responses.
+    """
+    # Deferred not to load redminelib and requests for the other modules
+    from redminelib import exceptions
+    from requests.exceptions import ConnectionError, Timeout
+
+    if isinstance(e, (ConnectionError, Timeout, exceptions.ServerError)):
+        return True
+    if isinstance(e, exceptions.UnknownError):
+        return 500 <= e.status_code <= 599
+    return False
+
+
+class RedmineEntry(object):
+    """
+    @class RedmineEntry
+    @brief Time entry for redmine.
+    """
+    def __init__(self, url: str, username: str, password: str="", pool_size: int=POOL_SIZE,
+        api_key_file: str=API_KEY_FILE, ledger: SubmissionLedger=None,
+        activity_file: str=ACTIVITY_FILE) -> None:
+        """
+        @fn __init__
+        @brief Constructor of RedmineEntry class.
+        @detail The client of the server and the user is shared with the other instances.
+                It is authenticated by the API key cached in api_key_file,
+                which is fetched with the password on first use.
+        @param url URL of the Redmine's root page.
+        @param username User's ID to login.
+        @param password Password to login. Not needed once the API key is cached.
+        @param pool_size Number of connections kept alive, at least the number of concurrent submissions.
+        @param api_key_file Path to the file of the API keys.
+        @param ledger Ledger of the submitted entries, not to submit an entry twice. None not to check.
+        @param activity_file Path to the cache of the activities of the servers.
+        """
+        self.redmine = login(url, username, password, pool_size, api_key_file)
+        self.username = username
+        self.ledger = ledger
+        # Loaded on the first submission
+        self.activities = ActivityCatalogue(url, activity_file)
+        self._activities_loaded = False
+
+    def resolveActivity(self, activity) -> int:
+        """
+        @fn resolveActivity
+        @brief Get the id of an activity given by id or name.
+        @detail The activities are fetched once per server and cached on the disk.
+        @param activity Activity id or name.
+        @return Activity id, DEFAULT_ACTIVITY_ID to leave it to the server, or None if the name is unknown.
+        """
+        if not self._activities_loaded:
+            self._activities_loaded = True
+            self.activities.load(self.redmine)
+        return self.activities.resolve(activity)
+
+
+    def submitTimeEntry(self, date: datetime, ticket_number: int,
+        logged_time: timedelta, activity: str, comment: str) -> SubmitResult:
+        """
+        @fn submitTimeEntry
+        @brief Submit time entry to the redmine ticket.
+        @param date Logged date.
+        @param ticket_number Issue ID.
+        @param logged_time Duration of the task.
+        @param activity Activity id or name.
+        @param comment Comment.
+        @return Result of the entry, which is False on failure.
+        """
+        result = SubmitResult(ticket_number, timedelta_to_hour(logged_time), activity, comment)
+
+        key = None
+        if self.ledger is not None:
+            key = entry_key(date, ticket_number, activity, comment, result.hours)
+            entry_id = self.ledger.get(key)
+            if entry_id is not None:
+                result.entry_id = entry_id
+                result.skipped = True
+                return result
+
+        activity_id = self.resolveActivity(activity)
+        if activity_id is None:
+            result.error = f"Unknown activity: {activity}"
+            return result
+
+        time_entry = self.redmine.time_entry.new()
+
+        try:
+            time_entry.issue_id = ticket_number
+            time_entry.spent_on = date
+            time_entry.hours = result.hours
+            if activity_id != DEFAULT_ACTIVITY_ID:
+                time_entry.activity_id = activity_id
+            time_entry.comments = comment
+
+            time_entry.save()
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+            result.queued = is_unavailable(e)
+            return result
+
+        result.entry_id = getattr(time_entry, "id", None)
+        if key is not None:
+            self.ledger.record(key, result.entry_id)
+        return result
+
+    def findInvalidTickets(self, ticket_numbers: Iterable[int], ticket_cache=None) -> List[int]:
+        """
+        @fn findInvalidTickets
+        @brief Check ticket numbers in a single query before submitting, with the tickets found cached for the user.
+        @param ticket_numbers Ticket numbers to check.
+        @param ticket_cache TicketCache to keep the subjects of the issues checked. None not to keep them.
+        @return Ticket numbers which are not issues of the server.
+        @exception Exception of redminelib or requests if the server cannot be asked.
+        """
+        return find_invalid_tickets(self.redmine, ticket_numbers, ticket_cache, self.username)
+
+    def updateTimeEntry(self, entry_id: int, date: datetime, ticket_number: int,
+        logged_time: timedelta, activity: str, comment: str) -> SubmitResult:
+        """
+        @fn updateTimeEntry
+        @brief Correct the hours and the activity of a time entry already logged on Redmine.
+        @param entry_id Id of the time entry.
+        @param date Logged date.
+        @param ticket_number Issue ID.
+        @param logged_time Duration of the task.
+        @param activity Activity id or name.
+        @param comment Comment.
+        @return Result of the entry, which is False on failure.
+        """
+        result = SubmitResult(ticket_number, timedelta_to_hour(logged_time), activity, comment)
+
+        fields = {"hours": result.hours, "comments": comment}
+        activity_id = self.resolveActivity(activity)
+        if activity_id is None:
+            result.error = f"Unknown activity: {activity}"
+            return result
+        if activity_id != DEFAULT_ACTIVITY_ID:
+            fields["activity_id"] = activity_id
+
+        try:
+            self.redmine.time_entry.update(entry_id, **fields)
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+            return result
+
+        result.entry_id = entry_id
+        result.updated = True
+        if self.ledger is not None:
+            self.ledger.record(entry_key(date, ticket_number, activity, comment, result.hours), entry_id)
+        return result
+
+    def fetchTimeEntries(self, date: datetime) -> List[dict]:
+        """
+        @fn fetchTimeEntries
+        @brief Get the time entries of the user logged on a date,
+               in a single query which the server pages.
+        @param date Logged date.
+        @return Time entries in the form of the REST API in order of id.
+        """
+        entries, _ = self.redmine.engine.bulk_request(
+            "get", f"{self.redmine.url}/time_entries.json", "time_entries",
+            user_id="me", spent_on=date.isoformat()
+        )
+        return sorted(entries, key=lambda entry: entry["id"])
+
+    def _reconcile(self, date: datetime, entries: List[tuple]) -> List[dict]:
+        """
+        @fn _reconcile
+        @brief Match the entries to submit with the time entries already logged on the date.
+        @detail An entry matches the first logged time entry with the same issue and comment.
+                Entries in the ledger are left to the ledger and not fetched for.
+                Logged time entries which match no entry are left as they are.
+        @param date Logged date.
+        @param entries Entries of (ticket number, logged time, activity, comment).
+        @return Matched time entry of each entry, or None to create the entry.
+        """
+        matches = [None] * len(entries)
+        known_ids = set()
+        pending = []
+        for index, (ticket_number, logged_time, activity_id, comment) in enumerate(entries):
+            entry_id = None
+            if self.ledger is not None:
+                entry_id = self.ledger.get(
+                    entry_key(date, ticket_number, activity_id, comment, timedelta_to_hour(logged_time))
+                )
+            if entry_id is None:
+                pending.append(index)
+            else:
+                known_ids.add(entry_id)
+
+        if not pending:
+            return matches
+
+        logged = {}
+        for time_entry in self.fetchTimeEntries(date):
+            if time_entry["id"] in known_ids or "issue" not in time_entry:
+                continue
+            logged.setdefault((time_entry["issue"]["id"], time_entry.get("comments", "")), time_entry)
+
+        for index in pending:
+            ticket_number, _, _, comment = entries[index]
+            matches[index] = logged.pop((ticket_number, comment), None)
+
+        return matches
+
+    def _isLogged(self, time_entry: dict, ticket_number: int, logged_time: timedelta,
+        activity, comment: str) -> bool:
+        """
+        @fn _isLogged
+        @brief Whether a time entry already logged on Redmine has the hours and the activity of an entry.
+        @param time_entry Time entry in the form of the REST API.
+        @param ticket_number Issue ID.
+        @param logged_time Duration of the task.
+        @param activity Activity id or name.
+        @param comment Comment.
+        @return True if the time entry needs no update.
+        """
+        if abs(time_entry["hours"] - timedelta_to_hour(logged_time)) >= 0.005:
+            return False
+
+        # An unknown activity is left to updateTimeEntry(), which rejects it
+        activity_id = self.resolveActivity(activity)
+        if activity_id is None:
+            return False
+        return activity_id == DEFAULT_ACTIVITY_ID or activity_id == time_entry["activity"]["id"]
+
+    def submitTimeEntries(self, date: datetime, tasks: Iterable, max_workers: int=4,
+        on_result: Callable[[int, SubmitResult], None]=None,
+        cancel: threading.Event=None, outbox=None, reconcile: bool=False) -> List[SubmitResult]:
+        """
+        @fn submitTimeEntries
+        @brief Submit time entries concurrently over a bounded pool of threads.
+        @param date Logged date.
+        @param tasks Tasks with ticket_number, logged_time, activity_id and comment, e.g. TaskLogList.get_tasks_sorted().
+                     activity_id may be the name of an activity.
+        @param max_workers Maximum number of entries submitted at the same time.
+        @param on_result Called with the index of the task and its result as each entry finishes,
+                         from a worker thread.
+        @param cancel Once set, entries not started yet are not submitted and fail as cancelled.
+                      Entries being submitted are not interrupted.
+        @param outbox timekeeper.outbox.Outbox to put the entries failed while the server is unavailable in.
+                      Their results stay queued.
+        @param reconcile Fetch the time entries already logged on the date first,
+                         then skip the entries logged with the same hours and activity
+                         and update the ones with other hours or activity instead of creating them again.
+                         If they cannot be fetched, every entry is created.
+        @return Result of each task in order of tasks.
+        """
+        # Copied so that workers don't read views of a list which may change meanwhile
+        entries = [(task.ticket_number, task.logged_time, task.activity_id, task.comment) for task in tasks]
+
+        matches = [None] * len(entries)
+        if entries:
+            # Fetched once before the workers
+            self.resolveActivity(DEFAULT_ACTIVITY_ID)
+        if reconcile and entries:
+            try:
+                matches = self._reconcile(date, entries)
+            except Exception as e:
+                print(f"Cannot fetch time entries: {e or type(e).__name__}")
+
+        def submit_one(index: int) -> SubmitResult:
+            if cancel is not None and cancel.is_set():
+                ticket_number, logged_time, activity_id, comment = entries[index]
+                result = SubmitResult(ticket_number, timedelta_to_hour(logged_time), activity_id, comment)
+                result.error = "Cancelled"
+            elif matches[index] is None:
+                result = self.submitTimeEntry(date, *entries[index])
+            elif self._isLogged(matches[index], *entries[index]):
+                ticket_number, logged_time, activity_id, comment = entries[index]
+                result = SubmitResult(ticket_number, timedelta_to_hour(logged_time), activity_id, comment)
+                result.entry_id = matches[index]["id"]
+                result.skipped = True
+                if self.ledger is not None:
+                    self.ledger.record(entry_key(date, ticket_number, activity_id, comment, result.hours),
+                        result.entry_id)
+            else:
+                result = self.updateTimeEntry(matches[index]["id"], date, *entries[index])
+            if result.queued:
+                if outbox is not None:
+                    outbox.put(date, result.ticket_number, result.hours, result.activity_id,
+                        result.comment, result.error, delay=OUTBOX_DELAY)
+                else:
+                    result.queued = False
+            if on_result is not None:
+                on_result(index, result)
+            return result
+
+        if not entries:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(entries)))) as executor:
+            return list(executor.map(submit_one, range(len(entries))))
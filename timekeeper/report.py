@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+@file report.py
+@author Y. Kasuga
+@date 2021/6/12
+@brief Aggregation of logged time over many save files.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from timekeeper.binary_file import read_binary
+from timekeeper.json_file import JsonFile
+from timekeeper.task_log_list import TaskLogList
+from timekeeper.timedelta_to_hour import timedelta_to_hour
+
+
+# Key of the report: (date, user, ticket_id, activity_id)
+ReportKey = Tuple[str, str, int, int]
+
+
+def day_rows(task_dict: dict, user: str="") -> List[Tuple[str, str, int, int, int]]:
+    """
+    @fn day_rows
+    @brief Get logged time of every task of a day.
+    @detail Tasks with non-positive ticket number are not included, same as TaskLogList.sort().
+    @param task_dict Dictionary of the task list from TaskLogList.get_task_dict().
+    @param user Name of the user of the day.
+    @return List of (date, user, ticket_id, activity_id, seconds).
+    """
+    task_log_list = TaskLogList()
+    task_log_list.set_tasks(task_dict)
+    str_date = task_dict.get("date", "")
+
+    return [
+        (str_date, user, task.ticket_number, task.activity_id, task.logged_seconds)
+        for task in task_log_list.tasks if task.ticket_number > 0
+    ]
+
+
+def user_of_file(path_file: str, task_dict: dict) -> str:
+    """
+    @fn user_of_file
+    @brief Get the user of a save file.
+    @detail "user" in the file if any, otherwise the name of the directory of the file.
+    @param path_file Path to the save file.
+    @param task_dict Content of the save file.
+    @return Name of the user.
+    """
+    return task_dict.get("user") or os.path.basename(os.path.dirname(os.path.abspath(path_file)))
+
+
+def read_days(jsonFile: JsonFile, path_file: str) -> Iterable[dict]:
+    """
+    @fn read_days
+    @brief Read the days of an opened save file.
+    @detail An export "*.jsonl" has a day per line and is read one day at a time.
+            A binary export "*.tkb" is read at once from its path.
+    @param jsonFile Save file opened in read mode.
+    @param path_file Path to the save file.
+    @return Dictionaries of the task list of each day.
+    """
+    if path_file.endswith(".tkb"):
+        return read_binary(path_file)
+    if path_file.endswith(".jsonl"):
+        return jsonFile.read_lines()
+    return [jsonFile.read()]
+
+
+def aggregate_chunk(paths: List[str]) -> Tuple[Dict[ReportKey, int], int, List[str]]:
+    """
+    @fn aggregate_chunk
+    @brief Sum up logged time of save files. Run in a worker process.
+    @param paths Paths to the save files.
+    @return Seconds by (date, user, ticket_id, activity_id),
+            number of files aggregated and paths which cannot be read.
+    """
+    totals = {}
+    num_files = 0
+    errors = []
+
+    for path_file in paths:
+        jsonFile = JsonFile()
+        if not jsonFile.open(path_file, "r"):
+            errors.append(path_file)
+            continue
+        try:
+            rows = [
+                row for task_dict in read_days(jsonFile, path_file)
+                for row in day_rows(task_dict, user_of_file(path_file, task_dict))
+            ]
+        except (ValueError, KeyError, TypeError):
+            errors.append(path_file)
+            continue
+        finally:
+            del jsonFile
+
+        for str_date, user, ticket_id, activity_id, seconds in rows:
+            key = (str_date, user, ticket_id, activity_id)
+            totals[key] = totals.get(key, 0) + seconds
+        num_files += 1
+
+    return totals, num_files, errors
+
+
+def merge_totals(totals: Dict[ReportKey, int], other: Dict[ReportKey, int]) -> Dict[ReportKey, int]:
+    """
+    @fn merge_totals
+    @brief Add partial totals to totals.
+    @param totals Totals to update.
+    @param other Partial totals to add.
+    @return Updated totals.
+    """
+    for key, seconds in other.items():
+        totals[key] = totals.get(key, 0) + seconds
+    return totals
+
+
+def aggregate_files(paths: List[str], processes: int=None,
+    chunks_per_process: int=4) -> Tuple[Dict[ReportKey, int], int, List[str]]:
+    """
+    @fn aggregate_files
+    @brief Sum up logged time of save files over a pool of processes.
+    @param paths Paths to the save files.
+    @param processes Number of worker processes. None for the number of CPUs. 1 to run in this process.
+    @param chunks_per_process Number of shards of paths per worker process.
+    @return Seconds by (date, user, ticket_id, activity_id),
+            number of files aggregated and paths which cannot be read.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(paths) <= 1:
+        return aggregate_chunk(paths)
+
+    num_chunks = min(len(paths), processes * chunks_per_process)
+    chunks = [paths[n::num_chunks] for n in range(num_chunks)]
+
+    totals = {}
+    num_files = 0
+    errors = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for chunk_totals, chunk_num_files, chunk_errors in executor.map(aggregate_chunk, chunks):
+            merge_totals(totals, chunk_totals)
+            num_files += chunk_num_files
+            errors += chunk_errors
+
+    return totals, num_files, errors
+
+
+def find_save_files(paths: Iterable[str]) -> List[str]:
+    """
+    @fn find_save_files
+    @brief List save files in files and directories.
+    @param paths Save files or directories to search for "*.json" recursively.
+                 Hidden files in the directories are skipped.
+    @return Paths to the save files.
+    """
+    save_files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            save_files.append(path)
+            continue
+
+        for dir_path, _, file_names in os.walk(path):
+            save_files += [
+                os.path.join(dir_path, file_name)
+                for file_name in sorted(file_names)
+                if file_name.endswith(".json") and not file_name.startswith(".")
+            ]
+
+    return save_files
+
+
+def format_report(totals: Dict[ReportKey, int], ticket_subject: Callable[[int], str]=None) -> str:
+    """
+    @fn format_report
+    @brief Format totals as a report in order of date, user, ticket and activity.
+    @param totals Seconds by (date, user, ticket_id, activity_id).
+    @param ticket_subject Gives the subject of a ticket, e.g. TicketCache.subject, to add a column. None not to add it.
+    @return Report with a line per key.
+    """
+    lines = ["{:10} {:20} {:>10} {:>10} {:>10}".format("date", "user", "ticket", "activity", "hours")]
+    if ticket_subject is not None:
+        lines[0] += " subject"
+    for key in sorted(totals):
+        str_date, user, ticket_id, activity_id = key
+        line = "{:10} {:20} {:>10} {:>10} {:>10}".format(
+            str_date, user, ticket_id, activity_id,
+            timedelta_to_hour(timedelta(seconds=totals[key]))
+        )
+        if ticket_subject is not None:
+            line += " " + ticket_subject(ticket_id)
+        lines.append(line.rstrip())
+
+    return "\n".join(lines)
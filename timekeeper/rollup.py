@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+@file rollup.py
+@author Y. Kasuga
+@date 2021/6/19
+@brief Weekly and monthly rollups of logged hours with NumPy.
+"""
+
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from timekeeper.json_file import JsonFile
+from timekeeper.report import day_rows, read_days
+
+
+class HourColumns(object):
+    """
+    @class HourColumns
+    @brief Logged time of tasks in columnar arrays.
+    """
+    def __init__(self, date: np.ndarray, ticket: np.ndarray,
+        activity: np.ndarray, seconds: np.ndarray) -> None:
+        """
+        @fn __init__
+        @brief Constructor of HourColumns class.
+        @param date Date of each task as datetime64[D].
+        @param ticket Ticket id of each task.
+        @param activity Activity id of each task.
+        @param seconds Logged time of each task in seconds.
+        """
+        self.date = date
+        self.ticket = ticket
+        self.activity = activity
+        self.seconds = seconds
+
+    def __len__(self) -> int:
+        return len(self.seconds)
+
+
+def load_columns(task_dicts: Iterable[dict]) -> HourColumns:
+    """
+    @fn load_columns
+    @brief Load logged time of days into columnar arrays.
+    @param task_dicts Dictionaries of the task list from TaskLogList.get_task_dict().
+    @return Logged time of every task with positive ticket number.
+    """
+    return _load_rows(row for task_dict in task_dicts for row in day_rows(task_dict))
+
+
+def _load_rows(rows: Iterable[tuple]) -> HourColumns:
+    """
+    @fn _load_rows
+    @brief Load rows of timekeeper.report.day_rows() into columnar arrays.
+    @param rows Rows of (date, user, ticket_id, activity_id, seconds).
+    @return Logged time of the rows.
+    """
+    dates = []
+    tickets = []
+    activities = []
+    seconds = []
+
+    for str_date, _, ticket_id, activity_id, logged_seconds in rows:
+        dates.append(str_date)
+        tickets.append(ticket_id)
+        activities.append(activity_id)
+        seconds.append(logged_seconds)
+
+    return HourColumns(
+        np.array(dates, dtype="datetime64[D]"),
+        np.array(tickets, dtype=np.int64),
+        np.array(activities, dtype=np.int64),
+        np.array(seconds, dtype=np.int64)
+    )
+
+
+def load_files(paths: Iterable[str]) -> Tuple[HourColumns, List[str]]:
+    """
+    @fn load_files
+    @brief Load logged time of save files into columnar arrays.
+    @param paths Paths to the save files or exports with a day per line.
+                 Files which cannot be opened or read are skipped as a whole.
+    @return Logged time of every task with positive ticket number and paths which cannot be read.
+    """
+    errors = []
+
+    def read_rows():
+        for path_file in paths:
+            jsonFile = JsonFile()
+            if not jsonFile.open(path_file, "r"):
+                errors.append(path_file)
+                continue
+            try:
+                rows = [row for task_dict in read_days(jsonFile, path_file) for row in day_rows(task_dict)]
+            except (ValueError, KeyError, TypeError):
+                errors.append(path_file)
+                continue
+            finally:
+                del jsonFile
+            yield from rows
+
+    return _load_rows(read_rows()), errors
+
+
+def to_hours(seconds: np.ndarray, ndigits: int=2) -> np.ndarray:
+    """
+    @fn to_hours
+    @brief Convert seconds to hours.
+    @detail Rounded half to even on the exact value in integer arithmetic.
+            Same as timedelta_to_hour except on exact ties, which whole minutes never make.
+    @param seconds Array of seconds.
+    @param ndigits Number of digits to round.
+    @return Array of hours.
+    """
+    scale = 10 ** ndigits
+    quotient, remainder = np.divmod(np.asarray(seconds, dtype=np.int64) * scale, 3600)
+    round_up = (2 * remainder > 3600) | ((2 * remainder == 3600) & (quotient % 2 == 1))
+    return (quotient + round_up) / scale
+
+
+def period_start(date: np.ndarray, period: str) -> np.ndarray:
+    """
+    @fn period_start
+    @brief Get the first day of the week or the month of each date.
+    @param date Array of datetime64[D].
+    @param period "day", "week" (starting on Monday) or "month".
+    @return Array of datetime64[D].
+    """
+    if period == "day":
+        return date
+    if period == "week":
+        # 1970-01-01 is Thursday
+        days = date.astype(np.int64)
+        return (days - (days + 3) % 7).astype("datetime64[D]")
+    if period == "month":
+        return date.astype("datetime64[M]").astype("datetime64[D]")
+
+    raise ValueError(f"Unknown period: {period}")
+
+
+def group_sum(columns: HourColumns, by: Tuple[str, ...]=("ticket",)) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    @fn group_sum
+    @brief Sum up logged time by columns.
+    @param columns Logged time of tasks.
+    @param by Names of the columns to group by: "date", "ticket" and "activity".
+    @return Unique keys as an array of shape (groups, len(by)) in sorted order and seconds of each group.
+            Dates in keys are days since 1970-01-01.
+    """
+    keys = np.stack([getattr(columns, name).astype(np.int64) for name in by], axis=1)
+    if not len(columns):
+        return keys, np.zeros(0, dtype=np.int64)
+
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    seconds = np.zeros(len(unique_keys), dtype=np.int64)
+    np.add.at(seconds, inverse.reshape(-1), columns.seconds)
+
+    return unique_keys, seconds
+
+
+def pivot(columns: HourColumns, period: str="week",
+    by: str="ticket", ndigits: int=2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    @fn pivot
+    @brief Pivot table of hours by period and a column.
+    @param columns Logged time of tasks.
+    @param period "day", "week" or "month".
+    @param by Name of the column for the columns of the table: "ticket" or "activity".
+    @param ndigits Number of digits to round hours.
+    @return First days of the periods, values of the column and hours of shape (periods, values).
+    """
+    periods, period_index = np.unique(period_start(columns.date, period), return_inverse=True)
+    values, value_index = np.unique(getattr(columns, by), return_inverse=True)
+
+    seconds = np.zeros((len(periods), len(values)), dtype=np.int64)
+    np.add.at(seconds, (period_index.reshape(-1), value_index.reshape(-1)), columns.seconds)
+
+    return periods, values, to_hours(seconds, ndigits)
+
+
+def format_pivot(periods: np.ndarray, values: np.ndarray, hours: np.ndarray) -> str:
+    """
+    @fn format_pivot
+    @brief Format a pivot table with a line per period.
+    @param periods First days of the periods.
+    @param values Values of the column.
+    @param hours Hours of shape (periods, values).
+    @return Formatted table.
+    """
+    lines = [" ".join(["{:10}".format("")] + ["{:>8}".format(value) for value in values.tolist()])]
+    for period, row in zip(periods.astype(str).tolist(), hours.tolist()):
+        lines.append(" ".join(["{:10}".format(period)] + ["{:>8}".format(hour) for hour in row]))
+
+    return "\n".join(lines)
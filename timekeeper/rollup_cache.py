@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+@file rollup_cache.py
+@author Y. Kasuga
+@date 2021/6/26
+@brief Cache of daily and weekly totals next to save files.
+"""
+
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from timekeeper.json_file import JsonFile, write_atomic
+from timekeeper.report import ReportKey, day_rows, find_save_files, user_of_file
+
+
+class RollupCache(object):
+    """
+    @class RollupCache
+    @brief Per-day and per-week totals of save files in a directory.
+    @detail A day is keyed by the path, mtime and size of its save file
+            and is read again only when one of them changes.
+            Weeks are summed up again only if one of their days has changed.
+    """
+    cache_file_name = ".timekeeper_rollup.json"
+    version = 1
+
+    def __init__(self, directory: str) -> None:
+        """
+        @fn __init__
+        @brief Constructor of RollupCache class. Loads the cache file if any.
+        @param directory Directory of the save files.
+        """
+        self.directory = directory
+        self.path_cache = os.path.join(directory, self.cache_file_name)
+
+        # Relative path -> {"mtime", "size", "date", "user", "totals": [[ticket, activity, seconds]]}
+        self.days: Dict[str, dict] = {}
+        # Monday of the week -> [[user, ticket, activity, seconds]]
+        self.weeks: Dict[str, list] = {}
+
+        self._load()
+
+    def _load(self) -> None:
+        """
+        @fn _load
+        @brief Load the cache file. A broken or old cache is ignored.
+        """
+        jsonFile = JsonFile()
+        if not jsonFile.open(self.path_cache, "r"):
+            return
+        try:
+            content = jsonFile.read()
+        except ValueError:
+            return
+        finally:
+            del jsonFile
+
+        if content.get("version") != self.version:
+            return
+        self.days = content["days"]
+        self.weeks = content["weeks"]
+
+    def save(self) -> None:
+        """
+        @fn save
+        @brief Write the cache file, replacing the old one at once.
+        """
+        write_atomic(self.path_cache, {"version": self.version, "days": self.days, "weeks": self.weeks})
+
+    def update(self) -> Tuple[int, List[str]]:
+        """
+        @fn update
+        @brief Read new and changed save files and sum up the weeks of changed days.
+        @detail Files which cannot be read are not cached, so they are read again on the next update.
+        @return Number of save files read and paths which cannot be read.
+        """
+        paths = {
+            os.path.relpath(path_file, self.directory): path_file
+            for path_file in find_save_files([self.directory])
+        }
+        dirty_weeks = set()
+        num_read = 0
+        errors = []
+
+        # Removed files
+        for relpath in [relpath for relpath in self.days if relpath not in paths]:
+            dirty_weeks.add(self.days.pop(relpath)["week"])
+
+        for relpath, path_file in paths.items():
+            stat = os.stat(path_file)
+            day = self.days.get(relpath)
+            if day and day["mtime"] == stat.st_mtime_ns and day["size"] == stat.st_size:
+                continue
+
+            if day:
+                dirty_weeks.add(day["week"])
+            day = self._read_day(path_file)
+            if day is None:
+                self.days.pop(relpath, None)
+                errors.append(path_file)
+                continue
+            num_read += 1
+
+            day["mtime"] = stat.st_mtime_ns
+            day["size"] = stat.st_size
+            self.days[relpath] = day
+            dirty_weeks.add(day["week"])
+
+        if dirty_weeks:
+            self._sum_weeks(dirty_weeks)
+
+        return num_read, errors
+
+    def _read_day(self, path_file: str) -> dict:
+        """
+        @fn _read_day
+        @brief Sum up logged time of a save file by ticket and activity.
+        @param path_file Path to the save file.
+        @return Totals of the day or None if the file cannot be read.
+        """
+        jsonFile = JsonFile()
+        if not jsonFile.open(path_file, "r"):
+            return None
+        try:
+            task_dict = jsonFile.read()
+            user = user_of_file(path_file, task_dict)
+            rows = day_rows(task_dict, user)
+            week = date.fromisoformat(task_dict["date"])
+        except (ValueError, KeyError, TypeError):
+            return None
+        finally:
+            del jsonFile
+
+        week -= timedelta(days=week.weekday())
+        totals = {}
+        for _, _, ticket_id, activity_id, seconds in rows:
+            totals[(ticket_id, activity_id)] = totals.get((ticket_id, activity_id), 0) + seconds
+
+        return {
+            "date": task_dict["date"],
+            "week": week.isoformat(),
+            "user": user,
+            "totals": [[ticket_id, activity_id, seconds] for (ticket_id, activity_id), seconds in totals.items()],
+        }
+
+    def _sum_weeks(self, weeks: set) -> None:
+        """
+        @fn _sum_weeks
+        @brief Sum up the totals of the weeks from their days.
+        @param weeks Mondays of the weeks to sum up.
+        """
+        week_totals = {week: {} for week in weeks}
+        for day in self.days.values():
+            totals = week_totals.get(day["week"])
+            if totals is None:
+                continue
+            for ticket_id, activity_id, seconds in day["totals"]:
+                key = (day["user"], ticket_id, activity_id)
+                totals[key] = totals.get(key, 0) + seconds
+
+        for week, totals in week_totals.items():
+            if totals:
+                self.weeks[week] = [[*key, seconds] for key, seconds in sorted(totals.items())]
+            else:
+                self.weeks.pop(week, None)
+
+    def day_totals(self) -> Dict[ReportKey, int]:
+        """
+        @fn day_totals
+        @brief Get seconds by (date, user, ticket_id, activity_id) as timekeeper.report does.
+        @return Totals of every day.
+        """
+        totals = {}
+        for day in self.days.values():
+            for ticket_id, activity_id, seconds in day["totals"]:
+                key = (day["date"], day["user"], ticket_id, activity_id)
+                totals[key] = totals.get(key, 0) + seconds
+        return totals
+
+    def week_totals(self) -> Dict[Tuple[str, str, int, int], int]:
+        """
+        @fn week_totals
+        @brief Get seconds by (monday, user, ticket_id, activity_id).
+        @return Totals of every week.
+        """
+        return {
+            (week, user, ticket_id, activity_id): seconds
+            for week, rows in self.weeks.items()
+            for user, ticket_id, activity_id, seconds in rows
+        }
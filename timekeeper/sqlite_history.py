@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+@file sqlite_history.py
+@author Y. Kasuga
+@date 2021/7/31
+@brief History of the tasks of every day in a SQLite database.
+"""
+
+import sqlite3
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from timekeeper.json_file import JsonFile
+from timekeeper.report import read_days
+from timekeeper.task_log_list import TaskLogList
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS entries (
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    start_seconds INTEGER NOT NULL,
+    logged_seconds INTEGER NOT NULL,
+    ticket_id INTEGER NOT NULL,
+    activity_id INTEGER NOT NULL,
+    comment TEXT NOT NULL,
+    PRIMARY KEY (date, position)
+);
+CREATE INDEX IF NOT EXISTS entries_ticket ON entries (ticket_id, date);
+CREATE INDEX IF NOT EXISTS entries_activity ON entries (activity_id, date);
+"""
+
+
+class SqliteHistory(object):
+    """
+    @class SqliteHistory
+    @brief Store of task lists in a SQLite database with the same interface as HistoryStore.
+    @detail The database is in WAL mode and every save is a single transaction.
+            Logged time of each task is stored along with it,
+            so sums over dates, tickets and activities are indexed queries.
+    """
+    def __init__(self, path_file: str) -> None:
+        """
+        @fn __init__
+        @brief Constructor of SqliteHistory class. Creates the database if it doesn't exist.
+        @param path_file Path to the database.
+        """
+        self.path_file = path_file
+        self._connection = sqlite3.connect(path_file)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """
+        @fn close
+        @brief Close the database.
+        """
+        self._connection.close()
+
+    @staticmethod
+    def _rows(task_dict: dict) -> List[tuple]:
+        """
+        @fn _rows
+        @brief Get the rows of the entries of a day.
+        @param task_dict Dictionary of the task list from TaskLogList.get_task_dict().
+        @return Rows of the entries table.
+        @exception ValueError, KeyError, TypeError or AttributeError if the dictionary is not a day.
+        """
+        str_date = task_dict["date"]
+        date.fromisoformat(str_date)
+        task_log_list = TaskLogList()
+        task_log_list.set_tasks(task_dict)
+
+        return [
+            (str_date, position, task.start_seconds, task.logged_seconds,
+                task.ticket_number, task.activity_id, task.comment)
+            for position, task in enumerate(task_log_list.tasks)
+        ]
+
+    def _insert_days(self, days: Iterable[Tuple[str, List[tuple]]]) -> int:
+        """
+        @fn _insert_days
+        @brief Replace days in the current transaction.
+        @param days Date and rows from _rows() of each day.
+        @return Number of days.
+        """
+        num_days = 0
+        for str_date, rows in days:
+            self._connection.execute("DELETE FROM entries WHERE date = ?", (str_date,))
+            self._connection.execute("INSERT OR IGNORE INTO days (date) VALUES (?)", (str_date,))
+            self._connection.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            num_days += 1
+        return num_days
+
+    def save_day(self, task_dict: dict) -> None:
+        """
+        @fn save_day
+        @brief Save the tasks of a day, replacing the previous save of the day.
+        @param task_dict Dictionary of the task list from TaskLogList.get_task_dict().
+        """
+        rows = self._rows(task_dict)
+        with self._connection:
+            self._insert_days([(task_dict["date"], rows)])
+
+    def load_day(self, day: date) -> dict:
+        """
+        @fn load_day
+        @brief Load the tasks of a day.
+        @param day Date of the day.
+        @return Dictionary of the task list or None if the day is not saved.
+        """
+        str_date = day.isoformat()
+        if self._connection.execute("SELECT 1 FROM days WHERE date = ?", (str_date,)).fetchone() is None:
+            return None
+
+        cursor = self._connection.execute(
+            "SELECT start_seconds, ticket_id, activity_id, comment FROM entries"
+            " WHERE date = ? ORDER BY position", (str_date,)
+        )
+        task_log_list = TaskLogList()
+        task_log_list.date = day
+        for start_seconds, ticket_id, activity_id, comment in cursor:
+            task_log_list.append_new(start_seconds, ticket_id, comment, activity_id)
+
+        return task_log_list.get_task_dict()
+
+    def dates(self) -> List[date]:
+        """
+        @fn dates
+        @brief List the saved days.
+        @return Dates in order.
+        """
+        return [
+            date.fromisoformat(str_date)
+            for (str_date,) in self._connection.execute("SELECT date FROM days ORDER BY date")
+        ]
+
+    def import_files(self, paths: Iterable[str], batch_size: int=500) -> Tuple[int, List[str]]:
+        """
+        @fn import_files
+        @brief Import save files, committing a transaction per batch of days.
+        @detail Each day is checked before it is added to the batch. Days of a file which is broken
+                and are not committed yet are dropped, so the other files are imported anyway.
+        @param paths Paths to the save files or exports with a day per line.
+        @param batch_size Number of days per transaction.
+        @return Number of days imported and paths which cannot be read.
+        """
+        num_days = 0
+        errors = []
+        batch = []
+
+        for path_file in paths:
+            jsonFile = JsonFile()
+            if not jsonFile.open(path_file, "r"):
+                errors.append(path_file)
+                continue
+            start = len(batch)
+            try:
+                for task_dict in read_days(jsonFile, path_file):
+                    batch.append((task_dict["date"], self._rows(task_dict)))
+                    if len(batch) >= batch_size:
+                        with self._connection:
+                            num_days += self._insert_days(batch)
+                        batch = []
+                        start = 0
+            except (ValueError, KeyError, TypeError, AttributeError):
+                errors.append(path_file)
+                del batch[start:]
+            finally:
+                del jsonFile
+
+        with self._connection:
+            num_days += self._insert_days(batch)
+
+        return num_days, errors
+
+    def ticket_seconds(self, ticket_number: int, start: date, end: date) -> int:
+        """
+        @fn ticket_seconds
+        @brief Sum up logged time of a ticket over days.
+        @param ticket_number Ticket number.
+        @param start First date to sum up.
+        @param end Last date to sum up.
+        @return Logged time in seconds.
+        """
+        (seconds,) = self._connection.execute(
+            "SELECT COALESCE(SUM(logged_seconds), 0) FROM entries"
+            " WHERE ticket_id = ? AND date BETWEEN ? AND ?",
+            (ticket_number, start.isoformat(), end.isoformat())
+        ).fetchone()
+        return seconds
+
+    def totals(self, start: date, end: date, by: str="ticket") -> Dict[int, int]:
+        """
+        @fn totals
+        @brief Sum up logged time by ticket or activity over days.
+        @detail Tasks with non-positive ticket number are not included, same as timekeeper.report.
+        @param start First date to sum up.
+        @param end Last date to sum up.
+        @param by "ticket" or "activity".
+        @return Seconds by ticket id or activity id.
+        """
+        columns = {"ticket": "ticket_id", "activity": "activity_id"}
+        if by not in columns:
+            raise ValueError(f"Unknown column: {by}")
+
+        cursor = self._connection.execute(
+            f"SELECT {columns[by]}, SUM(logged_seconds) FROM entries"
+            " WHERE date BETWEEN ? AND ? AND ticket_id > 0"
+            f" GROUP BY {columns[by]} ORDER BY {columns[by]}",
+            (start.isoformat(), end.isoformat())
+        )
+        return dict(cursor)
+
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+@file task_log.py
+@author Y. Kasuga
+@date 2021/5/30
+@brief Definition of TaskLog class.
+"""
+
+from collections.abc import Sequence
+from datetime import time, timedelta
+
+from timekeeper.task_log_table import TaskLogTable
+from timekeeper.time_of_day import time_to_seconds, seconds_to_time
+
+
+# Activity id of a task whose activity is not chosen.
+# Resolved to the default activity of the server on submit.
+DEFAULT_ACTIVITY_ID = 0
+
+# Version of the task dictionaries of save files, written as "version".
+# Dictionaries without it are of version 1, in which every task had activity id 1
+# since the activity could not be chosen.
+TASK_DICT_VERSION = 2
+
+
+def saved_activity_id(activity_id: int, version: int) -> int:
+    """
+    @fn saved_activity_id
+    @brief Get the activity id of a task saved in a version of the task dictionaries.
+    @param activity_id Activity id in the dictionary.
+    @param version Version of the dictionary.
+    @return Activity id. Activity id 1 of version 1 is DEFAULT_ACTIVITY_ID.
+    """
+    if version < 2 and activity_id == 1:
+        return DEFAULT_ACTIVITY_ID
+    return activity_id
+
+
+class TaskLog():
+    """
+    @class TaskLog
+    @brief Set of parameters of a task
+    @detail A task is a view over one row of TaskLogTable.
+            A task created by the constructor owns a table of its own.
+            A view over a row of another table, e.g. of TaskLogList, is read-only,
+            since the table keeps aggregates of its rows. Change them through the owner.
+    """
+    __slots__ = ("_table", "_row", "_read_only")
+
+    def __init__(self, id: int, start_time: time,
+        ticket_number: int=0, comment: str="EndOfDay", activity_id: int=DEFAULT_ACTIVITY_ID) -> None:
+        """
+        @fn __init__
+        @brief Constructor of TaskLog class
+        @param id Identification number of the task
+        @param start_time When the task began. datetime.time or seconds of the day.
+        @param ticket_number Ticket id to log the task. Default=0.
+        @param comment Comment of the ticket. Default="EndOfDay".
+        @param activity_id Activity id of the task. Default=DEFAULT_ACTIVITY_ID.
+        @return None
+        """
+        self._table = TaskLogTable()
+        self._table.append(id, time_to_seconds(start_time), ticket_number, activity_id, comment)
+        self._row = 0
+        self._read_only = False
+
+    @classmethod
+    def view(cls, table: TaskLogTable, row: int) -> "TaskLog":
+        """
+        @fn view
+        @brief Create a read-only task as a view over a row of the table.
+        @detail The view is valid until rows are inserted to or deleted from the table.
+        @param table Table holding the task.
+        @param row Index of the row.
+        @return Task of the row.
+        """
+        task = cls.__new__(cls)
+        task._table = table
+        task._row = row
+        task._read_only = True
+        return task
+
+    def __copy__(self) -> "TaskLog":
+        task = TaskLog(self.id, self.start_seconds, self.ticket_number, self.comment, self.activity_id)
+        task._table.logged_seconds[0] = self._table.logged_seconds[self._row]
+        return task
+
+    def __deepcopy__(self, memo: dict) -> "TaskLog":
+        return self.__copy__()
+
+    def __lt__(self, other) -> bool:
+        return self.ticket_number < other.ticket_number
+    # def __le__(self, other) -> bool:
+    #     return self.ticket_number <= other.ticket_number
+    def __eq__(self, other) -> bool:
+        return self.ticket_number == other.ticket_number and self.comment == other.comment
+    # def __ne__(self, other) -> bool:
+    #     return self.ticket_number != other.ticket_number
+    # def __gt__(self, other) -> bool:
+    #     return self.ticket_number > other.ticket_number
+    # def __ge__(self, other) -> bool:
+    #     return self.ticket_number >= other.ticket_number
+
+    #=== Properties ===
+    @property
+    def id(self) -> int:
+        return self._table.ids[self._row]
+
+    @property
+    def start_time(self) -> time:
+        return seconds_to_time(self._table.start_seconds[self._row])
+
+    # @start_time.setter
+
+    @property
+    def start_seconds(self) -> int:
+        return self._table.start_seconds[self._row]
+
+    @property
+    def logged_time(self) -> timedelta:
+        return timedelta(seconds=self._table.logged_seconds[self._row])
+
+    @logged_time.setter
+    def logged_time(self, logged_time: timedelta) -> None:
+        self._check_writable()
+        self._table.logged_seconds[self._row] = int(logged_time.total_seconds())
+
+    @property
+    def logged_seconds(self) -> int:
+        return self._table.logged_seconds[self._row]
+
+    @property
+    def ticket_number(self) -> int:
+        return self._table.ticket_numbers[self._row]
+
+    # @ticket_number.setter
+
+    @property
+    def activity_id(self) -> int:
+        return self._table.activity_ids[self._row]
+
+    @activity_id.setter
+    def activity_id(self, activity_id: int) -> None:
+        self._check_writable()
+        self._table.activity_ids[self._row] = activity_id
+
+    @property
+    def comment(self) -> str:
+        return self._table.comment(self._row)
+
+    @comment.setter
+    def comment(self, comment: str) -> None:
+        self._check_writable()
+        if self.ticket_number:
+            self._table.comment_indexes[self._row] = self._table.intern_comment(comment)
+
+    #=== Functions ===    
+    def _check_writable(self) -> None:
+        """
+        @fn _check_writable
+        @brief Check that the task owns its table.
+        @exception AttributeError if the task is a view over a row of another table.
+        """
+        if self._read_only:
+            raise AttributeError("Task of a list is read-only. Change it through the list.")
+
+    def show(self, message_callback=print) -> None:
+        """
+        @fn show
+        @brief Show the parameters of the task.
+        @param message_callback Specify the way to output.
+        @return None
+        """
+        message_callback("{} : {} {} {} {}".format(self.id,
+            self.start_time.strftime("%H:%M:%S"),
+            self.logged_time, self.ticket_number, self.comment
+            ))
+
+    def is_end_of_day(self) -> bool:
+        """
+        @fn is_end_of_day
+        @brief Returns if this task is the end of a day.
+        @detail If _ticket_number equals 0, the task is recognized as the end of a day.
+        @return Wheather this task is the end of a day.
+        """
+        return self.ticket_number == 0
+
+    def submit_log(self) -> None:
+        """
+        @fn submit_log
+        @brief Submit task log to the ticket.
+        @note TODO not implemented
+        """
+        pass
+
+    def merge(self, other_task: int) -> bool:
+        """
+        @fn merge
+        @brief Merge with other task.
+        @param other_task Instance of TaskLog class of other task.
+        @return Succeeded or not.
+        """
+        if not self == other_task:
+            return False
+
+        self.logged_time += other_task.logged_time
+        return True
+
+
+class TaskLogRows(Sequence):
+    """
+    @class TaskLogRows
+    @brief Read-only sequence of the tasks in a TaskLogTable.
+    """
+    def __init__(self, table: TaskLogTable) -> None:
+        """
+        @fn __init__
+        @brief Constructor of TaskLogRows class.
+        @param table Table holding the tasks.
+        """
+        self._table = table
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TaskLog.view(self._table, row) for row in range(*index.indices(len(self._table)))]
+
+        if index < 0:
+            index += len(self._table)
+        if not 0 <= index < len(self._table):
+            raise IndexError("task index out of range")
+        return TaskLog.view(self._table, index)
@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+"""
+@file task_log_list.py
+@author Y. Kasuga
+@date 2021/1/30
+@brief Definition of TaskLogList class.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Iterator, List
+import bisect
+
+from timekeeper.task_log import DEFAULT_ACTIVITY_ID, TASK_DICT_VERSION, TaskLog, TaskLogRows, saved_activity_id
+from timekeeper.task_log_table import TaskLogTable
+from timekeeper.time_of_day import time_to_seconds, seconds_to_str, str_to_seconds
+from timekeeper.timedelta_to_hour import timedelta_to_hour
+
+
+class TaskLogList():
+    def __init__(self) -> None:
+        """
+        @fn __init__
+        @brief Constructor of TaskLogList class.
+        """
+        # Date of the tasks. None for today.
+        self.date: date = None
+
+        self._table = TaskLogTable()
+        self._table_sorted = TaskLogTable()
+        self.tasks = TaskLogRows(self._table)
+        self.tasks_sorted = []
+
+        # Start time of each task id to find the task by binary search
+        self._start_seconds_by_id = {}
+        self._next_id = 0
+        self._is_closed = False
+
+        # Aggregates kept up to date on every change of the list
+        self._group_time = {}
+        self._ticket_time = {}
+        self._total_hundredths = 0
+        self._is_sorted = True
+
+    def append_new(self, start_time: time, ticket_number: int, comment: str,
+        activity_id: int=DEFAULT_ACTIVITY_ID) -> bool:
+        """
+        @fn append_new
+        @brief Append new task log to the list.
+        @detail To append new task, the day should be open 
+                and star time of the new task should be latter than the last task.
+        @param start_time Star time of the new task.
+        @param ticket_number Ticket number of the new task.
+        @param comment Comment for the new task.
+        @param activity_id Activity id of the new task.
+        @return Succeeded or not.
+        """
+        if self.is_day_closed():
+            print("The day is already closed")
+            return False
+
+        start_seconds = time_to_seconds(start_time)
+        if self._table.start_seconds and self._table.start_seconds[-1] > start_seconds:
+            print("Please specify valid start_time: {} > {}".format(
+                seconds_to_str(self._table.start_seconds[-1]),
+                seconds_to_str(start_seconds)
+            ))
+            return False
+
+        self._add_task(len(self._table), start_seconds, ticket_number, comment, activity_id)
+        return True
+
+    def insert_new(self, start_time: time, ticket_number: int, comment: str,
+        activity_id: int=DEFAULT_ACTIVITY_ID) -> bool:
+        """
+        @fn insert_new
+        @brief Insert new task before existing tasks.
+        @param start_time Start time of the new task.
+        @param ticket_number Ticket number of the new task.
+        @param comment Comment for the new task.
+        @param activity_id Activity id of the new task.
+        @return Succeeded or not.
+        """
+        if self.is_day_closed():
+            print("The day is already closed")
+            return False
+
+        # Insert after the tasks starting at the same time
+        start_seconds = time_to_seconds(start_time)
+        index = bisect.bisect_right(self._table.start_seconds, start_seconds)
+        self._add_task(index, start_seconds, ticket_number, comment, activity_id)
+        return True
+
+    def remove_task(self, task_id: int=-1) -> bool:
+        """
+        @fn remove_task
+        @brief Remove an existing task.
+        @detail Ids of the other tasks stay valid after the removal.
+        @param task_id The id of the task to remove. -1 removes the last task.
+        @return Suceeded or not
+        """
+        if self.is_day_closed():
+            print("The day is already closed")
+            return False
+
+        if task_id == -1 and self._table.ids:
+            task_id = self._table.ids[-1]
+        if task_id not in self._start_seconds_by_id:
+            print("task_id out of range")
+            return False
+
+        index = self._index_of(task_id)
+        self._set_logged_seconds(index, 0)
+        self._table.delete(index)
+        del self._start_seconds_by_id[task_id]
+        self._update_logged_time(index - 1)
+        self._is_sorted = False
+        return True
+
+    def set_comment(self, task_id: int, comment: str) -> bool:
+        """
+        @fn set_comment
+        @brief Change the comment of a task and move its logged time to the group of the new comment.
+        @detail Tasks with ticket number 0 (end of day) keep their comment.
+        @param task_id The id of the task.
+        @param comment New comment of the task.
+        @return Succeeded or not.
+        """
+        if task_id not in self._start_seconds_by_id:
+            print("task_id out of range")
+            return False
+
+        index = self._index_of(task_id)
+        if not self._table.ticket_numbers[index]:
+            return False
+
+        logged_seconds = self._table.logged_seconds[index]
+        self._set_logged_seconds(index, 0)
+        self._table.comment_indexes[index] = self._table.intern_comment(comment)
+        self._set_logged_seconds(index, logged_seconds)
+        self._is_sorted = False
+        return True
+
+    def close_day(self, time: time) -> bool:
+        """
+        @fn close_day
+        @brief Close the day.
+        @detail If the day is already closed, return False.
+        @param time The time to end the day.
+        @return Succeeded or not.
+        """
+        if not self.is_day_closed():
+            self._add_task(len(self._table), time_to_seconds(time))
+            self.sort()
+            return True
+        else:
+            return False
+
+    def is_day_closed(self) -> bool:
+        """
+        @fn is_day_closed
+        @breif Check if the day is closed.
+        @detail The day is closed once a task of the end of the day is added.
+        @return If the day is closed.
+        """
+        return self._is_closed
+
+    def get_task(self, task_id: int) -> TaskLog:
+        """
+        @fn get_task
+        @brief Get a task by its id.
+        @param task_id The id of the task.
+        @detail The task is a view which is valid until the list is changed.
+        @return The task or None if no task has the id.
+        """
+        if task_id not in self._start_seconds_by_id:
+            return None
+        return self.tasks[self._index_of(task_id)]
+
+    def _add_task(self, index: int, start_seconds: int,
+        ticket_number: int=0, comment: str="EndOfDay", activity_id: int=DEFAULT_ACTIVITY_ID) -> None:
+        """
+        @fn _add_task
+        @brief Add new task at the index and update logged time around it.
+        @param index Index in tasks to insert the new task.
+        @param start_seconds Start time of the new task in seconds of the day.
+        @param ticket_number Ticket number of the new task.
+        @param comment Comment for the new task.
+        @param activity_id Activity id of the new task.
+        """
+        task_id = self._next_id
+        self._next_id += 1
+
+        self._table.insert(index, task_id, start_seconds, ticket_number, activity_id, comment)
+        self._start_seconds_by_id[task_id] = start_seconds
+        if ticket_number == 0:
+            self._is_closed = True
+
+        self._update_logged_time(index)
+        self._update_logged_time(index - 1)
+        self._is_sorted = False
+
+    def _index_of(self, task_id: int) -> int:
+        """
+        @fn _index_of
+        @brief Find the index of a task in tasks by binary search on start time.
+        @param task_id The id of the task contained in tasks.
+        @return Index of the task.
+        """
+        ids = self._table.ids
+        index = bisect.bisect_left(self._table.start_seconds, self._start_seconds_by_id[task_id])
+        while ids[index] != task_id:
+            index += 1
+        return index
+
+    def show_tasks(self) -> None:
+        """
+        @fn show_tasks
+        @brief Prints the list of tasks in order of start time.
+        """
+        for task in self.tasks:
+            task.show()
+        print("")
+    
+    def show_tasks_sorted(self) -> None:
+        """
+        @fn show_tasks_sorted
+        @brief Prints the list of tasks in order of ticket id.
+        """
+        for tasks_sorted in self.tasks_sorted:
+            tasks_sorted.show()
+        print(f"Total time: {self.get_total_time()}")
+        print("")
+    
+    def calculate_logged_time(self) -> None:
+        """
+        @fn calculate_logged_time
+        @brief Calculate logged time of every task.
+        @detail Logged time is kept up to date on every change of the list.
+                This recalculates all of them and the aggregates from scratch.
+        """
+        self._clear_aggregates()
+        for n in range(len(self._table)):
+            self._table.logged_seconds[n] = 0
+        for n in range(len(self._table)):
+            self._update_logged_time(n)
+        self._is_sorted = False
+
+    def _update_logged_time(self, index: int) -> None:
+        """
+        @fn _update_logged_time
+        @brief Update logged time of a task from the start time of the next task.
+        @detail The last task has no end, so its logged time is 0.
+        @param index Index of the task to update. Out of range index is ignored.
+        """
+        if not 0 <= index < len(self._table):
+            return
+
+        start_seconds = self._table.start_seconds
+        if index + 1 < len(self._table):
+            logged_seconds = start_seconds[index+1] - start_seconds[index]
+        else:
+            logged_seconds = 0
+        self._set_logged_seconds(index, logged_seconds)
+
+    def _set_logged_seconds(self, index: int, logged_seconds: int) -> None:
+        """
+        @fn _set_logged_seconds
+        @brief Set logged time of a task and apply the difference to the aggregates.
+        @param index Index of the task.
+        @param logged_seconds New logged time of the task in seconds.
+        """
+        table = self._table
+        delta = logged_seconds - table.logged_seconds[index]
+        table.logged_seconds[index] = logged_seconds
+
+        # Tasks with non-positive ticket number are not submitted
+        ticket_number = table.ticket_numbers[index]
+        if not delta or ticket_number <= 0:
+            return
+
+        key = (ticket_number, table.comment_indexes[index])
+        group_seconds = self._group_time.get(key, 0)
+        self._group_time[key] = group_seconds + delta
+        self._total_hundredths += self._to_hundredths(group_seconds + delta) - self._to_hundredths(group_seconds)
+
+        self._ticket_time[ticket_number] = self._ticket_time.get(ticket_number, 0) + delta
+
+    @staticmethod
+    def _to_hundredths(logged_seconds: int) -> int:
+        """
+        @fn _to_hundredths
+        @brief Convert logged time to hundredths of an hour as rounded by timedelta_to_hour.
+        @param logged_seconds Logged time in seconds to convert.
+        @return Hundredths of an hour.
+        """
+        return round(round(logged_seconds / 3600, 2) * 100)
+
+    def _clear_aggregates(self) -> None:
+        """
+        @fn _clear_aggregates
+        @brief Clear the aggregates of logged time.
+        """
+        self._group_time.clear()
+        self._ticket_time.clear()
+        self._total_hundredths = 0
+
+    def sort(self) -> None:
+        """
+        @fn sort
+        @brief Sort tasks in order of ticket id.
+        @detail Tasks with the same ticket number and comment are merged in a single pass.
+                Groups keep the order of their first task within the same ticket number.
+                Tasks with non-positive ticket number (end of day, lunch, ...) are dropped.
+                The list is rebuilt only if tasks have changed since the last sort.
+        """
+        if self._is_sorted:
+            return
+
+        table = self._table
+        first_rows = {}
+        for row, key in enumerate(zip(table.ticket_numbers, table.comment_indexes)):
+            if key[0] > 0 and key not in first_rows:
+                first_rows[key] = row
+
+        # Groups of the same ticket number stay in order of their first task
+        table_sorted = self._table_sorted
+        table_sorted.clear()
+        for key, row in sorted(first_rows.items(), key=lambda item: item[0][0]):
+            table_sorted.append(table.ids[row], table.start_seconds[row], key[0],
+                table.activity_ids[row], table.comments[key[1]], self._group_time.get(key, 0))
+
+        self.tasks_sorted = list(TaskLogRows(table_sorted))
+        self._is_sorted = True
+
+    def clear(self) -> None:
+        """
+        @fn clear
+        @brief Clear all tasks.
+        """
+        self._table.clear()
+        self._table_sorted.clear()
+        self.tasks_sorted = []
+        self._start_seconds_by_id.clear()
+        self._next_id = 0
+        self._is_closed = False
+        self._clear_aggregates()
+        self._is_sorted = True
+
+    def get_tasks_sorted(self) -> List[TaskLog]:
+        """
+        @fn get_tasks_sorted
+        @brief Get list of sorted tasks.
+        @return Sorted list of tasks.
+        """
+        return self.tasks_sorted
+
+    def get_str_tasks_sorted(self, activity_name: Callable[[int], str]=str,
+        ticket_title: Callable[[int], str]=None) -> str:
+        """Get list of tasks_sorted in formatted string
+
+        Args:
+            activity_name (Callable[[int], str]): Gives the name of an activity id, e.g. ActivityCatalogue.name
+            ticket_title (Callable[[int], str]): Gives the title of a ticket number, e.g. TicketCache.title.
+                None to show the number.
+
+        Returns:
+            str: List of tasks_sorted in formatted string
+        """
+        self.sort()
+        
+        str_tasks_sorted: str = ""
+        for task in self.tasks_sorted:
+            str_tasks_sorted += "{:10} {:>10} {:>10} {}\n".format(
+                ticket_title(task.ticket_number) if ticket_title else task.ticket_number,
+                timedelta_to_hour(task.logged_time),
+                activity_name(task.activity_id),
+                task.comment)
+        str_tasks_sorted += f"Total time: {self.get_total_time()}"
+
+        return str_tasks_sorted
+
+    def get_task_dict(self) -> dict:
+        """Get task list
+
+        Returns:
+            dict: Task list as a dictionary
+        """
+        key_date = "date"
+        key_task = "task_list"
+        key_version = "version"
+        task_dict = {
+            key_date: (self.date or date.today()).strftime("%Y-%m-%d"),
+            key_task: list(self.iter_task_dicts()),
+            key_version: TASK_DICT_VERSION
+        }
+
+        return task_dict
+
+    def iter_task_dicts(self) -> Iterator[dict]:
+        """Iterate tasks as dictionaries in the format of "task_list" of get_task_dict()
+
+        Yields:
+            dict: Dictionary of each task
+        """
+        key_star_time = "start_time"
+        key_ticket_id = "ticket_id"
+        key_activity_id = "activity_id"
+        key_comment = "comment"
+
+        table = self._table
+        for row in range(len(table)):
+            yield {
+                key_star_time: seconds_to_str(table.start_seconds[row]),
+                key_ticket_id: table.ticket_numbers[row],
+                key_activity_id: table.activity_ids[row],
+                key_comment: table.comment(row)
+            }
+
+    def get_total_time(self, ndigits: int=2) -> float:
+        """Get total time in the day
+
+        Args:
+            ndigits (int): Number of digits to round
+
+        Returns:
+            float: Sum of the hours of tasks_sorted
+        """
+        return round(self._total_hundredths / 100, ndigits)
+
+    def get_ticket_time(self, ticket_number: int) -> timedelta:
+        """Get logged time of a ticket in the day
+
+        Args:
+            ticket_number (int): Ticket number
+
+        Returns:
+            timedelta: Logged time of the ticket summed over all comments
+        """
+        return timedelta(seconds=self._ticket_time.get(ticket_number, 0))
+
+    def set_tasks(self, task_dict: dict) -> None:
+        """Set task list from dictionary
+
+        Args:
+            task_dict (dict): Dictionary of the task list.
+                "task_list" may be any iterable of tasks, e.g. a generator reading a file,
+                and is consumed one task at a time.
+                Activity id 1 of a dictionary without "version" is the default activity.
+        """
+        # Clear all tasks
+        self.clear()
+
+        key_date = "date"
+        key_task = "task_list"
+
+        key_start_time = "start_time"
+        key_ticket_id = "ticket_id"
+        key_activity_id = "activity_id"
+        key_comment = "comment"
+        version = task_dict.get("version", 1)
+
+        if key_date in task_dict:
+            self.date = datetime.strptime(task_dict[key_date], "%Y-%m-%d").date()
+
+        task_list = task_dict[key_task]
+
+        for task in task_list:
+            self.append_new(
+                str_to_seconds(task[key_start_time]),
+                int(task[key_ticket_id]),
+                str(task[key_comment]),
+                saved_activity_id(int(task.get(key_activity_id, DEFAULT_ACTIVITY_ID)), version)
+                )
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+@file task_log_table.py
+@author Y. Kasuga
+@date 2021/6/5
+@brief Definition of TaskLogTable class.
+"""
+
+from array import array
+
+
+class TaskLogTable():
+    """
+    @class TaskLogTable
+    @brief Columnar storage of task logs.
+    @detail Every column is a typed array and a row is a task.
+            Times are seconds of the day and durations are seconds.
+            Comments are interned in a table and rows hold the index of the comment.
+    """
+    def __init__(self) -> None:
+        """
+        @fn __init__
+        @brief Constructor of TaskLogTable class.
+        """
+        self.ids = array("l")
+        self.start_seconds = array("l")
+        self.logged_seconds = array("l")
+        self.ticket_numbers = array("l")
+        self.activity_ids = array("l")
+        self.comment_indexes = array("l")
+
+        self.comments = []
+        self._comment_indexes = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def insert(self, row: int, id: int, start_seconds: int, ticket_number: int,
+        activity_id: int, comment: str, logged_seconds: int=0) -> None:
+        """
+        @fn insert
+        @brief Insert a new row.
+        @param row Index of the new row.
+        @param id Identification number of the task.
+        @param start_seconds Start time in seconds of the day.
+        @param ticket_number Ticket id.
+        @param activity_id Activity id.
+        @param comment Comment of the task.
+        @param logged_seconds Duration of the task in seconds.
+        """
+        self.ids.insert(row, id)
+        self.start_seconds.insert(row, start_seconds)
+        self.logged_seconds.insert(row, logged_seconds)
+        self.ticket_numbers.insert(row, ticket_number)
+        self.activity_ids.insert(row, activity_id)
+        self.comment_indexes.insert(row, self.intern_comment(comment))
+
+    def append(self, id: int, start_seconds: int, ticket_number: int,
+        activity_id: int, comment: str, logged_seconds: int=0) -> None:
+        """
+        @fn append
+        @brief Append a new row.
+        @param id Identification number of the task.
+        @param start_seconds Start time in seconds of the day.
+        @param ticket_number Ticket id.
+        @param activity_id Activity id.
+        @param comment Comment of the task.
+        @param logged_seconds Duration of the task in seconds.
+        """
+        self.insert(len(self.ids), id, start_seconds, ticket_number,
+            activity_id, comment, logged_seconds)
+
+    def delete(self, row: int) -> None:
+        """
+        @fn delete
+        @brief Delete a row.
+        @param row Index of the row.
+        """
+        del self.ids[row]
+        del self.start_seconds[row]
+        del self.logged_seconds[row]
+        del self.ticket_numbers[row]
+        del self.activity_ids[row]
+        del self.comment_indexes[row]
+
+    def clear(self) -> None:
+        """
+        @fn clear
+        @brief Delete all rows and comments.
+        """
+        for column in (self.ids, self.start_seconds, self.logged_seconds,
+            self.ticket_numbers, self.activity_ids, self.comment_indexes):
+            del column[:]
+        self.comments.clear()
+        self._comment_indexes.clear()
+
+    def intern_comment(self, comment: str) -> int:
+        """
+        @fn intern_comment
+        @brief Get the index of a comment, adding it to the table if it is new.
+        @param comment Comment to intern.
+        @return Index of the comment in comments.
+        """
+        index = self._comment_indexes.get(comment)
+        if index is None:
+            index = len(self.comments)
+            self.comments.append(comment)
+            self._comment_indexes[comment] = index
+        return index
+
+    def comment(self, row: int) -> str:
+        """
+        @fn comment
+        @brief Get the comment of a row.
+        @param row Index of the row.
+        @return Comment of the task.
+        """
+        return self.comments[self.comment_indexes[row]]
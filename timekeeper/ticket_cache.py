@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+@file ticket_cache.py
+@author Y. Kasuga
+@date 2021/10/2
+@brief Cache of the subject, project, status and parent of Redmine issues.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List
+
+from timekeeper.ticket_validator import fetch_issues
+
+
+# Default database of the cached tickets
+TICKET_FILE = "TimeKeeperTickets.sqlite3"
+
+# Number of tickets kept in memory
+TICKET_CACHE_SIZE = 256
+
+# Seconds until a cached ticket is fetched again
+TICKET_TTL = 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    url TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    subject TEXT NOT NULL,
+    project TEXT NOT NULL,
+    status TEXT NOT NULL,
+    parent INTEGER,
+    fetched REAL NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (url, id)
+);
+CREATE INDEX IF NOT EXISTS tickets_used ON tickets (url, used);
+"""
+
+
+def parse_ticket(text: str) -> int:
+    """
+    @fn parse_ticket
+    @brief Get the ticket number of a text such as "101", "#101" or "#101 Subject".
+    @param text Text of a ticket.
+    @return Ticket number.
+    @exception ValueError if the text does not begin with a number.
+    """
+    words = text.strip().lstrip("#").split(maxsplit=1)
+    if not words:
+        raise ValueError(f"Invalid ticket: {text}")
+    return int(words[0])
+
+
+class TicketCache(object):
+    """
+    @class TicketCache
+    @brief Subject, project, status and parent of the issues of a server.
+    @detail Tickets are kept in a SQLite database, which holds every ticket seen,
+            and the recently looked up ones also in memory with LRU eviction,
+            so titles are shown without a request per lookup.
+            Tickets are fetched in a single query for all of them which are missing or expired.
+            Methods may be called from any thread.
+    """
+    def __init__(self, url: str, path_file: str=TICKET_FILE,
+        capacity: int=TICKET_CACHE_SIZE, ttl: float=TICKET_TTL) -> None:
+        """
+        @fn __init__
+        @brief Constructor of TicketCache class. Creates the database if it doesn't exist.
+        @param url URL of the Redmine's root page.
+        @param path_file Path to the database. Empty not to cache on the disk.
+        @param capacity Number of tickets kept in memory.
+        @param ttl Seconds until a cached ticket expires.
+        """
+        self.url = url.rstrip("/")
+        self.path_file = path_file
+        self.capacity = capacity
+        self.ttl = ttl
+
+        # Ticket number -> {"id", "subject", "project", "status", "parent", "fetched"}, least recently used first
+        self._memory: "OrderedDict[int, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path_file or ":memory:", check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """
+        @fn close
+        @brief Close the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+    def get(self, ticket_number: int) -> dict:
+        """
+        @fn get
+        @brief Get a cached ticket, expired or not, without a request.
+        @param ticket_number Ticket number.
+        @return Copy of {"id", "subject", "project", "status", "parent", "fetched"} or None if not cached.
+        """
+        with self._lock:
+            ticket = self._memory.get(ticket_number)
+            if ticket is not None:
+                self._memory.move_to_end(ticket_number)
+                return dict(ticket)
+
+            row = self._connection.execute(
+                "SELECT id, subject, project, status, parent, fetched FROM tickets WHERE url = ? AND id = ?",
+                (self.url, ticket_number)
+            ).fetchone()
+            if row is None:
+                return None
+            ticket = self._ticket(row)
+            self._remember(ticket)
+            return dict(ticket)
+
+    def subject(self, ticket_number: int) -> str:
+        """
+        @fn subject
+        @brief Get the subject of a ticket.
+        @param ticket_number Ticket number.
+        @return Subject, or empty if not cached.
+        """
+        ticket = self.get(ticket_number) if ticket_number > 0 else None
+        return ticket["subject"] if ticket is not None else ""
+
+    def title(self, ticket_number: int) -> str:
+        """
+        @fn title
+        @brief Get the title of a ticket to show.
+        @param ticket_number Ticket number.
+        @return "#<number> <subject>", or the number alone if not cached.
+        """
+        subject = self.subject(ticket_number)
+        return f"#{ticket_number} {subject}" if subject else str(ticket_number)
+
+    def is_fresh(self, ticket_number: int) -> bool:
+        """
+        @fn is_fresh
+        @brief Whether a ticket is fetched within the TTL.
+        @param ticket_number Ticket number.
+        @return True if fresh.
+        """
+        ticket = self.get(ticket_number)
+        return ticket is not None and time.time() - ticket["fetched"] < self.ttl
+
+    def put(self, issues: Iterable[dict]) -> None:
+        """
+        @fn put
+        @brief Cache issues in the form of the REST API.
+        @param issues Issues, e.g. from fetch_issues().
+        """
+        now = time.time()
+        tickets = [{
+            "id": issue["id"], "subject": issue.get("subject", ""),
+            "project": issue.get("project", {}).get("name", ""),
+            "status": issue.get("status", {}).get("name", ""),
+            "parent": issue["parent"]["id"] if issue.get("parent") else None,
+            "fetched": now
+        } for issue in issues]
+
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?, 0) "
+                    "ON CONFLICT (url, id) DO UPDATE SET subject = excluded.subject, project = excluded.project, "
+                    "status = excluded.status, parent = excluded.parent, fetched = excluded.fetched",
+                    [(self.url, ticket["id"], ticket["subject"], ticket["project"], ticket["status"],
+                        ticket["parent"], ticket["fetched"]) for ticket in tickets]
+                )
+            for ticket in tickets:
+                self._remember(ticket)
+
+    def fetch(self, redmine, ticket_numbers: Iterable[int]) -> int:
+        """
+        @fn fetch
+        @brief Fetch the tickets which are not cached or have expired, all in one query.
+        @detail Non-positive ticket numbers (end of day, lunch, ...) are not fetched.
+        @param redmine redminelib.Redmine
+        @param ticket_numbers Ticket numbers.
+        @return Number of tickets fetched.
+        @exception Exception of redminelib or requests if the server cannot be asked.
+        """
+        expired = [
+            ticket_number for ticket_number in set(ticket_numbers)
+            if ticket_number > 0 and not self.is_fresh(ticket_number)
+        ]
+        if not expired:
+            return 0
+
+        issues = fetch_issues(redmine, expired)
+        self.put(issues)
+        return len(issues)
+
+    def touch(self, ticket_numbers: Iterable[int]) -> None:
+        """
+        @fn touch
+        @brief Mark tickets as used now, e.g. when time is logged to them.
+        @param ticket_numbers Ticket numbers.
+        """
+        now = time.time()
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(
+                    "UPDATE tickets SET used = ? WHERE url = ? AND id = ?",
+                    [(now, self.url, ticket_number) for ticket_number in set(ticket_numbers)]
+                )
+
+    def recent(self, limit: int=50) -> List[dict]:
+        """
+        @fn recent
+        @brief Get the tickets used most recently.
+        @param limit Maximum number of tickets.
+        @return Tickets, most recently used first. Tickets never used come last in order of number.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, subject, project, status, parent, fetched FROM tickets WHERE url = ? "
+                "ORDER BY used DESC, id LIMIT ?", (self.url, limit)
+            ).fetchall()
+        return [self._ticket(row) for row in rows]
+
+    @staticmethod
+    def _ticket(row: tuple) -> dict:
+        """
+        @fn _ticket
+        @brief Get a ticket of a row of the database.
+        @param row Row of id, subject, project, status, parent and fetched.
+        @return Ticket.
+        """
+        return dict(zip(("id", "subject", "project", "status", "parent", "fetched"), row))
+
+    def _remember(self, ticket: dict) -> None:
+        """
+        @fn _remember
+        @brief Keep a ticket in memory as the most recently used one and evict the least recently used ones.
+        @param ticket Ticket.
+        """
+        self._memory[ticket["id"]] = ticket
+        self._memory.move_to_end(ticket["id"])
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
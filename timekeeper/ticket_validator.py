@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+@file ticket_validator.py
+@author Y. Kasuga
+@date 2021/9/18
+@brief Check ticket numbers against Redmine in bulk before submitting.
+"""
+
+import threading
+from typing import Iterable, List, Set, Tuple
+
+
+# (url, username, ticket number) of the issues found on the server and visible to the user.
+# Invalid tickets are not kept, so that they are found once the issues are created.
+_valid: Set[Tuple[str, str, int]] = set()
+_lock = threading.Lock()
+
+
+def fetch_issues(redmine, ticket_numbers: Iterable[int]) -> List[dict]:
+    """
+    @fn fetch_issues
+    @brief Get issues by id in a single filtered query, which the server pages.
+    @detail Closed issues are included, since time may be logged to them.
+    @param redmine redminelib.Redmine
+    @param ticket_numbers Issue ids.
+    @return Issues in the form of the REST API. Ids which are not found are missing.
+    """
+    ids = ",".join(str(ticket_number) for ticket_number in sorted(set(ticket_numbers)))
+    if not ids:
+        return []
+
+    issues, _ = redmine.engine.bulk_request(
+        "get", f"{redmine.url}/issues.json", "issues", issue_id=ids, status_id="*"
+    )
+    return issues
+
+
+def find_invalid_tickets(redmine, ticket_numbers: Iterable[int], ticket_cache=None, username: str="") -> List[int]:
+    """
+    @fn find_invalid_tickets
+    @brief Find ticket numbers which are not issues of the server.
+    @detail Only tickets not found before for the user are sent to the server, all in one query.
+            Non-positive ticket numbers (end of day, lunch, ...) are not submitted and not checked.
+    @param redmine redminelib.Redmine
+    @param ticket_numbers Ticket numbers to check.
+    @param ticket_cache TicketCache to keep the issues fetched to check them. None not to keep them.
+    @param username User of the client, since issues visible to a user may not be to another.
+    @return Invalid ticket numbers in order.
+    @exception Exception of redminelib or requests if the server cannot be asked.
+    """
+    ticket_numbers = {ticket_number for ticket_number in ticket_numbers if ticket_number > 0}
+    with _lock:
+        unknown = [
+            ticket_number for ticket_number in ticket_numbers if (redmine.url, username, ticket_number) not in _valid
+        ]
+    if not unknown:
+        return []
+
+    issues = fetch_issues(redmine, unknown)
+    if ticket_cache is not None:
+        ticket_cache.put(issues)
+    found = {issue["id"] for issue in issues}
+    with _lock:
+        _valid.update((redmine.url, username, ticket_number) for ticket_number in found)
+
+    return sorted(ticket_number for ticket_number in unknown if ticket_number not in found)
+
+
+def clear_cache() -> None:
+    """
+    @fn clear_cache
+    @brief Forget the checked tickets, e.g. after issues are created.
+    """
+    with _lock:
+        _valid.clear()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+@file time_of_day.py
+@author Y. Kasuga
+@date 2021/6/5
+@brief Conversion between time of the day and seconds of the day.
+"""
+
+from datetime import time
+
+
+def time_to_seconds(time_of_day) -> int:
+    """
+    @fn time_to_seconds
+    @brief Convert time of the day to seconds of the day.
+    @param time_of_day Seconds as int, or datetime.time / datetime.datetime.
+    @return Seconds from 00:00:00.
+    """
+    if isinstance(time_of_day, int):
+        return time_of_day
+
+    return time_of_day.hour * 3600 + time_of_day.minute * 60 + time_of_day.second
+
+
+def seconds_to_time(seconds: int) -> time:
+    """
+    @fn seconds_to_time
+    @brief Convert seconds of the day to datetime.time.
+    @param seconds Seconds from 00:00:00.
+    @return Time of the day.
+    """
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def seconds_to_str(seconds: int) -> str:
+    """
+    @fn seconds_to_str
+    @brief Convert seconds of the day to "HH:mm:ss" string.
+    @param seconds Seconds from 00:00:00.
+    @return Formatted time of the day.
+    """
+    return f"{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+def str_to_seconds(time_str: str) -> int:
+    """
+    @fn str_to_seconds
+    @brief Convert "HH:mm:ss" or "HH:mm" string to seconds of the day.
+    @param time_str Formatted time of the day.
+    @return Seconds from 00:00:00.
+    """
+    fields = [int(field) for field in time_str.split(":")]
+    fields += [0] * (3 - len(fields))
+    return fields[0] * 3600 + fields[1] * 60 + fields[2]